@@ -4,23 +4,46 @@ BE FORWARD Scraper - Simple HTTP API Server
 Provides REST endpoints for n8n to trigger scraping and retrieve data.
 """
 
+import base64
+import hashlib
 import json
 import logging
+import mimetypes
 import os
-import subprocess
-import sys
-from datetime import datetime
+import time
+import zipfile
+from datetime import datetime, timezone
 from pathlib import Path
 from typing import Dict
+from urllib.parse import quote
 
-from flask import Flask, jsonify, request, send_file
+from flask import Flask, g, jsonify, request, send_file, stream_with_context
+from flask.json.provider import DefaultJSONProvider
 from flask_cors import CORS
 
 import config
+from utils import catalog, compression, events, image_processor, jobs, jsonio, metrics, post_queue
+
+
+class FastJSONProvider(DefaultJSONProvider):
+    """jsonify() through utils.jsonio: orjson if available, compact UTF-8, RawJSON."""
+
+    def dumps(self, obj, **kwargs) -> str:
+        return jsonio.dumps(obj, default=self.default).decode("utf-8")
+
+    def loads(self, s, **kwargs):
+        return jsonio.loads(s)
+
+    def response(self, *args, **kwargs):
+        obj = self._prepare_response_obj(args, kwargs)
+        return self._app.response_class(jsonio.dumps(obj, default=self.default) + b"\n", mimetype=self.mimetype)
+
 
 # Initialize Flask app
 app = Flask(__name__)
+app.json = FastJSONProvider(app)
 CORS(app)  # Enable CORS for n8n
+app.config["USE_X_SENDFILE"] = config.IMAGE_OFFLOAD == "x-sendfile"
 
 # Configure logging
 logging.basicConfig(
@@ -29,59 +52,126 @@ logging.basicConfig(
 )
 logger = logging.getLogger(__name__)
 
+# Served image formats missing from older mimetypes tables
+mimetypes.add_type("image/webp", ".webp")
+mimetypes.add_type("image/avif", ".avif")
 
-def get_latest_vehicle() -> Dict | None:
+
+@app.before_request
+def start_timer():
+    g.request_started = time.perf_counter()
+
+
+@app.after_request
+def record_request(response):
+    """Count the request and its latency per route (not per URL)."""
+    endpoint = request.url_rule.rule if request.url_rule else "unmatched"
+    elapsed = time.perf_counter() - g.get("request_started", time.perf_counter())
+    metrics.API_SECONDS.observe(elapsed, endpoint=endpoint, method=request.method)
+    metrics.API_REQUESTS.inc(endpoint=endpoint, method=request.method, status=response.status_code)
+    return response
+
+
+# Response types worth compressing (images and zips already are)
+COMPRESSIBLE_MIMETYPES = {"application/json", "application/x-ndjson", "text/plain", "text/html"}
+
+
+@app.after_request
+def compress_response(response):
     """
-    Get the most recently scraped vehicle data.
+    gzip/Brotli-encode text responses of at least API_COMPRESS_MIN_BYTES.
 
-    Returns:
-        Dictionary with vehicle data or None if no vehicles found
+    Streamed responses (event streams, NDJSON, archives) and files are
+    left alone.
     """
-    vehicles_dir = config.DAILY_VEHICLE_BASE_DIR
+    if (
+        response.direct_passthrough
+        or response.is_streamed
+        or response.status_code < 200
+        or response.status_code in (204, 304)
+        or "Content-Encoding" in response.headers
+        or response.mimetype not in COMPRESSIBLE_MIMETYPES
+    ):
+        return response
 
-    if not vehicles_dir.exists():
-        return None
+    data = response.get_data()
+    if len(data) < config.API_COMPRESS_MIN_BYTES:
+        return response
 
-    # Get all vehicle folders, sorted by modification time (newest first)
-    vehicle_folders = sorted(
-        [d for d in vehicles_dir.iterdir() if d.is_dir()],
-        key=lambda x: x.stat().st_mtime,
-        reverse=True
-    )
+    response.vary.add("Accept-Encoding")
+    encoding = compression.negotiate(request.accept_encodings)
+    if not encoding:
+        return response
 
-    if not vehicle_folders:
-        return None
+    response.set_data(compression.compress(data, encoding))
+    response.headers["Content-Encoding"] = encoding
 
-    # Get the latest vehicle folder
-    latest_folder = vehicle_folders[0]
+    # The compressed body is a different representation of the same data
+    etag, weak = response.get_etag()
+    if etag and not weak:
+        response.set_etag(etag, weak=True)
+    return response
 
-    # Load data.json
-    data_file = latest_folder / "data.json"
-    if not data_file.exists():
-        return None
 
-    with open(data_file, "r") as f:
-        vehicle_data = json.load(f)
+# Cache lifetime of image URLs that carry the image's content hash (?v=)
+IMMUTABLE_MAX_AGE = 365 * 24 * 3600
+
+
+def cached_json(entries: list, build, *extra):
+    """
+    JSON response with validators, or 304 if the client's copy is current.
+
+    The ETag and Last-Modified come from the modification times of the
+    vehicles the response is built from, so build() - and its JSON
+    encoding - is skipped entirely for repeat polls.
 
-    # Add folder path for image retrieval
-    vehicle_data["folder_path"] = str(latest_folder)
+    Args:
+        entries: Catalog entries the response depends on
+        build: Returns the response data
+        extra: Anything else the response depends on (query parameters)
+    """
+    digest = hashlib.sha1()
+    for entry in entries:
+        digest.update(f"{entry.name}:{entry.stamp};".encode("utf-8"))
+    for value in extra:
+        digest.update(f"{value};".encode("utf-8"))
+    etag = digest.hexdigest()
+
+    last_modified = None
+    if entries:
+        last_modified = datetime.fromtimestamp(int(max(e.last_modified for e in entries)), timezone.utc)
+
+    if request.if_none_match:
+        # Weak comparison: compressed responses carry W/ ETags
+        not_modified = request.if_none_match.contains_weak(etag)
+    else:
+        since = request.if_modified_since
+        not_modified = bool(since and last_modified and last_modified <= since)
 
-    # Load facebook.json if exists
-    fb_file = latest_folder / "facebook.json"
-    if fb_file.exists():
-        with open(fb_file, "r") as f:
-            vehicle_data["facebook_post"] = json.load(f)
+    if not_modified:
+        response = app.response_class(status=304)
+    else:
+        response = jsonify(build())
 
-    # Get list of images
-    images_dir = latest_folder / "images"
-    if images_dir.exists():
-        vehicle_data["images"] = [
-            str(images_dir / f)
-            for f in sorted(os.listdir(images_dir))
-            if f.lower().endswith(('.jpg', '.jpeg', '.png'))
-        ]
+    response.set_etag(etag)
+    response.last_modified = last_modified
+    # Clients may cache but must revalidate (cheap 304s)
+    response.cache_control.no_cache = True
+    return response
 
-    return vehicle_data
+
+def get_latest_vehicle() -> Dict | None:
+    """
+    Get the most recently scraped vehicle data.
+
+    Returns:
+        Dictionary with vehicle data or None if no vehicles found
+    """
+    entry = catalog.get_catalog().latest()
+    if not entry:
+        return None
+
+    return entry.to_dict()
 
 
 def get_all_vehicles(limit: int = 10) -> list:
@@ -94,28 +184,10 @@ def get_all_vehicles(limit: int = 10) -> list:
     Returns:
         List of vehicle data dictionaries
     """
-    vehicles_dir = config.DAILY_VEHICLE_BASE_DIR
-
-    if not vehicles_dir.exists():
-        return []
-
-    # Get all vehicle folders, sorted by modification time (newest first)
-    vehicle_folders = sorted(
-        [d for d in vehicles_dir.iterdir() if d.is_dir()],
-        key=lambda x: x.stat().st_mtime,
-        reverse=True
-    )[:limit]
-
-    vehicles = []
-    for folder in vehicle_folders:
-        data_file = folder / "data.json"
-        if data_file.exists():
-            with open(data_file, "r") as f:
-                data = json.load(f)
-                data["folder_path"] = str(folder)
-                vehicles.append(data)
-
-    return vehicles
+    return [
+        entry.to_dict(facebook=False, images=False)
+        for entry in catalog.get_catalog().newest(limit)
+    ]
 
 
 @app.route("/", methods=["GET"])
@@ -125,14 +197,25 @@ def index():
         "service": "BE FORWARD Scraper API",
         "version": "1.0",
         "endpoints": {
-            "POST /scrape": "Trigger daily scraper",
+            "POST /scrape": "Queue the daily scraper (returns a job ID)",
             "POST /scrape/force": "Force scrape even if already ran today",
+            "GET /jobs/<job_id>": "Get status and result of a scrape job",
             "GET /vehicle/latest": "Get latest scraped vehicle",
             "GET /vehicle/all": "Get all vehicles (limit=10)",
+            "GET /vehicles": "Filtered, cursor-paginated vehicle listing",
+            "POST /vehicles/batch": "Data, Facebook post and images for many refs (body {\"refs\": [...]})",
+            "GET /vehicles/batch": "Same as POST, refs from ?refs=CB1,CB2 (cacheable)",
             "GET /vehicle/<ref_no>": "Get vehicle by reference number",
             "GET /images/<ref_no>": "Get list of images for a vehicle",
-            "GET /image/<ref_no>/<filename>": "Download a specific image",
+            "GET /images/<ref_no>/archive": "Download a vehicle's images as a zip (?variant=, ?limit=)",
+            "GET /image/<ref_no>/<filename>": "Download a specific image (?w=<width> for a smaller variant)",
+            "POST /webhook/new-vehicle": "Next vehicle to post (?batch=N to lease several)",
+            "POST /posts/<ref_no>/ack": "Confirm a leased vehicle was posted",
+            "POST /posts/<ref_no>/nack": "Return a leased vehicle to the queue",
+            "GET /posts": "Post queue counts",
+            "GET /events": "Live scrape and new-vehicle events (SSE, or ?format=ndjson)",
             "GET /health": "Health check",
+            "GET /metrics": "Prometheus metrics of the API and the scraper",
         }
     })
 
@@ -148,72 +231,90 @@ def health():
     })
 
 
+@app.route("/metrics", methods=["GET"])
+def prometheus_metrics():
+    """Metrics of all API workers and scraper processes (Prometheus text format)."""
+    return app.response_class(metrics.render(), mimetype="text/plain; version=0.0.4")
+
+
+def _scrape_result(job: dict) -> dict:
+    """Attach the scraped vehicle to a finished scrape job."""
+    # Pick up the new folder now rather than at the next poll
+    catalog.get_catalog().refresh()
+    return {"vehicle": get_latest_vehicle()}
+
+
+def _job_response(job: dict) -> dict:
+    """Public view of a job record."""
+    return {
+        "job_id": job["id"],
+        "status": job["status"],
+        "params": job["params"],
+        "created_at": job["created_at"],
+        "started_at": job["started_at"],
+        "finished_at": job["finished_at"],
+        "progress": job["progress"],
+        "result": job["result"],
+        "error": job["error"],
+        "status_url": f"/jobs/{job['id']}",
+    }
+
+
 @app.route("/scrape", methods=["POST"])
 def scrape():
     """
-    Trigger the daily scraper.
+    Queue a run of the daily scraper.
+
+    Returns 202 with a job ID at once; poll GET /jobs/<job_id> for status.
+    An identical request while a job is queued or running returns that job.
 
     Request body (optional):
     {
         "force": false,
         "country": "uae",
         "skip_images": false,
-        "mode": "individual"
+        "mode": "individual",
+        "wait": false
     }
+
+    With "wait": true the request blocks until the job finishes and
+    returns the old synchronous response (success, vehicle, stdout).
     """
     try:
-        data = request.get_json() or {}
-
-        # Build command
-        cmd = [sys.executable, "daily_scraper.py"]
-
-        if data.get("force"):
-            cmd.append("--force")
+        data = request.get_json(silent=True) or {}
+        manager = jobs.get_manager(on_success=_scrape_result)
+        job, created = manager.submit(data)
 
-        if data.get("country"):
-            cmd.extend(["--country", data["country"]])
+        if not data.get("wait"):
+            response = _job_response(job)
+            response["deduplicated"] = not created
+            return jsonify(response), 202
 
-        if data.get("skip_images"):
-            cmd.append("--skip-images")
+        job = manager.wait(job["id"], timeout=config.SCRAPE_JOB_TIMEOUT + 60)
+        result = job.get("result") or {}
 
-        if data.get("mode"):
-            cmd.extend(["--mode", data["mode"]])
-
-        if data.get("no_crop"):
-            cmd.append("--no-crop")
-
-        # Run scraper
-        logger.info(f"Running scraper: {' '.join(cmd)}")
-        result = subprocess.run(
-            cmd,
-            capture_output=True,
-            text=True,
-            timeout=300,  # 5 minute timeout
-            cwd=str(Path(__file__).parent)
-        )
-
-        if result.returncode == 0:
-            # Get the latest scraped vehicle
-            latest = get_latest_vehicle()
+        if job["status"] == jobs.JOB_SUCCEEDED:
             return jsonify({
                 "success": True,
                 "message": "Scraping completed successfully",
-                "vehicle": latest,
-                "stdout": result.stdout
+                "job_id": job["id"],
+                "vehicle": result.get("vehicle"),
+                "stdout": result.get("output", "")
             }), 200
+        elif job["status"] in jobs.ACTIVE_STATES or result.get("timed_out"):
+            return jsonify({
+                "success": False,
+                "job_id": job["id"],
+                "message": f"Scraping timed out after {config.SCRAPE_JOB_TIMEOUT} seconds"
+            }), 504
         else:
             return jsonify({
                 "success": False,
-                "message": "Scraping failed",
-                "stderr": result.stderr,
-                "stdout": result.stdout
+                "message": job.get("error") or "Scraping failed",
+                "job_id": job["id"],
+                "stdout": result.get("output", "")
             }), 500
 
-    except subprocess.TimeoutExpired:
-        return jsonify({
-            "success": False,
-            "message": "Scraping timed out after 5 minutes"
-        }), 504
     except Exception as e:
         logger.exception("Error during scraping")
         return jsonify({
@@ -228,140 +329,662 @@ def scrape_force():
     return scrape()  # This will check request body for force flag
 
 
+@app.route("/jobs/<job_id>", methods=["GET"])
+def job_status(job_id: str):
+    """Get the status, progress and result of a scrape job."""
+    job = jobs.get_manager(on_success=_scrape_result).get(job_id)
+
+    if not job:
+        return jsonify({"error": f"Job {job_id} not found"}), 404
+
+    return jsonify(_job_response(job)), 200
+
+
 @app.route("/vehicle/latest", methods=["GET"])
 def vehicle_latest():
     """Get the latest scraped vehicle."""
-    vehicle = get_latest_vehicle()
+    entry = catalog.get_catalog().latest()
+
+    if not entry:
+        return jsonify({"error": "No vehicles found"}), 404
 
-    if vehicle:
+    def build():
+        vehicle = entry.to_dict(raw=True)
         # Remove absolute paths for API responses
-        if "folder_path" in vehicle:
-            vehicle["folder_path"] = os.path.basename(vehicle["folder_path"])
+        vehicle["folder_path"] = entry.name
         if "image_folder" in vehicle:
             vehicle["image_folder"] = vehicle["folder_path"] + "/images"
-        return jsonify(vehicle), 200
-    else:
-        return jsonify({"error": "No vehicles found"}), 404
+        return vehicle
+
+    return cached_json([entry], build)
 
 
 @app.route("/vehicle/all", methods=["GET"])
 def vehicle_all():
     """Get all scraped vehicles."""
     limit = request.args.get("limit", 10, type=int)
-    vehicles = get_all_vehicles(limit)
+    entries = catalog.get_catalog().newest(limit)
+
+    def build():
+        vehicles = [entry.to_dict(facebook=False, images=False) for entry in entries]
+
+        # Clean up paths
+        for v in vehicles:
+            if "folder_path" in v:
+                v["folder_path"] = os.path.basename(v["folder_path"])
+            if "image_folder" in v:
+                v["image_folder"] = v["folder_path"] + "/images"
+            if "images" in v:
+                v["images"] = [os.path.basename(p) for p in v["images"]]
+
+        return vehicles
+
+    return cached_json(entries, build, limit)
+
+
+def encode_cursor(entry) -> str:
+    """Opaque pagination cursor pointing after a catalog entry."""
+    return base64.urlsafe_b64encode(json.dumps(entry.sort_key).encode("utf-8")).decode("ascii").rstrip("=")
+
+
+def decode_cursor(cursor: str) -> tuple:
+    """Inverse of encode_cursor(); raises ValueError for invalid cursors."""
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        negative_time, name = json.loads(base64.urlsafe_b64decode(padded))
+        return float(negative_time), str(name)
+    except Exception:
+        raise ValueError(f"Invalid cursor: {cursor}")
+
+
+def project(vehicle: dict, fields: list) -> dict:
+    """Keep only the requested fields; "specs.fuel" selects inside specs."""
+    result = {}
+    for field in fields:
+        name, _, sub = field.partition(".")
+        if name not in vehicle:
+            continue
+        if sub:
+            value = vehicle[name]
+            if isinstance(value, dict) and sub in value:
+                result.setdefault(name, {})[sub] = value[sub]
+        else:
+            result[name] = vehicle[name]
+    return result
+
 
-    # Clean up paths
-    for v in vehicles:
-        if "folder_path" in v:
-            v["folder_path"] = os.path.basename(v["folder_path"])
-        if "image_folder" in v:
-            v["image_folder"] = v["folder_path"] + "/images"
-        if "images" in v:
-            v["images"] = [os.path.basename(p) for p in v["images"]]
+@app.route("/vehicles", methods=["GET"])
+def vehicles_list():
+    """
+    Cursor-paginated, filterable vehicle listing (newest first).
+
+    Query parameters:
+        limit: Page size (default 20, max 100)
+        cursor: next_cursor from the previous page
+        country, make, fuel, transmission: Exact match, any case
+        year_min, year_max, mileage_min, mileage_max: Inclusive ranges
+        scraped_since: ISO date or datetime
+        fields: Comma-separated fields to return (e.g. ref_no,title,specs.fuel)
+    """
+    args = request.args
+    limit = max(1, min(args.get("limit", 20, type=int), 100))
 
-    return jsonify(vehicles), 200
+    filters = {facet: args[facet] for facet in catalog.EQUALITY_FACETS if args.get(facet)}
+    for name in ("year_min", "year_max", "mileage_min", "mileage_max"):
+        if name in args:
+            value = args.get(name, type=int)
+            if value is None:
+                return jsonify({"error": f"{name} must be an integer"}), 400
+            filters[name] = value
+
+    try:
+        if args.get("scraped_since"):
+            filters["scraped_since"] = datetime.fromisoformat(args["scraped_since"]).timestamp()
+        after = decode_cursor(args["cursor"]) if args.get("cursor") else None
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+
+    fields = [f.strip() for f in args.get("fields", "").split(",") if f.strip()]
+    entries, more = catalog.get_catalog().query(filters, after, limit)
+
+    def build():
+        vehicles = []
+        for entry in entries:
+            vehicle = entry.to_dict(facebook=False, images=False)
+            vehicle["folder_path"] = entry.name
+            vehicles.append(project(vehicle, fields) if fields else vehicle)
+
+        return {
+            "vehicles": vehicles,
+            "count": len(vehicles),
+            "next_cursor": encode_cursor(entries[-1]) if more else None,
+        }
+
+    return cached_json(entries, build, request.query_string.decode("utf-8"), more)
 
 
 @app.route("/vehicle/<ref_no>", methods=["GET"])
 def vehicle_by_ref(ref_no: str):
     """Get a specific vehicle by reference number."""
-    vehicles_dir = config.DAILY_VEHICLE_BASE_DIR
+    entry = catalog.get_catalog().get(ref_no)
+
+    if not entry:
+        return jsonify({"error": f"Vehicle {ref_no} not found"}), 404
+
+    def build():
+        data = entry.to_dict(facebook=False, images=False)
+        data["folder_path"] = entry.name
+        return data
 
-    # Find folder matching the ref number
-    for folder in vehicles_dir.iterdir():
-        if folder.is_dir() and ref_no.upper() in folder.name.upper():
-            data_file = folder / "data.json"
-            if data_file.exists():
-                with open(data_file, "r") as f:
-                    data = json.load(f)
-                    data["folder_path"] = folder.name
-                    return jsonify(data), 200
+    return cached_json([entry], build)
 
-    return jsonify({"error": f"Vehicle {ref_no} not found"}), 404
+
+# Maximum refs per batch request
+BATCH_MAX_REFS = 200
+
+
+def vehicle_bundle(ref_no: str, entry) -> dict:
+    """Data, Facebook post and image list of one vehicle for batch responses."""
+    if entry is None:
+        return {"ref_no": ref_no, "found": False}
+
+    vehicle = entry.to_dict(facebook=False, images=False)
+    vehicle["folder_path"] = entry.name
+    return {
+        "ref_no": ref_no,
+        "found": True,
+        "vehicle": vehicle,
+        "facebook_post": entry.facebook_json,
+        "images": entry.images,
+    }
+
+
+@app.route("/vehicles/batch", methods=["GET", "POST"])
+def vehicles_batch():
+    """
+    Look up many vehicles in one request.
+
+    Refs come from a JSON body {"refs": [...]} or ?refs=CB1,CB2; blank
+    refs are ignored. Each result holds the vehicle data, Facebook post
+    and image list; unknown refs are returned with "found": false.
+
+    With ?format=ndjson (or Accept: application/x-ndjson) one JSON object
+    per line is streamed instead of a single array.
+    """
+    body = request.get_json(silent=True)
+    if body is None and request.method == "POST" and request.get_data():
+        return jsonify({"error": "Request body must be JSON"}), 400
+    if body is not None and not isinstance(body, dict):
+        return jsonify({"error": 'Request body must be a JSON object like {"refs": [...]}'}), 400
+
+    if body and "refs" in body:
+        refs = body["refs"]
+        if not isinstance(refs, list) or not all(isinstance(r, str) for r in refs):
+            return jsonify({"error": '"refs" must be a list of strings'}), 400
+    else:
+        refs = request.args.get("refs", "").split(",")
+
+    # A blank ref would match the first vehicle through the substring lookup
+    refs = [r.strip() for r in refs if r.strip()]
+
+    if not refs:
+        return jsonify({"error": "No refs given"}), 400
+    if len(refs) > BATCH_MAX_REFS:
+        return jsonify({"error": f"At most {BATCH_MAX_REFS} refs per request"}), 400
+
+    found = catalog.get_catalog().get_many(refs)
+
+    wants_ndjson = (
+        request.args.get("format") == "ndjson"
+        or request.accept_mimetypes.best == "application/x-ndjson"
+    )
+    if wants_ndjson:
+        def lines():
+            for ref in refs:
+                yield jsonio.dumps(vehicle_bundle(ref, found[ref])) + b"\n"
+
+        return app.response_class(lines(), mimetype="application/x-ndjson")
+
+    def build():
+        return {"vehicles": [vehicle_bundle(ref, found[ref]) for ref in refs]}
+
+    if request.method == "POST":
+        return jsonify(build()), 200
+
+    entries = [e for e in found.values() if e is not None]
+    return cached_json(entries, build, ",".join(refs))
 
 
 @app.route("/images/<ref_no>", methods=["GET"])
 def vehicle_images(ref_no: str):
-    """Get list of images for a vehicle."""
-    vehicles_dir = config.DAILY_VEHICLE_BASE_DIR
-
-    for folder in vehicles_dir.iterdir():
-        if folder.is_dir() and ref_no.upper() in folder.name.upper():
-            images_dir = folder / "images"
-            if images_dir.exists():
-                images = [
-                    f for f in os.listdir(images_dir)
-                    if f.lower().endswith(('.jpg', '.jpeg', '.png'))
-                ]
-                return jsonify({
-                    "ref_no": ref_no,
-                    "folder": folder.name,
-                    "images": sorted(images)
-                }), 200
-
-    return jsonify({"error": f"Images for {ref_no} not found"}), 404
+    """
+    Get list of images for a vehicle.
+
+    "urls" holds a versioned URL per image; responses for those URLs can be
+    cached indefinitely.
+    """
+    entry = catalog.get_catalog().get(ref_no)
+
+    if not entry or not entry.images_dir.exists():
+        return jsonify({"error": f"Images for {ref_no} not found"}), 404
+
+    def build():
+        return {
+            "ref_no": ref_no,
+            "folder": entry.name,
+            "images": entry.images,
+            "urls": {
+                f: f"/image/{entry.ref_no or entry.name}/{f}?v={entry.image_digest(f)}"
+                for f in entry.images
+            },
+        }
+
+    return cached_json([entry], build, ref_no)
+
+
+def variant_width(requested: int) -> int | None:
+    """Smallest configured variant width covering the requested width (None = original)."""
+    widths = [w for w in sorted(config.DERIVATIVE_WIDTHS) if w >= requested]
+    return widths[0] if widths else None
+
+
+def resolve_variant(entry, filename: str, width: int) -> Path:
+    """
+    Path of the size variant of an image covering width, generated if missing.
+
+    The cached variant is found via the entry's cached content hash, without
+    reading the original. Returns the original if no variant is smaller.
+    """
+    image_path = entry.images_dir / filename
+    target = variant_width(width)
+    if not target:
+        return image_path
+
+    digest = entry.image_digest(filename)
+    variant = image_processor.derivative_path(image_path, target, digest) if digest else None
+    if variant is None or not variant.exists():
+        variant = image_processor.get_derivative(image_path, target, config.DERIVATIVE_QUALITY)
+    return variant
+
+
+def serve_image_file(path: Path, immutable: bool):
+    """
+    Send an image with caching headers.
+
+    Range and conditional requests are handled by send_file, or by the
+    front proxy when IMAGE_OFFLOAD is set.
+    """
+    max_age = IMMUTABLE_MAX_AGE if immutable else None
+
+    if config.IMAGE_OFFLOAD == "x-accel":
+        relative = path.relative_to(config.DAILY_VEHICLE_BASE_DIR).as_posix()
+        response = app.response_class(mimetype=mimetypes.guess_type(path.name)[0] or "application/octet-stream")
+        response.headers["X-Accel-Redirect"] = f"{config.IMAGE_OFFLOAD_PREFIX.rstrip('/')}/{quote(relative)}"
+        if immutable:
+            response.cache_control.public = True
+            response.cache_control.max_age = max_age
+        else:
+            response.cache_control.no_cache = True
+    else:
+        # Without max_age the response is sent with no-cache (revalidate)
+        response = send_file(path, conditional=True, etag=True, max_age=max_age)
+
+    if immutable:
+        response.cache_control.immutable = True
+    return response
 
 
 @app.route("/image/<ref_no>/<filename>", methods=["GET"])
 def get_image(ref_no: str, filename: str):
-    """Download a specific image file."""
-    vehicles_dir = config.DAILY_VEHICLE_BASE_DIR
+    """
+    Download a specific image file.
 
-    for folder in vehicles_dir.iterdir():
-        if folder.is_dir() and ref_no.upper() in folder.name.upper():
-            images_dir = folder / "images"
-            image_path = images_dir / filename
+    Query parameters:
+        w: Width in pixels; served from the nearest cached size variant
+           (config.DERIVATIVE_WIDTHS), generated on first request
+        v: Content hash from /images/<ref_no>; marks the response immutable
 
-            if image_path.exists():
-                return send_file(image_path)
+    Supports Range and If-None-Match/If-Modified-Since requests.
+    """
+    entry = catalog.get_catalog().get(ref_no)
+    if not entry:
+        return jsonify({"error": "Image not found"}), 404
 
-    return jsonify({"error": "Image not found"}), 404
+    # Hidden files (.manifest.json, .part downloads) and non-images stay private
+    if filename.startswith(".") or not filename.lower().endswith(config.IMAGE_EXTENSIONS):
+        return jsonify({"error": "Image not found"}), 404
 
+    image_path = entry.images_dir / filename
+    if not image_path.is_file():
+        return jsonify({"error": "Image not found"}), 404
 
-@app.route("/webhook/new-vehicle", methods=["POST"])
-def webhook_new_vehicle():
+    digest = entry.image_digest(filename)
+    version = request.args.get("v")
+    immutable = bool(version) and version == digest
+
+    width = request.args.get("w", type=int)
+    if width:
+        image_path = resolve_variant(entry, filename, width)
+
+    return serve_image_file(image_path, immutable)
+
+
+# Bytes copied per step when streaming archives
+ARCHIVE_CHUNK_SIZE = 64 * 1024
+
+
+class _StreamBuffer:
+    """Write-only, unseekable file for zipfile whose contents are drained as they are written."""
+
+    def __init__(self):
+        self._chunks = []
+        self._position = 0
+
+    def write(self, data) -> int:
+        self._chunks.append(bytes(data))
+        self._position += len(data)
+        return len(data)
+
+    def tell(self) -> int:
+        return self._position
+
+    def flush(self):
+        pass
+
+    def drain(self) -> bytes:
+        data = b"".join(self._chunks)
+        self._chunks = []
+        return data
+
+
+def stream_zip(files):
     """
-    Webhook endpoint for n8n to poll for new vehicles.
-    Returns the latest vehicle that hasn't been posted yet.
+    Yield a ZIP_STORED archive of (path, name) pairs chunk by chunk.
 
-    This works in conjunction with a state file to track which vehicles
-    have been sent to n8n for Facebook posting.
+    Nothing is buffered beyond one chunk: zipfile writes local headers and
+    data descriptors to the unseekable stream as it goes.
     """
-    # Get posted vehicles state
-    posted_state_file = config.STATE_DIR / "posted_vehicles.json"
-    posted_refs = set()
+    stream = _StreamBuffer()
+    with zipfile.ZipFile(stream, "w", compression=zipfile.ZIP_STORED) as archive:
+        for path, name in files:
+            info = zipfile.ZipInfo.from_file(path, name)
+            info.compress_type = zipfile.ZIP_STORED
+            with open(path, "rb") as src, archive.open(info, "w") as dest:
+                for chunk in iter(lambda: src.read(ARCHIVE_CHUNK_SIZE), b""):
+                    dest.write(chunk)
+                    yield stream.drain()
+            yield stream.drain()
+    # Central directory
+    yield stream.drain()
+
+
+@app.route("/images/<ref_no>/archive", methods=["GET"])
+def vehicle_images_archive(ref_no: str):
+    """
+    Download all images of a vehicle as one (uncompressed) zip, streamed.
 
+    Query parameters:
+        variant: "original" (default), "facebook" (FACEBOOK_IMAGE_WIDTH) or
+                 a width in pixels
+        limit: Only the first N images (e.g. 10 for a Facebook post)
+    """
+    entry = catalog.get_catalog().get(ref_no)
+    if not entry or not entry.images:
+        return jsonify({"error": f"Images for {ref_no} not found"}), 404
+
+    variant = request.args.get("variant", "original").lower()
+    if variant == "original":
+        width = None
+    elif variant == "facebook":
+        width = config.FACEBOOK_IMAGE_WIDTH
+    elif variant.isdigit():
+        width = int(variant)
+    else:
+        return jsonify({"error": f"Unknown variant: {variant}"}), 400
+
+    images = entry.images
+    if "limit" in request.args:
+        limit = request.args.get("limit", type=int)
+        if limit is None or limit < 1:
+            return jsonify({"error": "limit must be a positive integer"}), 400
+        images = images[:limit]
+
+    def files():
+        # Variants are generated lazily, so the first bytes go out at once
+        names = set()
+        for filename in images:
+            path = resolve_variant(entry, filename, width) if width else entry.images_dir / filename
+            # Variants are JPEGs whatever the original's format, so X.png
+            # and X.jpg would both become X.jpg
+            stem = Path(filename).stem
+            name = f"{stem}{path.suffix}"
+            copy = 2
+            while name in names:
+                name = f"{stem}_{copy}{path.suffix}"
+                copy += 1
+            names.add(name)
+            yield path, name
+
+    suffix = "" if variant == "original" else f"_{variant}"
+    response = app.response_class(stream_with_context(stream_zip(files())), mimetype="application/zip")
+    response.headers["Content-Disposition"] = f'attachment; filename="{entry.name}{suffix}.zip"'
+    return response
+
+
+def migrate_post_queue():
+    """
+    Import posted_vehicles.json into the post queue (first start only).
+
+    Only the latest vehicle is queued if it was not posted yet - the one
+    the old /webhook/new-vehicle would have returned next - so the
+    existing n8n flow keeps posting the same vehicle.
+    """
+    posted_state_file = config.STATE_DIR / "posted_vehicles.json"
+    posted_refs = []
     if posted_state_file.exists():
         with open(posted_state_file, "r") as f:
-            posted_refs = set(json.load(f).get("posted_vehicles", []))
+            posted_refs = json.load(f).get("posted_vehicles", [])
+
+    latest = catalog.get_catalog().latest()
+    candidates = [(latest.ref_no, latest.name, latest.scraped_at)] if latest and latest.ref_no else []
+    post_queue.get_queue().migrate(posted_refs, candidates)
+
+
+def leased_vehicle(lease: dict) -> Dict | None:
+    """Vehicle data for a leased queue item, or None if its folder is gone."""
+    vehicles = catalog.get_catalog()
+    entry = vehicles.get(lease["folder"] or lease["ref_no"])
+    if entry is None:
+        # Enqueued by the scraper moments ago - don't wait for the next poll
+        vehicles.refresh()
+        entry = vehicles.get(lease["folder"] or lease["ref_no"])
+    return entry.to_dict(raw=True) if entry else None
+
 
-    # Get latest vehicle
-    latest = get_latest_vehicle()
+def lease_vehicles(batch: int) -> list:
+    """Lease up to batch vehicles that still exist; vanished ones are failed."""
+    queue = post_queue.get_queue()
+    leases = []
 
-    if not latest:
-        return jsonify({"message": "No vehicles found"}), 404
+    while len(leases) < batch:
+        taken = queue.lease(batch - len(leases))
+        if not taken:
+            break
+        for lease in taken:
+            vehicle = leased_vehicle(lease)
+            if vehicle is None:
+                logger.warning(f"Queued vehicle {lease['ref_no']} no longer exists")
+                queue.nack(lease["ref_no"], lease["lease_token"], retry=False)
+                continue
+            lease["vehicle"] = vehicle
+            leases.append(lease)
 
-    ref_no = latest.get("specs", {}).get("ref_no", "")
+    return leases
+
+
+@app.route("/webhook/new-vehicle", methods=["POST"])
+def webhook_new_vehicle():
+    """
+    Webhook endpoint for n8n to poll for new vehicles.
 
-    if ref_no in posted_refs:
+    Without parameters, returns the next unposted vehicle and marks it as
+    posted at once (the original behaviour).
+
+    With ?batch=N, leases up to N vehicles instead. Each comes with a
+    lease_token; ack it via POST /posts/<ref_no>/ack after posting, or
+    /posts/<ref_no>/nack to retry later. Unacked leases expire after
+    POST_LEASE_TIMEOUT seconds and are handed out again.
+    """
+    batch = request.args.get("batch", type=int)
+
+    if batch:
+        leases = lease_vehicles(min(batch, 100))
+        return jsonify({
+            "leases": leases,
+            "count": len(leases),
+            "post_required": bool(leases),
+        }), 200
+
+    leases = lease_vehicles(1)
+    if not leases:
+        latest = catalog.get_catalog().latest()
+        if not latest:
+            return jsonify({"message": "No vehicles found"}), 404
         return jsonify({
             "message": "No new vehicles to post",
-            "latest_ref": ref_no
+            "latest_ref": latest.ref_no
         }), 200
 
-    # Mark as posted
-    posted_refs.add(ref_no)
-    posted_state_file.parent.mkdir(parents=True, exist_ok=True)
-    with open(posted_state_file, "w") as f:
-        json.dump({"posted_vehicles": list(posted_refs)}, f)
+    lease = leases[0]
+    post_queue.get_queue().ack(lease["ref_no"], lease["lease_token"])
 
     # Return vehicle data for posting
     return jsonify({
-        "vehicle": latest,
+        "vehicle": lease["vehicle"],
         "post_required": True
     }), 200
 
 
+@app.route("/posts/<ref_no>/ack", methods=["POST"])
+def post_ack(ref_no: str):
+    """Confirm a leased vehicle was posted. Body: {"lease_token": ...}"""
+    token = (request.get_json(silent=True) or {}).get("lease_token", "")
+
+    if not post_queue.get_queue().ack(ref_no, token):
+        return jsonify({"error": f"No active lease {token!r} for {ref_no}"}), 409
+
+    return jsonify({"ref_no": ref_no, "status": post_queue.POST_DONE}), 200
+
+
+@app.route("/posts/<ref_no>/nack", methods=["POST"])
+def post_nack(ref_no: str):
+    """
+    Return a leased vehicle to the queue.
+
+    Body: {"lease_token": ..., "retry": true} - with retry false the
+    vehicle is marked failed instead.
+    """
+    data = request.get_json(silent=True) or {}
+    if not isinstance(data, dict):
+        return jsonify({"error": "Body must be a JSON object"}), 400
+
+    retry = data.get("retry", True)
+    if not isinstance(retry, bool):
+        return jsonify({"error": "retry must be true or false"}), 400
+
+    queue = post_queue.get_queue()
+    if not queue.nack(ref_no, data.get("lease_token", ""), retry=retry):
+        return jsonify({"error": f"No active lease for {ref_no}"}), 409
+
+    return jsonify({"ref_no": ref_no, "queue": queue.stats()}), 200
+
+
+@app.route("/posts", methods=["GET"])
+def post_stats():
+    """Number of queued, leased, posted and failed vehicles."""
+    return jsonify(post_queue.get_queue().stats()), 200
+
+
+def sse_frame(event: dict | None) -> str:
+    """Server-sent events encoding of an event (None = keep-alive comment)."""
+    if event is None:
+        return ": keep-alive\n\n"
+    payload = {"type": event["type"], "time": event["time"], **event["data"]}
+    return f"id: {event['id']}\nevent: {event['type']}\ndata: {jsonio.dumps(payload).decode('utf-8')}\n\n"
+
+
+def ndjson_line(event: dict | None) -> str:
+    """NDJSON encoding of an event (None = empty keep-alive line)."""
+    if event is None:
+        return "\n"
+    return jsonio.dumps(event).decode("utf-8") + "\n"
+
+
+@app.route("/events", methods=["GET"])
+def event_stream():
+    """
+    Stream scrape progress and new vehicles as they happen.
+
+    Server-sent events by default (event: <type>, data: JSON payload);
+    with ?format=ndjson (or Accept: application/x-ndjson) one event
+    object per line, and empty lines as keep-alives.
+
+    Query parameters:
+        types: Comma-separated event types, e.g. vehicle.published
+        last_event_id: Resume after this event (the Last-Event-ID header
+                       that EventSource sends on reconnect also works)
+    """
+    bus = events.get_bus()
+    if len(bus) >= config.EVENT_MAX_STREAMS:
+        response = jsonify({"error": "Too many open event streams"})
+        response.headers["Retry-After"] = "30"
+        return response, 503
+
+    types = [t.strip() for t in request.args.get("types", "").split(",") if t.strip()]
+    last_id = request.headers.get("Last-Event-ID") or request.args.get("last_event_id")
+
+    wants_ndjson = (
+        request.args.get("format") == "ndjson"
+        or request.accept_mimetypes.best == "application/x-ndjson"
+    )
+    encode = ndjson_line if wants_ndjson else sse_frame
+
+    subscription = bus.subscribe(types, last_id)
+
+    def stream():
+        try:
+            if not wants_ndjson:
+                # Reconnect delay for EventSource clients (ms)
+                yield "retry: 3000\n\n"
+            for event in subscription.events(config.EVENT_HEARTBEAT_INTERVAL):
+                yield encode(event)
+        finally:
+            subscription.close()
+
+    response = app.response_class(
+        stream(),
+        mimetype="application/x-ndjson" if wants_ndjson else "text/event-stream",
+    )
+    response.headers["Cache-Control"] = "no-cache"
+    # Stop nginx from buffering the stream
+    response.headers["X-Accel-Buffering"] = "no"
+    return response
+
+
+def register_gauges():
+    """Gauges read from the catalog and the post queue when /metrics is scraped."""
+    metrics.CATALOG_VEHICLES.set_function(lambda: len(catalog.get_catalog()))
+    for status in (post_queue.POST_PENDING, post_queue.POST_LEASED, post_queue.POST_DONE, post_queue.POST_FAILED):
+        metrics.POST_QUEUE_DEPTH.set_function(lambda status=status: post_queue.get_queue().stats()[status], status=status)
+
+
+# Build the vehicle index once per worker process
+catalog.get_catalog()
+migrate_post_queue()
+register_gauges()
+metrics.share()
+
+
 if __name__ == "__main__":
     # Run Flask server
     port = int(os.environ.get("PORT", 5000))
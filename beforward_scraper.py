@@ -15,12 +15,10 @@ import logging
 import sys
 from pathlib import Path
 from datetime import datetime
-from tqdm import tqdm
-import pandas as pd
 
 import requests
 import config
-from utils import scraper, downloader, parser
+from utils import scraper, downloader, parser, download_queue, metrics
 
 # Set up logging
 logging.basicConfig(
@@ -45,7 +43,7 @@ def load_checkpoint() -> set:
 def save_checkpoint(processed_refs: set):
     """Save processed vehicle Ref Nos to checkpoint file."""
     try:
-        with open(config.CHECKPOINT_FILE, "w") as f:
+        with metrics.CHECKPOINT_SECONDS.time(file="checkpoint"), open(config.CHECKPOINT_FILE, "w") as f:
             json.dump({"processed": list(processed_refs), "updated": str(datetime.now())}, f)
     except Exception as e:
         logger.warning(f"Could not save checkpoint: {e}")
@@ -124,11 +122,43 @@ def scrape_from_stock_list(limit: int, mode: str, skip_images: bool = False) ->
 
     logger.info(f"Found {len(vehicle_links)} vehicles to process")
 
-    # Scrape each vehicle
+    # Scrape each vehicle. Detail pages are fetched here while images are
+    # handed to the global download scheduler and transferred in the background.
     all_data = []
+    pending = []  # (ref_no, flat_data, VehicleDownload) still transferring images
     session = requests.Session()
-
-    for vehicle in tqdm(vehicle_links, desc="Scraping vehicles"):
+    scheduler = None if skip_images or not mode else download_queue.get_scheduler()
+
+    def finish(ref_no: str, flat_data: dict, handle=None):
+        if handle:
+            image_result = handle.wait()
+            if handle.futures and not image_result["count"]:
+                # Not checkpointed, so the next run tries the vehicle again
+                logger.error(f"No images downloaded for {ref_no}")
+                metrics.VEHICLES_SCRAPED.inc(result="failed")
+                return
+
+            flat_data["image_folder"] = image_result["folder"]
+            flat_data["image_count"] = image_result["count"]
+            flat_data["image_mode"] = image_result["mode"]
+
+        all_data.append(flat_data)
+        processed_refs.add(ref_no)
+        metrics.VEHICLES_SCRAPED.inc(result="succeeded")
+
+        # Save checkpoint periodically
+        if len(all_data) % 10 == 0:
+            save_checkpoint(processed_refs)
+
+    def collect_finished():
+        for item in [p for p in pending if p[2].done()]:
+            pending.remove(item)
+            finish(*item)
+
+    from tqdm import tqdm
+
+    progress = tqdm(vehicle_links, desc="Scraping vehicles")
+    for vehicle in progress:
         ref_no = vehicle["ref_no"]
 
         # Skip if already processed
@@ -149,45 +179,43 @@ def scrape_from_stock_list(limit: int, mode: str, skip_images: bool = False) ->
 
             vehicle_data = parser.parse_vehicle_detail(html, url)
 
-            # Download images if not skipped
-            if not skip_images:
-                image_mode = mode if ref_no not in processed_refs else None
-                if image_mode:
-                    image_result = downloader.download_vehicle_images(
-                        image_urls=vehicle_data["image_urls"],
-                        zip_url=vehicle_data["zip_url"],
-                        ref_no=ref_no,
-                        mode=image_mode,
-                    )
-
-                    vehicle_data["image_folder"] = image_result["folder"]
-                    vehicle_data["image_count"] = image_result["count"]
-                    vehicle_data["image_mode"] = image_result["mode"]
-            else:
-                vehicle_data["image_folder"] = ""
-                vehicle_data["image_count"] = 0
-                vehicle_data["image_mode"] = ""
-
             # Flatten specs to top level
             flat_data = {
                 "detail_url": vehicle_data["detail_url"],
                 **vehicle_data["specs"],
-                "image_folder": vehicle_data.get("image_folder", ""),
-                "image_count": vehicle_data.get("image_count", 0),
-                "image_mode": vehicle_data.get("image_mode", ""),
+                "image_folder": "",
+                "image_count": 0,
+                "image_mode": "",
             }
 
-            all_data.append(flat_data)
-            processed_refs.add(ref_no)
-
-            # Save checkpoint periodically
-            if len(all_data) % 10 == 0:
-                save_checkpoint(processed_refs)
+            # Queue images unless skipped; the vehicle is only checkpointed
+            # once its images have finished downloading
+            if scheduler:
+                handle = scheduler.submit_vehicle(
+                    image_urls=vehicle_data["image_urls"],
+                    zip_url=vehicle_data["zip_url"],
+                    ref_no=ref_no,
+                    mode=mode,
+                )
+                pending.append((ref_no, flat_data, handle))
+            else:
+                finish(ref_no, flat_data)
 
         except Exception as e:
             logger.error(f"Error processing {ref_no}: {e}")
             continue
 
+        finally:
+            collect_finished()
+            if scheduler:
+                progress.set_postfix(image_queue=scheduler.queue_depth, vehicles_pending=len(pending))
+
+    # Wait for the remaining image transfers
+    if pending:
+        logger.info(f"Waiting for images of {len(pending)} vehicles ({scheduler.queue_depth} queued)...")
+    for ref_no, flat_data, handle in pending:
+        finish(ref_no, flat_data, handle)
+
     # Save final checkpoint
     save_checkpoint(processed_refs)
 
@@ -215,8 +243,10 @@ def export_data(data: list):
     except Exception as e:
         logger.error(f"Failed to export JSON: {e}")
 
-    # Export to CSV
+    # Export to CSV (pandas is only loaded here - it is the slowest import)
     try:
+        import pandas as pd
+
         df = pd.DataFrame(data)
         df.to_csv(config.CSV_OUTPUT_FILE, index=False, encoding="utf-8")
         logger.info(f"CSV exported to: {config.CSV_OUTPUT_FILE}")
@@ -283,8 +313,17 @@ Examples:
         help="Custom output directory path",
     )
 
+    parser.add_argument(
+        "--metrics-file",
+        type=str,
+        help="Write metrics in Prometheus text format to this file at exit",
+    )
+
     args = parser.parse_args()
 
+    if args.metrics_file:
+        metrics.dump_at_exit(args.metrics_file)
+
     # Override output directory if specified
     if args.output:
         output_dir = Path(args.output)
@@ -294,10 +333,9 @@ Examples:
         config.JSON_OUTPUT_FILE = config.DATA_DIR / "vehicles.json"
         config.CSV_OUTPUT_FILE = config.DATA_DIR / "vehicles.csv"
         config.CHECKPOINT_FILE = config.DATA_DIR / ".checkpoint.json"
+        config.BLOB_STORE_DIR = output_dir / "blobs"
 
-        # Create directories
-        for dir_path in [config.OUTPUT_DIR, config.DATA_DIR, config.VEHICLES_DIR]:
-            dir_path.mkdir(parents=True, exist_ok=True)
+    config.ensure_directories()
 
     # Print configuration
     print("=" * 60)
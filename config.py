@@ -11,9 +11,12 @@ OUTPUT_DIR = BASE_DIR / "output"
 DATA_DIR = OUTPUT_DIR / "data"
 VEHICLES_DIR = OUTPUT_DIR / "vehicles"
 
-# Create directories if they don't exist
-for dir_path in [OUTPUT_DIR, DATA_DIR, VEHICLES_DIR]:
-    dir_path.mkdir(parents=True, exist_ok=True)
+
+def ensure_directories():
+    """Create the output directories (called by the CLIs, not at import)."""
+    for dir_path in [OUTPUT_DIR, DATA_DIR, VEHICLES_DIR]:
+        dir_path.mkdir(parents=True, exist_ok=True)
+
 
 # BE FORWARD URLs
 BASE_URL = "https://www.beforward.jp"
@@ -116,11 +119,45 @@ ITEMS_PER_PAGE = 25
 # Image download modes
 IMAGE_MODE_INDIVIDUAL = "individual"
 IMAGE_MODE_ZIP = "zip"
+ZIP_SPOOL_MAX_SIZE = 64 * 1024 * 1024  # Zip archives are buffered in memory up to this size
 
 # Image cropping settings
 ENABLE_CROPPING = True  # Automatically crop watermarks from downloaded images
 CROP_PERCENTAGE = 7  # Percentage of image height to crop from bottom (5-10%)
 CROP_QUALITY = 95  # JPEG quality when saving cropped images (85-100, higher = better)
+CROP_MODE_FIXED = "fixed"  # Always crop CROP_PERCENTAGE
+CROP_MODE_ADAPTIVE = "adaptive"  # Detect the watermark band (NumPy) and crop only that
+CROP_MODE = CROP_MODE_FIXED
+CROP_CALIBRATION_IMAGES = 3  # Adaptive mode, zip archives: images analysed together; the rest reuse the result
+LOSSLESS_JPEG_CROP = True  # Crop JPEGs in the DCT domain via jpegtran when installed (no re-encode)
+
+# Stored image format: "original" keeps the source JPEG/PNG; "webp" or "avif"
+# re-encode during the crop (AVIF needs Pillow >= 11.2 or pillow-avif-plugin)
+OUTPUT_IMAGE_FORMAT = "original"
+OUTPUT_FORMAT_QUALITY = {"webp": 82, "avif": 60}  # JPEG uses CROP_QUALITY
+KEEP_ORIGINAL_JPEG = False  # With webp/avif, also keep the cropped JPEG/PNG in originals/
+IMAGE_EXTENSIONS = (".jpg", ".jpeg", ".png", ".webp", ".avif")  # Files listed as vehicle images
+
+# Downscaled variants generated right after cropping (cached in images/.derivatives)
+GENERATE_DERIVATIVES = True
+DERIVATIVE_WIDTHS = [1080, 480, 160]  # Facebook upload, web preview, thumbnail
+DERIVATIVE_QUALITY = 85
+FACEBOOK_IMAGE_WIDTH = 1080  # Variant used for Facebook uploads
+
+# Image processing pipeline
+IMAGE_PIPELINE_MEMORY = "memory"  # Download, crop and encode in memory, then one atomic write
+IMAGE_PIPELINE_DISK = "disk"  # Stream to disk, then crop the file in place
+IMAGE_PIPELINE = IMAGE_PIPELINE_MEMORY
+
+# Content-addressed image store (memory pipeline only): each processed image is
+# stored once and hardlinked into vehicle folders; unchanged URLs are skipped
+ENABLE_BLOB_STORE = True
+BLOB_STORE_DIR = OUTPUT_DIR / "blobs"
+
+# Image download scheduler (shared across all vehicles in a run)
+IMAGE_DOWNLOAD_WORKERS = 4  # Concurrent image transfers
+IMAGE_BANDWIDTH_LIMIT = None  # Cap for image transfers in bytes per second (None = unlimited)
+IMAGE_PRIORITY_COUNT = 10  # First N images of each vehicle jump the queue (Facebook post set)
 
 # Default settings
 DEFAULT_VEHICLE_LIMIT = None  # None = scrape all vehicles
@@ -180,6 +217,17 @@ LOG_LEVEL = "INFO"
 STATE_DIR = BASE_DIR / "state"
 STATE_FILE = STATE_DIR / "scraper_state.json"
 
+# Stock list frontier (how the next unscraped vehicle is found)
+FRONTIER_FILE = STATE_DIR / "frontier.json"  # Stock list pages seen: vehicles listed and when
+FRONTIER_RECHECK_PAGES = 2  # Newest pages fetched every run to catch fresh arrivals
+FRONTIER_PREFETCH = True  # Fetch the known candidate's detail page while the newest pages are re-checked
+FRONTIER_MAX_AGE = 7 * 24 * 3600  # Seconds a remembered stock page is trusted; older pages are fetched again
+STOCK_PAGE_LIMIT = 150  # Deepest stock list page scanned
+
+# Batch mode (daily_scraper.py --count / --until-time)
+DAILY_BATCH_WORKERS = 3  # Vehicles scraped at once; each fetches pages at the normal request rate
+DAILY_BATCH_MAX = 50  # Vehicles selected when only --until-time is given
+
 # Daily mode organized output structure
 DAILY_VEHICLE_BASE_DIR = OUTPUT_DIR / "vehicles"
 
@@ -210,3 +258,44 @@ SERVICE_SCRIPT = str(BASE_DIR / "daily_scraper.py")
 
 # Logging for service
 SERVICE_LOG_FILE = STATE_DIR / "scraper.log"
+
+# API server
+CATALOG_POLL_INTERVAL = 5  # Seconds between checks of the vehicle folders for changes (0 = no polling)
+SCRAPE_JOB_DIR = STATE_DIR / "jobs"  # Background scrape job records (shared by all API workers)
+SCRAPE_JOB_CONCURRENCY = 1  # Scrapers running at once (they share STATE_FILE)
+SCRAPE_JOB_TIMEOUT = 300  # seconds
+SCRAPE_JOB_HISTORY = 200  # Finished job records kept
+SCRAPE_WORKER_SUBPROCESS = "subprocess"  # New daily_scraper.py process per job
+SCRAPE_WORKER_WARM = "warm"  # Long-lived worker process with modules and HTTP connections kept warm
+SCRAPE_WORKER_MODE = SCRAPE_WORKER_WARM
+SCRAPE_WORKER_START_TIMEOUT = 60  # seconds
+# Image bytes can be handed to a front proxy instead of streaming through
+# gunicorn: None, "x-accel" (nginx X-Accel-Redirect) or "x-sendfile" (Apache,
+# lighttpd). For nginx, IMAGE_OFFLOAD_PREFIX must be an internal location
+# aliased to DAILY_VEHICLE_BASE_DIR.
+IMAGE_OFFLOAD = None
+IMAGE_OFFLOAD_PREFIX = "/protected-vehicles"
+
+# Facebook post queue (/webhook/new-vehicle)
+POST_QUEUE_DB = STATE_DIR / "post_queue.db"
+POST_LEASE_TIMEOUT = 600  # Seconds n8n has to ack a leased vehicle before it is handed out again
+POST_MAX_ATTEMPTS = 5  # Leases per vehicle before it is marked failed
+
+# Event stream (GET /events)
+EVENT_LOG_FILE = STATE_DIR / "events.ndjson"  # Append-only log written by the scraper and API workers
+EVENT_LOG_MAX_BYTES = 5 * 1024 * 1024  # Log is rotated to events.ndjson.1 beyond this size
+EVENT_POLL_INTERVAL = 0.25  # Seconds between checks of the log by each API worker's tail thread
+EVENT_HEARTBEAT_INTERVAL = 15  # Seconds of silence before a keep-alive is sent to stream clients
+EVENT_SUBSCRIBER_BUFFER = 1000  # Undelivered events per client before it is disconnected
+EVENT_MAX_STREAMS = 2  # Open streams per API worker; each one holds a gunicorn thread
+
+# Metrics (GET /metrics)
+METRICS_DIR = STATE_DIR / "metrics"  # Per-process snapshots merged by /metrics (None = this process only)
+METRICS_FLUSH_INTERVAL = 15  # Seconds between snapshots of long-lived processes
+
+# API response encoding
+API_JSON_ENCODER = "auto"  # "auto" (orjson if installed), "orjson" or "stdlib"
+API_COMPRESSION = ("br", "gzip")  # Content encodings offered, preferred first ("br" needs the brotli package)
+API_COMPRESS_MIN_BYTES = 1024  # Smaller responses are sent uncompressed
+API_GZIP_LEVEL = 6
+API_BROTLI_QUALITY = 5  # 0-11; 4-6 suit on-the-fly compression
@@ -7,6 +7,7 @@ Usage:
     python3 daily_scraper.py              # Run daily scraper
     python3 daily_scraper.py --force      # Force run even if already ran today
     python3 daily_scraper.py --url <URL>  # Scrape specific vehicle
+    python3 daily_scraper.py --count 10   # Scrape the next 10 vehicles concurrently
 """
 
 import argparse
@@ -15,14 +16,18 @@ import logging
 import os
 import re
 import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
 from datetime import datetime, date
 from pathlib import Path
 
 import requests
-from tqdm import tqdm
 
 import config
-from utils import scraper, downloader, facebook_formatter
+from utils import scraper, download_queue, events, facebook_formatter, frontier, image_processor, metrics, post_queue
+from utils.fileio import atomic_write
 
 # Set up logging
 def setup_logging(log_file=None):
@@ -44,6 +49,23 @@ def setup_logging(log_file=None):
 
 logger = setup_logging()
 
+# HTTP sessions reused across runs in the same process (warm API worker);
+# one per thread, since batch mode fetches from several threads
+_sessions = threading.local()
+
+# Per-vehicle outcomes in batch mode
+BATCH_SCRAPED = "scraped"
+BATCH_FAILED = "failed"
+BATCH_SKIPPED = "skipped"
+
+
+def get_session() -> requests.Session:
+    """Return this thread's HTTP session for page fetches."""
+    session = getattr(_sessions, "session", None)
+    if session is None:
+        session = _sessions.session = requests.Session()
+    return session
+
 
 class StateManager:
     """Manages scraper state for daily automation."""
@@ -52,6 +74,9 @@ class StateManager:
         self.state_file = state_file or config.STATE_FILE
         self.state_file.parent.mkdir(parents=True, exist_ok=True)
         self.state = self._load_state()
+        self._lock = threading.RLock()
+        self._deferred = 0
+        self._dirty = False
 
     def _load_state(self) -> dict:
         """Load state from file or create new state."""
@@ -73,13 +98,46 @@ class StateManager:
         }
 
     def save_state(self):
-        """Save current state to file."""
+        """Save current state to file (at the end of an open transaction)."""
+        with self._lock:
+            if self._deferred:
+                self._dirty = True
+                return
+            self._write()
+
+    def commit(self):
+        """Save current state to file now, even inside a transaction."""
+        with self._lock:
+            self._dirty = False
+            self._write()
+
+    def _write(self):
         try:
-            with open(self.state_file, "w") as f:
-                json.dump(self.state, f, indent=2)
+            with metrics.CHECKPOINT_SECONDS.time(file="state"):
+                atomic_write(self.state_file, json.dumps(self.state, indent=2).encode("utf-8"))
         except Exception as e:
             logger.error(f"Could not save state: {e}")
 
+    @contextmanager
+    def transaction(self):
+        """
+        Group state changes into one save.
+
+        Saves inside the block are deferred and the state file is written
+        once when the outermost transaction ends. Updates from several
+        threads are serialized.
+        """
+        with self._lock:
+            self._deferred += 1
+        try:
+            yield self
+        finally:
+            with self._lock:
+                self._deferred -= 1
+                if not self._deferred and self._dirty:
+                    self._dirty = False
+                    self.save_state()
+
     @property
     def last_scraped_date(self) -> date | None:
         """Get the last scraped date as a date object."""
@@ -97,6 +155,10 @@ class StateManager:
 
     def update(self, ref_no: str, total_available: int = None):
         """Update state after scraping a vehicle."""
+        with self._lock:
+            self._update(ref_no, total_available)
+
+    def _update(self, ref_no: str, total_available: int = None):
         # Normalize ref_no to uppercase for consistent comparison
         ref_no = ref_no.upper()
 
@@ -119,92 +181,146 @@ class StateManager:
         self.save_state()
 
 
-def get_next_vehicle(state: StateManager):
-    """
-    Get the next vehicle to scrape from the stock list.
+def stock_page_url(page: int) -> str:
+    """URL of a page of the configured country's stock list."""
+    if page == 1:
+        return config.get_stock_list_url()
+    return f"{config.BASE_URL}/stocklist/page={page}/stock_country={config.CURRENT_COUNTRY_CODE}/sortkey=n"
 
-    Smart logic:
-    - Start from page 1
-    - Check vehicles in order on each page
-    - Skip already scraped vehicles
-    - Return first unscraped vehicle (or None if all scraped)
-    - Move to next page if all on current page are scraped
 
-    Returns:
-        Dictionary with ref_no, title, detail_url or None if no more vehicles
+def get_next_vehicles(state: StateManager, count: int = 1) -> list:
     """
-    scraped_refs = set(v.upper() for v in state.state["scraped_vehicles"])
-    session = requests.Session()
-    page = 1
-
-    logger.info("Looking for next unscraped vehicle...")
-    logger.info(f"Already scraped: {len(scraped_refs)} vehicles")
+    Get the next vehicles to scrape, in one pass over the stock list.
 
-    while True:
-        # Get the stock list URL for the configured country
-        stock_list_url = config.get_stock_list_url()
+    Uses the frontier index (utils.frontier) instead of walking the list
+    from page 1:
+    - Re-check the newest pages for fresh arrivals
+    - For a single vehicle, otherwise take the first unscraped vehicle the
+      index knows about (from pages fetched within config.FRONTIER_MAX_AGE),
+      its detail page prefetched while the newest pages are checked
+    - Otherwise scan on from the first page that is not fully scraped
 
-        # Construct URL for current page
-        if page == 1:
-            url = stock_list_url
-        else:
-            # Extract the country code from the stock list URL
-            import re
-            country_match = re.search(r'stock_country=(\d+)', stock_list_url)
-            country_code = country_match.group(1) if country_match else "44"
-            url = f"{config.BASE_URL}/stocklist/page={page}/stock_country={country_code}/sortkey=n"
+    Args:
+        state: StateManager instance
+        count: Number of vehicles wanted
 
+    Returns:
+        Up to count dictionaries with ref_no, title, detail_url (and the
+        prefetched detail page as "html" when there is one), in stock list
+        order; empty if no more vehicles
+    """
+    skip = set(v.upper() for v in state.state["scraped_vehicles"])
+    session = get_session()
+    index = frontier.FrontierIndex()
+    recheck = config.FRONTIER_RECHECK_PAGES
+    selected = []
+    last_page = 0
+
+    logger.info(f"Looking for next {count} unscraped vehicle(s)..." if count > 1 else "Looking for next unscraped vehicle...")
+    logger.info(f"Already scraped: {len(skip)} vehicles")
+
+    candidate = index.first_candidate(skip, after_page=recheck) if count == 1 else None
+    prefetched = None
+
+    def check_page(page: int) -> bool:
+        """Take a stock page's unscraped vehicles; True once enough are selected."""
+        nonlocal last_page
+        url = stock_page_url(page)
         logger.info(f"Checking page {page}...")
 
         html = scraper.fetch_page(url, session)
         if not html:
             logger.error(f"Failed to fetch page {page}")
-            # Try next page
-            page += 1
-            continue
+            return False
 
-        # Get vehicles from this page
         vehicles = scraper.get_vehicle_links(html, url)
+        events.publish(events.PAGE_FETCHED, kind="stock", page=page, url=url, vehicles=len(vehicles))
+        index.record_page(page, vehicles)
 
-        if not vehicles:
-            logger.warning(f"No vehicles found on page {page}, moving to next page")
-            page += 1
-            continue
-
-        logger.info(f"Found {len(vehicles)} vehicles on page {page}")
-
-        # Check each vehicle on this page
-        page_has_unscraped = False
-
+        new = 0
         for vehicle in vehicles:
-            ref_no = vehicle["ref_no"]
-
-            if ref_no not in scraped_refs:
-                # Found an unscraped vehicle!
-                logger.info(f"Found unscraped vehicle: {ref_no}")
-
-                # Update total count estimate
-                state.state["total_available"] = state.state.get("total_available", 0) + page * 25
-                state.save_state()
+            if vehicle["ref_no"] in skip:
+                logger.debug(f"Skipping already scraped: {vehicle['ref_no']}")
+                continue
+            logger.info(f"Found unscraped vehicle: {vehicle['ref_no']} (page {page})")
+            skip.add(vehicle["ref_no"])
+            selected.append(vehicle)
+            last_page = page
+            new += 1
+            if len(selected) >= count:
+                return True
+
+        if not new:
+            logger.info(f"All {len(vehicles)} vehicles on page {page} already scraped")
+        return False
+
+    def done() -> list:
+        if selected:
+            # Update total count estimate
+            state.state["total_available"] = state.state.get("total_available", 0) + last_page * 25
+            state.save_state()
+        return selected
+
+    # Fresh arrivals come first
+    for page in range(1, min(recheck, config.STOCK_PAGE_LIMIT) + 1):
+        if check_page(page):
+            return done()
+        # Nothing new on top: fetch the known candidate's detail page
+        # while the remaining newest pages are checked
+        if candidate and prefetched is None and config.FRONTIER_PREFETCH:
+            prefetched = frontier.prefetch(candidate[1]["detail_url"])
+
+    # Known candidate from an earlier run
+    if candidate:
+        page, vehicle = candidate
+        if prefetched:
+            html, gone = prefetched.result()
+        else:
+            html, gone = scraper.fetch_vehicle_page(vehicle["detail_url"], session)
+        if html:
+            logger.info(f"Found unscraped vehicle: {vehicle['ref_no']} (page {page}, known)")
+            vehicle["html"] = html
+            selected.append(vehicle)
+            last_page = page
+            return done()
+        if gone:
+            logger.info(f"Known vehicle {vehicle['ref_no']} is gone, scanning the stock list")
+            index.forget(vehicle["ref_no"])
+        else:
+            # Maybe a transient failure: keep it, the scan lists it again if it is still for sale
+            logger.warning(f"Could not fetch known vehicle {vehicle['ref_no']}, scanning the stock list")
+
+    # Scan on from where the scraped part of the list ends
+    page = index.resume_page(skip, after_page=recheck)
+    while page <= config.STOCK_PAGE_LIMIT:
+        if check_page(page):
+            return done()
+        page += 1
 
-                return vehicle
-            else:
-                logger.debug(f"Skipping already scraped: {ref_no}")
+    logger.error(f"Reached page limit ({config.STOCK_PAGE_LIMIT}), stopping")
+    if len(selected) < count:
+        logger.info(f"No more unscraped vehicles found! ({len(selected)} of {count})" if count > 1 else "No more unscraped vehicles found!")
+    return done()
 
-        # All vehicles on this page are scraped, move to next page
-        logger.info(f"All {len(vehicles)} vehicles on page {page} already scraped")
-        page += 1
 
-        # Safety limit to prevent infinite loop
-        if page > 150:
-            logger.error("Reached page limit (150), stopping")
-            break
+def get_next_vehicle(state: StateManager):
+    """
+    Get the next vehicle to scrape from the stock list.
 
-    logger.info("No more unscraped vehicles found!")
-    return None
+    Returns:
+        Dictionary with ref_no, title, detail_url (and the prefetched
+        detail page as "html" when there is one) or None if no more vehicles
+    """
+    vehicles = get_next_vehicles(state, 1)
+    return vehicles[0] if vehicles else None
 
 
-def scrape_vehicle(url: str, state: StateManager, mode: str = config.IMAGE_MODE_INDIVIDUAL) -> dict | None:
+def scrape_vehicle(
+    url: str,
+    state: StateManager,
+    mode: str = config.IMAGE_MODE_INDIVIDUAL,
+    html: str = None,
+) -> dict | None:
     """
     Scrape a single vehicle and organize its data.
 
@@ -212,18 +328,21 @@ def scrape_vehicle(url: str, state: StateManager, mode: str = config.IMAGE_MODE_
         url: Vehicle detail page URL
         state: StateManager instance
         mode: Image download mode
+        html: Detail page already fetched (prefetched by get_next_vehicle)
 
     Returns:
         Vehicle data dictionary or None if failed
     """
-    session = requests.Session()
+    session = get_session()
 
-    logger.info(f"Fetching vehicle: {url}")
-    html = scraper.fetch_page(url, session)
+    if html is None:
+        logger.info(f"Fetching vehicle: {url}")
+        html = scraper.fetch_page(url, session)
 
     if not html:
         logger.error(f"Failed to fetch: {url}")
         return None
+    events.publish(events.PAGE_FETCHED, kind="detail", url=url)
 
     # Parse vehicle data
     logger.info("Parsing vehicle data...")
@@ -231,6 +350,12 @@ def scrape_vehicle(url: str, state: StateManager, mode: str = config.IMAGE_MODE_
 
     # Extract Ref No
     ref_no = vehicle_data["specs"].get("ref_no", "UNKNOWN")
+    events.publish(
+        events.VEHICLE_PARSED,
+        ref_no=ref_no,
+        url=url,
+        image_urls=len(vehicle_data["image_urls"]),
+    )
 
     # Create folder name from title
     # Try to get title from the page
@@ -256,29 +381,22 @@ def scrape_vehicle(url: str, state: StateManager, mode: str = config.IMAGE_MODE_
 
     logger.info(f"Created vehicle directory: {vehicle_dir}")
 
-    # Download images
-    logger.info("Downloading images...")
-    image_result = downloader.download_vehicle_images(
-        image_urls=vehicle_data["image_urls"],
-        zip_url=vehicle_data["zip_url"],
-        ref_no=folder_name,  # Use folder name as ref for organization
-        mode=mode,
-        output_dir=config.DAILY_VEHICLE_BASE_DIR,
-    )
-
-    # Organize images into subfolder
+    # Queue images on the global download scheduler; they transfer in the
+    # background while the rest of the page is processed. They are saved
+    # straight into images/, where the folder's download manifest (and
+    # with it re-scrapes) expects them.
     images_dir = vehicle_dir / "images"
-    if image_result["files"]:
-        import shutil
-        images_dir.mkdir(exist_ok=True)
-        for img_file in image_result["files"]:
-            if os.path.exists(img_file):
-                shutil.move(img_file, images_dir / os.path.basename(img_file))
-
-    # Prepare vehicle data for output
-    # Add title and folder name
-    vehicle_data["title"] = title
-    vehicle_data["folder_name"] = folder_name
+    image_download = None
+    if mode:
+        logger.info("Queueing image downloads...")
+        image_download = download_queue.get_scheduler().submit_vehicle(
+            image_urls=vehicle_data["image_urls"],
+            zip_url=vehicle_data["zip_url"],
+            ref_no=folder_name,  # Use folder name as ref for organization
+            mode=mode,
+            output_dir=config.DAILY_VEHICLE_BASE_DIR,
+            image_dir=images_dir,
+        )
 
     # Try to extract price from the page
     price_elem = soup.find("span", class_=re.compile(r"price|Price", re.I))
@@ -289,27 +407,40 @@ def scrape_vehicle(url: str, state: StateManager, mode: str = config.IMAGE_MODE_
     else:
         vehicle_data["price"] = ""
 
+    # Wait for this vehicle's images
+    if image_download:
+        logger.info("Waiting for image downloads...")
+        image_result = image_download.wait()
+        events.publish(events.IMAGES_DONE, ref_no=ref_no, folder=folder_name, count=len(image_result["files"]))
+    else:
+        image_result = {"files": []}
+
+    # Prepare vehicle data for output
+    # Add title and folder name
+    vehicle_data["title"] = title
+    vehicle_data["folder_name"] = folder_name
+
     # Add image info
     vehicle_data["image_folder"] = str(images_dir)
     vehicle_data["image_files"] = image_result["files"]
     vehicle_data["image_count"] = len(image_result["files"])
 
-    # Save data.json
+    # Save data.json (atomically - the API's catalog re-reads it on change)
     data_file = vehicle_dir / "data.json"
-    with open(data_file, "w", encoding="utf-8") as f:
-        # Flatten specs for JSON output
-        flat_data = {
-            "title": title,
-            "ref_no": ref_no,
-            "detail_url": url,
-            "folder_name": folder_name,
-            "scraped_at": str(datetime.now()),
-            "specs": vehicle_data["specs"],
-            "price": vehicle_data.get("price", ""),
-            "image_count": vehicle_data["image_count"],
-            "image_folder": str(images_dir),
-        }
-        json.dump(flat_data, f, indent=2, ensure_ascii=False)
+    # Flatten specs for JSON output
+    flat_data = {
+        "title": title,
+        "ref_no": ref_no,
+        "detail_url": url,
+        "folder_name": folder_name,
+        "scraped_at": str(datetime.now()),
+        "country": config.CURRENT_COUNTRY,
+        "specs": vehicle_data["specs"],
+        "price": vehicle_data.get("price", ""),
+        "image_count": vehicle_data["image_count"],
+        "image_folder": str(images_dir),
+    }
+    atomic_write(data_file, json.dumps(flat_data, indent=2, ensure_ascii=False).encode("utf-8"))
 
     logger.info(f"Saved data.json: {data_file}")
 
@@ -321,9 +452,16 @@ def scrape_vehicle(url: str, state: StateManager, mode: str = config.IMAGE_MODE_
     fb_data["images"] = []
     if os.path.exists(images_dir):
         for img_file in sorted(os.listdir(images_dir)):
-            if img_file.lower().endswith(('.jpg', '.jpeg', '.png')):
+            if img_file.lower().endswith(config.IMAGE_EXTENSIONS):
                 fb_data["images"].append(str(images_dir / img_file))
 
+    # Point Facebook uploads at the pre-built upload-size variants
+    if config.GENERATE_DERIVATIVES:
+        fb_data["upload_images"] = [
+            str(image_processor.get_derivative(path, config.FACEBOOK_IMAGE_WIDTH, config.DERIVATIVE_QUALITY))
+            for path in fb_data["images"][:config.IMAGE_PRIORITY_COUNT]
+        ]
+
     # Save facebook.json
     fb_file = vehicle_dir / "facebook.json"
     facebook_formatter.save_facebook_json(fb_data, fb_file)
@@ -340,15 +478,122 @@ def scrape_vehicle(url: str, state: StateManager, mode: str = config.IMAGE_MODE_
         f.write(f"Folder: {folder_name}\n")
     logger.info(f"Saved metadata.txt: {metadata_file}")
 
-    # Update state
+    # Update state, written at once even inside a batch's transaction: once
+    # the vehicle is queued for posting and published, a crash must not
+    # make the next run scrape and queue it again
     total_available = state.state.get("total_available", 0)
     state.update(ref_no, total_available)
+    state.commit()
+
+    # Hand the vehicle to the Facebook post queue (keyed by ref - vehicles
+    # without one would all share the "UNKNOWN" entry)
+    if not ref_no or ref_no == "UNKNOWN":
+        logger.warning(f"No ref no. for {folder_name}, not queued for posting")
+    else:
+        try:
+            post_queue.get_queue().enqueue(ref_no, folder_name)
+        except Exception as e:
+            logger.warning(f"Could not queue {ref_no} for posting: {e}")
+
+    events.publish(
+        events.VEHICLE_PUBLISHED,
+        ref_no=ref_no,
+        title=title,
+        folder=folder_name,
+        image_count=vehicle_data["image_count"],
+        url=f"/vehicle/{ref_no}",
+    )
 
     return vehicle_data
 
 
-def main():
-    """Main entry point for the daily scraper."""
+def scrape_batch(
+    vehicles: list,
+    state: StateManager,
+    mode: str = config.IMAGE_MODE_INDIVIDUAL,
+    deadline: datetime = None,
+    workers: int = None,
+) -> list:
+    """
+    Scrape several vehicles concurrently: detail page, images and
+    Facebook post for each.
+
+    Each vehicle's state is written as soon as it is scraped, before it is
+    queued for posting; other state changes are saved once, when the batch
+    is done. Image downloads share the global download scheduler's limits.
+
+    Args:
+        vehicles: Vehicles from get_next_vehicles
+        state: StateManager instance
+        mode: Image download mode
+        deadline: Vehicles not started by this time are skipped
+        workers: Vehicles processed at once (default config.DAILY_BATCH_WORKERS)
+
+    Returns:
+        Per-vehicle results in the order given: ref_no, title, detail_url,
+        status ("scraped", "failed" or "skipped"), folder, image_count,
+        seconds, error
+    """
+    def run(vehicle: dict) -> dict:
+        result = {
+            "ref_no": vehicle["ref_no"],
+            "title": vehicle.get("title", ""),
+            "detail_url": vehicle["detail_url"],
+            "status": BATCH_SKIPPED,
+            "folder": None,
+            "image_count": 0,
+            "seconds": 0.0,
+            "error": None,
+        }
+        if deadline and datetime.now() >= deadline:
+            result["error"] = "deadline reached"
+            return result
+
+        started = time.monotonic()
+        data = None
+        try:
+            data = scrape_vehicle(vehicle["detail_url"], state, mode=mode, html=vehicle.get("html"))
+        except Exception as e:
+            logger.error(f"Error scraping {vehicle['ref_no']}: {e}", exc_info=True)
+            result["error"] = str(e)
+        result["seconds"] = round(time.monotonic() - started, 1)
+        metrics.VEHICLES_SCRAPED.inc(result="succeeded" if data else "failed")
+
+        if data:
+            result.update(
+                status=BATCH_SCRAPED,
+                title=data.get("title", result["title"]),
+                folder=data.get("folder_name"),
+                image_count=data.get("image_count", 0),
+            )
+        else:
+            result["status"] = BATCH_FAILED
+            result["error"] = result["error"] or "could not fetch the vehicle page"
+        return result
+
+    workers = workers or config.DAILY_BATCH_WORKERS
+    with state.transaction(), ThreadPoolExecutor(max_workers=workers, thread_name_prefix="batch") as executor:
+        return list(executor.map(run, vehicles))
+
+
+def parse_until_time(value: str) -> datetime:
+    """Parse --until-time: HH:MM today, or an ISO date and time."""
+    try:
+        if re.fullmatch(r"\d{1,2}:\d{2}", value):
+            hour, minute = map(int, value.split(":"))
+            return datetime.now().replace(hour=hour, minute=minute, second=0, microsecond=0)
+        return datetime.fromisoformat(value)
+    except ValueError:
+        raise argparse.ArgumentTypeError(f"not a time (HH:MM) or ISO date and time: {value!r}")
+
+
+def main(argv=None):
+    """
+    Main entry point for the daily scraper.
+
+    Args:
+        argv: Command line arguments (default: sys.argv[1:])
+    """
     parser = argparse.ArgumentParser(
         description="BE FORWARD Daily Scraper - Automated daily vehicle scraping",
         formatter_class=argparse.RawDescriptionHelpFormatter,
@@ -374,6 +619,12 @@ Examples:
   # Use zip download mode
   python3 daily_scraper.py --mode zip
 
+  # Scrape the next 10 vehicles in one run
+  python3 daily_scraper.py --count 10
+
+  # Scrape up to 50 vehicles, starting no new one after 18:00
+  python3 daily_scraper.py --count 50 --until-time 18:00
+
 Available countries:
   uae, japan, korea, thailand, uk, singapore, australia, philippines,
   belgium, south_africa, new_zealand, tanzania, zambia, kenya, uganda,
@@ -396,6 +647,28 @@ Available countries:
         help="Scrape a specific vehicle by URL",
     )
 
+    parser.add_argument(
+        "--count",
+        type=int,
+        default=None,
+        help="Scrape the next N unscraped vehicles concurrently (batch mode)",
+    )
+
+    parser.add_argument(
+        "--until-time",
+        type=parse_until_time,
+        default=None,
+        help=f"Batch mode: start no new vehicle after this time (HH:MM or ISO). "
+             f"Without --count, up to {config.DAILY_BATCH_MAX} vehicles",
+    )
+
+    parser.add_argument(
+        "--results-file",
+        type=str,
+        default=None,
+        help="Batch mode: write the per-vehicle results to this JSON file",
+    )
+
     parser.add_argument(
         "--mode",
         type=str,
@@ -431,7 +704,25 @@ Available countries:
         help=f"Country to scrape (e.g., uae, japan, korea, uk, usa). Default: {config.DEFAULT_COUNTRY}",
     )
 
-    args = parser.parse_args()
+    parser.add_argument(
+        "--metrics-file",
+        type=str,
+        default=None,
+        help="Write metrics in Prometheus text format to this file at exit",
+    )
+
+    args = parser.parse_args(argv)
+    if args.count is not None and args.count < 1:
+        parser.error("--count must be at least 1")
+    if args.url and (args.count or args.until_time):
+        parser.error("--url scrapes one vehicle; it cannot be combined with --count or --until-time")
+    config.ensure_directories()
+
+    # Report HTTP, parse and image metrics to the API's /metrics (periodic
+    # snapshots too: batch runs are long, and stale snapshots count as exited)
+    metrics.share()
+    if args.metrics_file:
+        metrics.dump_at_exit(args.metrics_file)
 
     # Set country if specified
     if args.country:
@@ -478,6 +769,9 @@ Available countries:
         print(f"Total scraped: {len(state.state['scraped_vehicles'])} / {state.state.get('total_available', '?')}")
         return 0
 
+    if args.count or args.until_time:
+        return run_batch(args, state)
+
     # Determine what to scrape
     vehicle_to_scrape = None
 
@@ -511,7 +805,13 @@ Available countries:
     # Scrape the vehicle
     try:
         image_mode = None if args.skip_images else args.mode
-        result = scrape_vehicle(vehicle_to_scrape["detail_url"], state, mode=image_mode)
+        result = scrape_vehicle(
+            vehicle_to_scrape["detail_url"],
+            state,
+            mode=image_mode,
+            html=vehicle_to_scrape.get("html"),
+        )
+        metrics.VEHICLES_SCRAPED.inc(result="succeeded" if result else "failed")
 
         if result:
             print()
@@ -536,9 +836,53 @@ Available countries:
             return 1
 
     except Exception as e:
+        metrics.VEHICLES_SCRAPED.inc(result="failed")
         logger.error(f"Error during scraping: {e}", exc_info=True)
         return 1
 
 
+def run_batch(args, state: StateManager) -> int:
+    """Batch mode of main(): select, scrape and report several vehicles."""
+    count = args.count or config.DAILY_BATCH_MAX
+    image_mode = None if args.skip_images else args.mode
+
+    print(f"Mode: Batch ({count} vehicles" + (f", until {args.until_time:%Y-%m-%d %H:%M})" if args.until_time else ")"))
+    print(f"Previously scraped: {len(state.state['scraped_vehicles'])} vehicles")
+    print()
+
+    if args.until_time and datetime.now() >= args.until_time:
+        print(f"Already past {args.until_time:%Y-%m-%d %H:%M}, nothing to do")
+        return 0
+
+    with state.transaction():
+        vehicles = get_next_vehicles(state, count)
+        if not vehicles:
+            print("No more vehicles to scrape!")
+            return 0
+
+        print(f"Scraping {len(vehicles)} vehicles ({config.DAILY_BATCH_WORKERS} at a time)...")
+        results = scrape_batch(vehicles, state, mode=image_mode, deadline=args.until_time)
+
+    print()
+    print("=" * 60)
+    print("Batch Complete!")
+    print("=" * 60)
+    for result in results:
+        detail = result["folder"] if result["status"] == BATCH_SCRAPED else result["error"]
+        print(f"  {result['status']:<8} {result['ref_no']:<10} {result['seconds']:>6.1f}s  "
+              f"{result['image_count']:>3} images  {detail}")
+
+    totals = {status: sum(r["status"] == status for r in results) for status in (BATCH_SCRAPED, BATCH_FAILED, BATCH_SKIPPED)}
+    print()
+    print(f"Scraped: {totals[BATCH_SCRAPED]}  Failed: {totals[BATCH_FAILED]}  Skipped: {totals[BATCH_SKIPPED]}")
+    print(f"Progress: {state.state['current_index']} / {state.state.get('total_available', '?')}")
+
+    if args.results_file:
+        atomic_write(args.results_file, json.dumps(results, indent=2, ensure_ascii=False).encode("utf-8"))
+        print(f"Results: {args.results_file}")
+
+    return 1 if totals[BATCH_FAILED] else 0
+
+
 if __name__ == "__main__":
     sys.exit(main())
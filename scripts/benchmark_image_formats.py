@@ -0,0 +1,101 @@
+#!/usr/bin/env python3
+"""
+BE FORWARD Web Scraper - Output Format Benchmark
+Compares stored size and encode time of JPEG, WebP and AVIF on the images
+already scraped, to choose OUTPUT_IMAGE_FORMAT / OUTPUT_FORMAT_QUALITY.
+
+Usage:
+    python scripts/benchmark_image_formats.py output/vehicles
+    python scripts/benchmark_image_formats.py output/vehicles --limit 100 --webp 75 82 90 --avif 50 60
+"""
+
+import argparse
+import io
+import os
+import sys
+import time
+from pathlib import Path
+
+from PIL import Image
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+import config
+from utils import image_processor
+
+
+def collect_images(root: Path, limit: int) -> list:
+    """Source images under root (vehicle folders and their images/ subfolders)."""
+    paths = []
+    for dirpath, dirnames, filenames in os.walk(root):
+        # Skip cached variants and other hidden folders
+        dirnames[:] = [d for d in dirnames if not d.startswith(".")]
+        for name in sorted(filenames):
+            if name.lower().endswith((".jpg", ".jpeg", ".png")):
+                paths.append(Path(dirpath) / name)
+                if limit and len(paths) >= limit:
+                    return paths
+    return paths
+
+
+def benchmark(images: list, ext: str, quality: int) -> dict:
+    """Encode every (decoded, cropped) image and total the size and time."""
+    total_bytes = 0
+    total_seconds = 0.0
+
+    for img in images:
+        start = time.perf_counter()
+        data = image_processor.encode_image(img, ext, quality)
+        total_seconds += time.perf_counter() - start
+        total_bytes += len(data)
+
+    return {"bytes": total_bytes, "seconds": total_seconds}
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark image output formats on scraped images")
+    parser.add_argument("root", nargs="?", default=str(config.VEHICLES_DIR), help="Folder with scraped images")
+    parser.add_argument("--limit", type=int, default=50, help="Maximum number of images (0 = all)")
+    parser.add_argument("--crop", type=int, default=config.CROP_PERCENTAGE, help="Crop percentage applied first")
+    parser.add_argument("--jpeg", type=int, nargs="+", default=[config.CROP_QUALITY, 85], help="JPEG qualities")
+    parser.add_argument("--webp", type=int, nargs="+", default=[75, config.OUTPUT_FORMAT_QUALITY["webp"], 90], help="WebP qualities")
+    parser.add_argument("--avif", type=int, nargs="+", default=[50, config.OUTPUT_FORMAT_QUALITY["avif"], 70], help="AVIF qualities")
+    args = parser.parse_args()
+
+    paths = collect_images(Path(args.root), args.limit)
+    if not paths:
+        print(f"No images found in {args.root}")
+        sys.exit(1)
+
+    # Decode and crop once so only the encoders are timed
+    images = []
+    source_bytes = 0
+    for path in paths:
+        with Image.open(path) as img:
+            width, height = img.size
+            crop_pixels = image_processor.get_crop_pixels(height, args.crop)
+            cropped = img.crop((0, 0, width, height - crop_pixels))
+            cropped.load()
+        images.append(cropped)
+        source_bytes += path.stat().st_size
+
+    print(f"{len(images)} images, {source_bytes / 1024 / 1024:.1f} MB as downloaded")
+    print()
+    print(f"{'format':<8}{'quality':>8}{'MB':>10}{'saved':>9}{'ms/img':>10}")
+
+    candidates = [(".jpg", "jpeg", q) for q in args.jpeg]
+    candidates += [(".webp", "webp", q) for q in args.webp]
+    if image_processor.format_supported("AVIF"):
+        candidates += [(".avif", "avif", q) for q in args.avif]
+    else:
+        print("(AVIF not supported by this Pillow build - skipped)")
+
+    for ext, name, quality in candidates:
+        result = benchmark(images, ext, quality)
+        saved = 1 - result["bytes"] / source_bytes
+        ms_per_image = result["seconds"] * 1000 / len(images)
+        print(f"{name:<8}{quality:>8}{result['bytes'] / 1024 / 1024:>10.2f}{saved:>9.0%}{ms_per_image:>10.1f}")
+
+
+if __name__ == "__main__":
+    main()
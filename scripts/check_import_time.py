@@ -0,0 +1,135 @@
+#!/usr/bin/env python3
+"""
+BE FORWARD Web Scraper - Import Time Check
+Measures how long the entry points take to import (python -X importtime)
+and fails if one exceeds its time budget or loads a heavy module it
+should not need at startup.
+
+Cron and API-triggered scrapes are short, so startup is a visible part of
+their cost. Run this after changing imports.
+
+Usage:
+    python scripts/check_import_time.py
+    python scripts/check_import_time.py --runs 5 --top 15 api_server
+"""
+
+import argparse
+import re
+import statistics
+import subprocess
+import sys
+import tempfile
+from pathlib import Path
+
+BASE_DIR = Path(__file__).resolve().parent.parent
+
+# module -> (budget in ms, modules it must not import)
+BUDGETS = {
+    "config": (15, ["requests", "bs4", "PIL"]),
+    "utils": (15, ["bs4", "lxml", "PIL", "requests"]),
+    "utils.catalog": (60, ["bs4", "lxml", "PIL", "requests", "flask"]),
+    "daily_scraper": (400, ["pandas", "tqdm", "flask"]),
+    "beforward_scraper": (400, ["pandas", "tqdm", "flask"]),
+    "api_server": (400, ["pandas", "tqdm", "bs4", "lxml"]),
+}
+
+# Keep imports free of side effects on the real state directory
+# (api_server builds its catalog and opens the post queue at import)
+PREAMBLE = """
+import config
+from pathlib import Path
+state = Path({state_dir!r})
+config.STATE_DIR = state
+config.POST_QUEUE_DB = state / "post_queue.db"
+config.EVENT_LOG_FILE = state / "events.ndjson"
+config.SCRAPE_JOB_DIR = state / "jobs"
+config.METRICS_DIR = None
+config.CATALOG_POLL_INTERVAL = 0
+"""
+
+LINE_PATTERN = re.compile(r"^import time:\s+(\d+) \|\s+(\d+) \|( *)(\S+)$")
+
+
+def measure(module: str, state_dir: str) -> tuple:
+    """
+    Import module in a fresh interpreter.
+
+    Returns:
+        (cumulative ms of module, {direct import: cumulative ms},
+        names of all imported modules)
+    """
+    # config itself is measured without the preamble (which imports it)
+    preamble = PREAMBLE.format(state_dir=state_dir) if module != "config" else ""
+    code = preamble + f"import {module}\n"
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", code],
+        cwd=str(BASE_DIR),
+        capture_output=True,
+        text=True,
+    )
+    if result.returncode != 0:
+        raise RuntimeError(f"import {module} failed:\n{result.stderr[-2000:]}")
+
+    # Lines come in post-order: a module's imports precede it, indented deeper
+    rows = []
+    for line in result.stderr.splitlines():
+        match = LINE_PATTERN.match(line)
+        if match:
+            rows.append((len(match.group(3)) // 2, match.group(4), int(match.group(2)) / 1000))
+
+    total = 0.0
+    direct = {}
+    for i, (level, name, ms) in enumerate(rows):
+        if name != module:
+            continue
+        total = ms
+        for child_level, child, child_ms in reversed(rows[:i]):
+            if child_level <= level:
+                break
+            if child_level == level + 1:
+                direct[child] = child_ms
+
+    return total, direct, {name for _, name, _ in rows}
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Check import time budgets of the entry points")
+    parser.add_argument("modules", nargs="*", default=list(BUDGETS), help="Modules to check (default: all)")
+    parser.add_argument("--runs", type=int, default=3, help="Imports per module; the median is compared")
+    parser.add_argument("--top", type=int, default=0, help="Also list the module's N slowest direct imports")
+    parser.add_argument("--scale", type=float, default=1.0, help="Multiply budgets (slow machines, CI)")
+    args = parser.parse_args()
+
+    failures = []
+    print(f"{'module':<20}{'median ms':>11}{'budget':>9}  result")
+
+    with tempfile.TemporaryDirectory() as state_dir:
+        for module in args.modules:
+            budget, forbidden = BUDGETS.get(module, (None, []))
+            timings = []
+            for _ in range(args.runs):
+                elapsed, direct, imported = measure(module, state_dir)
+                timings.append(elapsed)
+
+            median = statistics.median(timings)
+            problems = [f"imports {name}" for name in forbidden if name in imported]
+            if budget is not None and median > budget * args.scale:
+                problems.append("over budget")
+
+            budget_text = f"{budget * args.scale:.0f}" if budget is not None else "-"
+            print(f"{module:<20}{median:>11.1f}{budget_text:>9}  {', '.join(problems) or 'ok'}")
+            failures.extend(f"{module}: {p}" for p in problems)
+
+            if args.top:
+                slowest = sorted(((ms, name) for name, ms in direct.items()), reverse=True)
+                for ms, name in slowest[:args.top]:
+                    print(f"    {name:<28}{ms:>8.1f} ms")
+
+    if failures:
+        print()
+        print("FAILED: " + "; ".join(failures))
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
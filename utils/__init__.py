@@ -1,19 +1,36 @@
 """
 BE FORWARD Web Scraper - Utility Modules
+
+The helpers below are imported on first use (PEP 562), so importing one
+utils submodule does not load BeautifulSoup, lxml and Pillow with it.
 """
 
-from .parser import parse_vehicle_detail, extract_specs_table, get_image_urls, get_zip_download_url
-from .scraper import get_vehicle_links, get_total_pages, fetch_page
-from .downloader import download_individual_images, download_and_extract_zip
-
-__all__ = [
-    "parse_vehicle_detail",
-    "extract_specs_table",
-    "get_image_urls",
-    "get_zip_download_url",
-    "get_vehicle_links",
-    "get_total_pages",
-    "fetch_page",
-    "download_individual_images",
-    "download_and_extract_zip",
-]
+import importlib
+
+# Public name -> submodule defining it
+_EXPORTS = {
+    "parse_vehicle_detail": "parser",
+    "extract_specs_table": "parser",
+    "get_image_urls": "parser",
+    "get_zip_download_url": "parser",
+    "get_vehicle_links": "scraper",
+    "get_total_pages": "scraper",
+    "fetch_page": "scraper",
+    "download_individual_images": "downloader",
+    "download_and_extract_zip": "downloader",
+}
+
+__all__ = list(_EXPORTS)
+
+
+def __getattr__(name):
+    module = _EXPORTS.get(name)
+    if module is None:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    value = getattr(importlib.import_module(f".{module}", __name__), name)
+    globals()[name] = value
+    return value
+
+
+def __dir__():
+    return sorted(list(globals()) + __all__)
@@ -0,0 +1,226 @@
+"""
+BE FORWARD Web Scraper - Content-Addressed Image Store
+Stores each processed image once and links it into vehicle folders.
+
+Layout under config.BLOB_STORE_DIR:
+    blobs/ab/<sha256><ext>     processed image bytes, named by content hash
+    urls/<sha1(url)>.json      per source URL: HTTP validators, hash of the
+                               downloaded bytes and the blob produced for each
+                               processing signature (crop settings)
+    copied/<sha256><ext>       marker: the blob was reflinked or copied into
+                               a vehicle folder, so its link count says
+                               nothing about its use and it is never pruned
+
+Vehicle folders get hardlinks (or reflinks, or copies as a last resort) to
+the blobs, so the same image scraped again - with --force, for another
+country or by the other CLI - costs no extra disk space. Files in vehicle
+folders must only be replaced (temp-and-rename), never rewritten in place,
+or the shared blob would change for every folder linking to it.
+"""
+
+import errno
+import fcntl
+import hashlib
+import json
+import logging
+import os
+import shutil
+import threading
+import uuid
+from contextlib import contextmanager
+from pathlib import Path
+
+import config
+from .fileio import atomic_write
+
+logger = logging.getLogger(__name__)
+
+# Linux ioctl for copy-on-write clones (btrfs, XFS with reflink=1)
+FICLONE = 0x40049409
+
+
+class BlobStore:
+    """Content-addressed store for processed images."""
+
+    def __init__(self, root: Path = None):
+        self.root = Path(root or config.BLOB_STORE_DIR)
+        self.blobs_dir = self.root / "blobs"
+        self.urls_dir = self.root / "urls"
+        self.copied_dir = self.root / "copied"
+        self.blobs_dir.mkdir(parents=True, exist_ok=True)
+        self.urls_dir.mkdir(parents=True, exist_ok=True)
+        self.copied_dir.mkdir(parents=True, exist_ok=True)
+
+    @contextmanager
+    def _locked(self):
+        """Exclusive lock on the store's URL records, across processes."""
+        with open(self.root / ".lock", "w") as lock_file:
+            fcntl.flock(lock_file, fcntl.LOCK_EX)
+            try:
+                yield
+            finally:
+                fcntl.flock(lock_file, fcntl.LOCK_UN)
+
+    def blob_path(self, sha256: str, ext: str) -> Path:
+        """Path of the blob with the given content hash."""
+        return self.blobs_dir / sha256[:2] / f"{sha256}{ext.lower()}"
+
+    def _url_record_path(self, url: str) -> Path:
+        return self.urls_dir / f"{hashlib.sha1(url.encode('utf-8')).hexdigest()}.json"
+
+    def lookup(self, url: str) -> dict | None:
+        """
+        Get the stored record for a source URL.
+
+        Returns:
+            Dictionary with url, etag, last_modified, source_sha256 and
+            outputs ({signature: {"sha256", "ext"}}), or None if unknown
+        """
+        record_path = self._url_record_path(url)
+        if not record_path.exists():
+            return None
+
+        try:
+            with open(record_path, "r") as f:
+                return json.load(f)
+        except Exception as e:
+            logger.warning(f"Could not read blob record for {url}: {e}")
+            return None
+
+    def find_output(self, url: str, signature: str) -> tuple | None:
+        """
+        Find the blob previously produced from a URL with given settings.
+
+        Returns:
+            (record, blob_path) if the record and its blob both exist
+        """
+        record = self.lookup(url)
+        if not record:
+            return None
+
+        output = record.get("outputs", {}).get(signature)
+        if not output:
+            return None
+
+        blob = self.blob_path(output["sha256"], output["ext"])
+        if not blob.exists():
+            return None
+
+        return record, blob
+
+    def put(self, data: bytes, ext: str, overwrite: bool = False) -> str:
+        """
+        Store bytes and return their sha256.
+
+        Identical content is stored once, however many URLs produced it.
+        A blob with the wrong size (damaged on disk) is rewritten, as is any
+        existing blob when overwrite is set.
+        """
+        sha256 = hashlib.sha256(data).hexdigest()
+        blob = self.blob_path(sha256, ext)
+        if overwrite or not blob.exists() or blob.stat().st_size != len(data):
+            atomic_write(blob, data)
+        return sha256
+
+    def record(
+        self,
+        url: str,
+        source_sha256: str,
+        signature: str,
+        output_sha256: str,
+        ext: str,
+        etag: str = None,
+        last_modified: str = None,
+    ):
+        """Save validators and the produced blob for a source URL."""
+        # The API, the warm worker and cron runs all record here
+        with self._locked():
+            record = self.lookup(url) or {"url": url, "outputs": {}}
+
+            # Outputs were produced from different bytes - they are stale now
+            if record.get("source_sha256") != source_sha256:
+                record["outputs"] = {}
+
+            record["source_sha256"] = source_sha256
+            record["etag"] = etag
+            record["last_modified"] = last_modified
+            record["outputs"][signature] = {"sha256": output_sha256, "ext": ext.lower()}
+
+            atomic_write(self._url_record_path(url), json.dumps(record, indent=2).encode("utf-8"))
+
+    def link(self, blob: Path, dest: Path) -> Path:
+        """
+        Materialize a blob at dest via hardlink, reflink or copy.
+
+        dest is replaced atomically if it already exists.
+        """
+        dest = Path(dest)
+        dest.parent.mkdir(parents=True, exist_ok=True)
+        # Unique across processes too (thread idents repeat between them)
+        tmp = dest.with_name(f".{dest.name}.{os.getpid()}-{uuid.uuid4().hex[:8]}.link")
+
+        try:
+            try:
+                os.link(blob, tmp)
+            except OSError as e:
+                if e.errno not in (errno.EXDEV, errno.EPERM, errno.EMLINK, errno.ENOTSUP):
+                    raise
+                # Marked before the copy exists, so prune never sees it unmarked
+                (self.copied_dir / blob.name).touch()
+                self._clone_or_copy(blob, tmp)
+            os.replace(tmp, dest)
+        finally:
+            if tmp.exists():
+                tmp.unlink()
+
+        return dest
+
+    @staticmethod
+    def _clone_or_copy(src: Path, dest: Path):
+        with open(src, "rb") as fsrc, open(dest, "wb") as fdst:
+            try:
+                fcntl.ioctl(fdst.fileno(), FICLONE, fsrc.fileno())
+                return
+            except OSError:
+                pass
+            shutil.copyfileobj(fsrc, fdst)
+
+    def prune(self) -> int:
+        """
+        Delete blobs no vehicle folder links to any more.
+
+        A hardlinked blob with a link count of 1 is held only by the store.
+        Blobs that were ever reflinked or copied into a folder (marked in
+        copied/) are kept: their link count is always 1. Returns the number
+        of blobs removed.
+        """
+        removed = 0
+        kept = 0
+        for blob in self.blobs_dir.glob("*/*"):
+            if (self.copied_dir / blob.name).exists():
+                kept += 1
+                continue
+            try:
+                if blob.stat().st_nlink == 1:
+                    blob.unlink()
+                    removed += 1
+            except OSError as e:
+                logger.warning(f"Could not prune {blob}: {e}")
+
+        if kept:
+            logger.info(f"Kept {kept} blobs that were copied rather than hardlinked")
+        logger.info(f"Pruned {removed} unreferenced blobs")
+        return removed
+
+
+_store = None
+_store_lock = threading.Lock()
+
+
+def get_store() -> BlobStore:
+    """Return the process-wide blob store, creating it on first use."""
+    global _store
+    with _store_lock:
+        if _store is None or _store.root != Path(config.BLOB_STORE_DIR):
+            _store = BlobStore(config.BLOB_STORE_DIR)
+        return _store
@@ -0,0 +1,445 @@
+"""
+BE FORWARD Web Scraper - Vehicle Catalog Index
+In-memory index of the daily-mode vehicle folders for the API server.
+
+The catalog is built once and then kept current by a background thread
+that polls modification times, so API lookups never list or scan the
+vehicle directory:
+    - ref number or folder name -> vehicle (dictionary lookup)
+    - newest-first order by scrape time (sorted list)
+    - data.json, facebook.json and the image listing cached per vehicle
+      (facebook.json as its raw bytes, copied into responses unchanged)
+    - per-value lists for the filterable fields (country, make, fuel,
+      transmission), used for cursor-paginated queries
+
+Each poll costs a few stat() calls per folder; only folders whose files
+changed are re-read.
+"""
+
+import bisect
+import itertools
+import json
+import logging
+import os
+import re
+import threading
+from datetime import datetime
+from pathlib import Path
+from typing import Dict, List
+
+import config
+from . import jsonio
+from .manifest import file_sha256
+
+logger = logging.getLogger(__name__)
+
+# Fields filtered by exact (case-insensitive) value; each has an index
+EQUALITY_FACETS = ("country", "make", "fuel", "transmission")
+
+
+def vehicle_facets(data: dict) -> dict:
+    """
+    Filterable fields of a vehicle, normalized for comparison.
+
+    Year and make come from the title ("2019 TOYOTA LAND CRUISER ..."),
+    mileage from the specs ("62,000 km" -> 62000).
+    """
+    specs = data.get("specs", {})
+    parts = (data.get("title") or "").split()
+
+    year = None
+    if parts and parts[0].isdigit() and len(parts[0]) == 4:
+        year = int(parts.pop(0))
+
+    mileage = re.sub(r"\D", "", specs.get("mileage") or "")
+
+    def text(value):
+        return str(value).strip().lower() or None if value else None
+
+    return {
+        "country": text(data.get("country")),
+        "make": text(parts[0]) if parts else None,
+        "fuel": text(specs.get("fuel")),
+        "transmission": text(specs.get("transmission")),
+        "year": year,
+        "mileage": int(mileage) if mileage else None,
+    }
+
+
+class VehicleEntry:
+    """Cached files of one vehicle folder."""
+
+    def __init__(self, folder: Path, stamp: tuple, data: dict, facebook_raw: bytes | None, images: List[str]):
+        self.folder = folder
+        self.stamp = stamp
+        self.data = data
+        self.facebook_raw = facebook_raw
+        self.images = images
+        self.ref_no = (data.get("ref_no") or data.get("specs", {}).get("ref_no") or "").upper()
+        self.scraped_at = _parse_timestamp(data.get("scraped_at")) or stamp[0] / 1e9
+        self.facets = vehicle_facets(data)
+        # Newest first; folder name breaks ties so cursors are unambiguous
+        self.sort_key = (-self.scraped_at, folder.name)
+        self._digests = {}
+        self._facebook = None
+
+    @property
+    def facebook(self) -> dict | None:
+        """The Facebook post, decoded on first use."""
+        if self._facebook is None and self.facebook_raw is not None:
+            self._facebook = jsonio.loads(self.facebook_raw)
+        return self._facebook
+
+    @property
+    def facebook_json(self) -> jsonio.RawJSON | None:
+        """The Facebook post as stored, for embedding in responses."""
+        return jsonio.RawJSON(self.facebook_raw) if self.facebook_raw is not None else None
+
+    @property
+    def name(self) -> str:
+        return self.folder.name
+
+    @property
+    def images_dir(self) -> Path:
+        return self.folder / "images"
+
+    @property
+    def last_modified(self) -> float:
+        """Newest modification time of the vehicle's files (seconds)."""
+        return max(self.stamp) / 1e9
+
+    def image_digest(self, filename: str) -> str | None:
+        """
+        Short content hash of an image, for cache-busting URLs.
+
+        Hashed once per file version (mtime and size).
+        """
+        if filename not in self.images:
+            return None
+
+        path = self.images_dir / filename
+        try:
+            st = os.stat(path)
+        except OSError:
+            return None
+
+        cached = self._digests.get(filename)
+        if cached and cached[0] == (st.st_mtime_ns, st.st_size):
+            return cached[1]
+
+        digest = file_sha256(path)[:16]
+        self._digests[filename] = ((st.st_mtime_ns, st.st_size), digest)
+        return digest
+
+    def matches(self, filters: dict) -> bool:
+        """
+        Check the vehicle against query filters.
+
+        Filters: country, make, fuel, transmission (exact, any case),
+        year_min, year_max, mileage_min, mileage_max, scraped_since (epoch
+        seconds). Vehicles without a ranged value fail that range filter.
+        """
+        facets = self.facets
+        for facet in EQUALITY_FACETS:
+            value = filters.get(facet)
+            if value is not None and facets[facet] != value.lower():
+                return False
+
+        for facet in ("year", "mileage"):
+            low, high = filters.get(f"{facet}_min"), filters.get(f"{facet}_max")
+            if low is None and high is None:
+                continue
+            value = facets[facet]
+            if value is None or (low is not None and value < low) or (high is not None and value > high):
+                return False
+
+        since = filters.get("scraped_since")
+        return since is None or self.scraped_at >= since
+
+    def to_dict(self, facebook: bool = True, images: bool = True, raw: bool = False) -> dict:
+        """
+        Vehicle data as returned by the API, with folder_path added.
+
+        Returns a copy - callers may modify it freely. With raw=True the
+        Facebook post is a jsonio.RawJSON (for responses) instead of a dict.
+        """
+        vehicle = dict(self.data)
+        vehicle["folder_path"] = str(self.folder)
+        if facebook and self.facebook_raw is not None:
+            vehicle["facebook_post"] = self.facebook_json if raw else self.facebook
+        if images and self.images:
+            vehicle["images"] = [str(self.images_dir / f) for f in self.images]
+        return vehicle
+
+
+def _parse_timestamp(value) -> float | None:
+    if not value:
+        return None
+    try:
+        return datetime.fromisoformat(str(value)).timestamp()
+    except ValueError:
+        return None
+
+
+def _mtime_ns(path: Path) -> int:
+    try:
+        return os.stat(path).st_mtime_ns
+    except OSError:
+        return 0
+
+
+def _folder_stamp(folder: Path) -> tuple:
+    """Modification times that change whenever a vehicle's files change."""
+    return (
+        _mtime_ns(folder),
+        _mtime_ns(folder / "data.json"),
+        _mtime_ns(folder / "facebook.json"),
+        _mtime_ns(folder / "images"),
+    )
+
+
+def _load_json(path: Path) -> dict | None:
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            return json.load(f)
+    except FileNotFoundError:
+        return None
+    except Exception as e:
+        logger.warning(f"Could not read {path}: {e}")
+        return None
+
+
+def _load_raw_json(path: Path) -> bytes | None:
+    """A JSON file's bytes (on one line), or None if missing or invalid."""
+    try:
+        data = path.read_bytes()
+        jsonio.loads(data)
+    except FileNotFoundError:
+        return None
+    except Exception as e:
+        logger.warning(f"Could not read {path}: {e}")
+        return None
+    return jsonio.compact(data)
+
+
+class VehicleCatalog:
+    """Index of vehicle folders. Safe to share between threads."""
+
+    def __init__(self, root: Path = None, poll_interval: float = None):
+        self.root = Path(root or config.DAILY_VEHICLE_BASE_DIR)
+        self.poll_interval = poll_interval if poll_interval is not None else config.CATALOG_POLL_INTERVAL
+
+        self._lock = threading.Lock()
+        self._refresh_lock = threading.Lock()
+        self._entries: Dict[str, VehicleEntry] = {}
+        self._by_ref: Dict[str, VehicleEntry] = {}
+        self._by_name: Dict[str, VehicleEntry] = {}
+        self._ordered: List[VehicleEntry] = []
+        self._keys: list = []
+        self._facet_index: Dict[str, dict] = {}
+        self._stop = threading.Event()
+        self._thread = None
+        self.version = 0
+
+        self.refresh()
+
+    def __len__(self) -> int:
+        return len(self._ordered)
+
+    def refresh(self) -> bool:
+        """
+        Re-read changed, new and deleted vehicle folders.
+
+        Returns:
+            True if the catalog changed
+        """
+        with self._refresh_lock:
+            entries = dict(self._entries)
+            seen = set()
+            changed = False
+
+            try:
+                with os.scandir(self.root) as it:
+                    folders = [Path(e.path) for e in it if e.is_dir() and not e.name.startswith(".")]
+            except FileNotFoundError:
+                folders = []
+
+            for folder in folders:
+                seen.add(folder.name)
+                stamp = _folder_stamp(folder)
+                current = entries.get(folder.name)
+                if current and current.stamp == stamp:
+                    continue
+
+                entry = self._load_entry(folder, stamp)
+                if entry:
+                    entries[folder.name] = entry
+                else:
+                    entries.pop(folder.name, None)
+                changed = changed or entry is not None or current is not None
+
+            for name in set(entries) - seen:
+                del entries[name]
+                changed = True
+
+            if changed:
+                self._publish(entries)
+
+            return changed
+
+    def _load_entry(self, folder: Path, stamp: tuple) -> VehicleEntry | None:
+        # Folders without data.json are still being written (or not vehicles)
+        data = _load_json(folder / "data.json")
+        if data is None:
+            return None
+
+        images = []
+        images_dir = folder / "images"
+        if images_dir.is_dir():
+            images = sorted(
+                f for f in os.listdir(images_dir)
+                if f.lower().endswith(config.IMAGE_EXTENSIONS)
+            )
+
+        return VehicleEntry(folder, stamp, data, _load_raw_json(folder / "facebook.json"), images)
+
+    def _publish(self, entries: Dict[str, VehicleEntry]):
+        ordered = sorted(entries.values(), key=lambda e: e.sort_key)
+
+        # facet -> value -> (sort keys, entries), both newest first
+        facet_index = {facet: {} for facet in EQUALITY_FACETS}
+        for entry in ordered:
+            for facet in EQUALITY_FACETS:
+                value = entry.facets[facet]
+                if value is not None:
+                    keys, members = facet_index[facet].setdefault(value, ([], []))
+                    keys.append(entry.sort_key)
+                    members.append(entry)
+
+        # Newest folder wins if the same ref was scraped more than once
+        by_ref = {}
+        for entry in reversed(ordered):
+            if entry.ref_no:
+                by_ref[entry.ref_no] = entry
+
+        with self._lock:
+            self._entries = entries
+            self._ordered = ordered
+            self._keys = [entry.sort_key for entry in ordered]
+            self._facet_index = facet_index
+            self._by_ref = by_ref
+            self._by_name = {name.upper(): entry for name, entry in entries.items()}
+            self.version += 1
+
+        logger.debug(f"Vehicle catalog updated: {len(ordered)} vehicles")
+
+    def latest(self) -> VehicleEntry | None:
+        """The most recently scraped vehicle."""
+        with self._lock:
+            return self._ordered[0] if self._ordered else None
+
+    def newest(self, limit: int = None) -> List[VehicleEntry]:
+        """Vehicles sorted newest first."""
+        with self._lock:
+            return self._ordered[:limit] if limit else list(self._ordered)
+
+    def query(self, filters: dict = None, after: tuple = None, limit: int = 20) -> tuple:
+        """
+        One page of vehicles matching filters, newest first.
+
+        Scanning starts from the smallest index list among the equality
+        filters, at the cursor position found by binary search, and stops
+        at the first vehicle older than scraped_since.
+
+        Args:
+            filters: See VehicleEntry.matches()
+            after: sort_key of the last vehicle of the previous page
+            limit: Page size
+
+        Returns:
+            (vehicles, more) - more is True if another page follows
+        """
+        filters = filters or {}
+
+        with self._lock:
+            keys, entries = self._keys, self._ordered
+            for facet in EQUALITY_FACETS:
+                value = filters.get(facet)
+                if value is not None:
+                    candidate = self._facet_index[facet].get(value.lower(), ([], []))
+                    if len(candidate[0]) < len(keys):
+                        keys, entries = candidate
+
+        start = bisect.bisect_right(keys, tuple(after)) if after else 0
+        since = filters.get("scraped_since")
+        page = []
+
+        for entry in itertools.islice(entries, start, None):
+            if since is not None and entry.scraped_at < since:
+                break
+            if entry.matches(filters):
+                page.append(entry)
+                if len(page) > limit:
+                    break
+
+        return page[:limit], len(page) > limit
+
+    def get(self, ref_no: str) -> VehicleEntry | None:
+        """
+        Find a vehicle by ref number or folder name.
+
+        Folder names end with the ref number, so both the exact ref and the
+        full folder name resolve without scanning.
+        """
+        with self._lock:
+            return self._find(ref_no.upper())
+
+    def get_many(self, refs: List[str]) -> Dict[str, VehicleEntry | None]:
+        """Look up several vehicles under one lock acquisition (see get())."""
+        with self._lock:
+            return {ref: self._find(ref.upper()) for ref in refs}
+
+    def _find(self, key: str) -> VehicleEntry | None:
+        entry = self._by_ref.get(key) or self._by_name.get(key)
+        if entry:
+            return entry
+
+        # Legacy behaviour: any folder containing the text (rare, linear)
+        for entry in self._ordered:
+            if key in entry.name.upper():
+                return entry
+        return None
+
+    def start(self):
+        """Start the background polling thread (no-op if already running)."""
+        if self._thread and self._thread.is_alive():
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._poll, name="vehicle-catalog", daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+
+    def _poll(self):
+        while not self._stop.wait(self.poll_interval):
+            try:
+                self.refresh()
+            except Exception as e:
+                logger.warning(f"Vehicle catalog refresh failed: {e}")
+
+
+_catalog = None
+_catalog_lock = threading.Lock()
+
+
+def get_catalog() -> VehicleCatalog:
+    """Return the process-wide catalog, building it and starting the poller on first use."""
+    global _catalog
+    with _catalog_lock:
+        if _catalog is None:
+            _catalog = VehicleCatalog(config.DAILY_VEHICLE_BASE_DIR, config.CATALOG_POLL_INTERVAL)
+            if _catalog.poll_interval:
+                _catalog.start()
+            logger.info(f"Vehicle catalog loaded: {len(_catalog)} vehicles")
+        return _catalog
@@ -0,0 +1,47 @@
+"""
+BE FORWARD Web Scraper - Response Compression
+gzip and Brotli for API responses, chosen from the client's
+Accept-Encoding. Brotli is only offered when the brotli package is
+installed.
+"""
+
+import gzip
+import logging
+
+import config
+
+logger = logging.getLogger(__name__)
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+
+def available_encodings() -> list:
+    """Configured encodings this process can produce, in order of preference."""
+    return [e for e in config.API_COMPRESSION if e == "gzip" or (e == "br" and brotli is not None)]
+
+
+def negotiate(accept_encodings) -> str | None:
+    """
+    Pick the content encoding for a response.
+
+    Args:
+        accept_encodings: werkzeug Accept object (request.accept_encodings)
+
+    Returns:
+        "br", "gzip" or None for an uncompressed response
+    """
+    offered = available_encodings()
+    if not offered:
+        return None
+    return accept_encodings.best_match(offered)
+
+
+def compress(data: bytes, encoding: str) -> bytes:
+    """Compress a response body with the given content encoding."""
+    if encoding == "br":
+        return brotli.compress(data, quality=config.API_BROTLI_QUALITY)
+    # mtime=0 keeps the output identical for identical bodies
+    return gzip.compress(data, compresslevel=config.API_GZIP_LEVEL, mtime=0)
@@ -0,0 +1,252 @@
+"""
+BE FORWARD Web Scraper - Image Download Scheduler
+Global, prioritized image download queue shared by every vehicle in a run.
+
+Detail pages are fetched on the caller's thread while images are transferred
+by a small pool of background workers, so the HTML crawl never waits for a
+gallery to finish. All workers draw from one bandwidth budget.
+"""
+
+import itertools
+import logging
+import queue
+import threading
+import time
+from concurrent.futures import Future
+from pathlib import Path
+from typing import List
+
+import requests
+import config
+from . import downloader, metrics
+
+logger = logging.getLogger(__name__)
+
+# Queue tiers: lower runs first. The first IMAGE_PRIORITY_COUNT images of each
+# vehicle (the Facebook post set) go ahead of the remaining gallery images.
+PRIORITY_HIGH = 0
+PRIORITY_NORMAL = 1
+
+
+class BandwidthLimiter:
+    """Token bucket limiting the combined transfer rate of all workers."""
+
+    def __init__(self, bytes_per_second: int):
+        self.rate = float(bytes_per_second)
+        # Allow bursts of up to one second worth of data
+        self.capacity = self.rate
+        self._tokens = self.capacity
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def consume(self, nbytes: int):
+        """Block until nbytes may be transferred without exceeding the cap."""
+        with self._lock:
+            now = time.monotonic()
+            self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+            self._updated = now
+            self._tokens -= nbytes
+            deficit = -self._tokens
+
+        if deficit > 0:
+            time.sleep(deficit / self.rate)
+
+
+class VehicleDownload:
+    """Handle for the queued image downloads of one vehicle."""
+
+    def __init__(self, ref_no: str, mode: str, folder: Path, futures: List[Future]):
+        self.ref_no = ref_no
+        self.mode = mode
+        self.folder = folder
+        self.futures = futures
+
+    def done(self) -> bool:
+        """True once every download for this vehicle has finished."""
+        return all(f.done() for f in self.futures)
+
+    def wait(self) -> dict:
+        """
+        Wait for all downloads and return the same result dictionary as
+        downloader.download_vehicle_images().
+        """
+        files = []
+        for future in self.futures:
+            try:
+                result = future.result()
+            except Exception as e:
+                logger.error(f"Image download failed for {self.ref_no}: {e}")
+                continue
+
+            if isinstance(result, list):
+                files.extend(result)
+            elif result:
+                files.append(result)
+
+        logger.info(f"Downloaded {len(files)} images for {self.ref_no}")
+        return {
+            "mode": self.mode,
+            "folder": str(self.folder),
+            "count": len(files),
+            "files": files,
+        }
+
+
+class DownloadScheduler:
+    """
+    Prioritized download queue drained by a fixed pool of worker threads.
+
+    Each worker keeps its own requests Session (sessions are not thread-safe);
+    these are separate from the session used for HTML fetches.
+    """
+
+    def __init__(self, workers: int = None, max_bytes_per_second: int = None):
+        self.workers = workers or config.IMAGE_DOWNLOAD_WORKERS
+        self.limiter = BandwidthLimiter(max_bytes_per_second) if max_bytes_per_second else None
+
+        self._queue = queue.PriorityQueue()
+        self._sequence = itertools.count()
+        self._local = threading.local()
+        self._lock = threading.Lock()
+        self._active = 0
+        self._completed = 0
+        self._failed = 0
+        self._threads = []
+
+        for i in range(self.workers):
+            thread = threading.Thread(target=self._worker, name=f"image-download-{i}", daemon=True)
+            thread.start()
+            self._threads.append(thread)
+
+    @property
+    def queue_depth(self) -> int:
+        """Number of jobs waiting for a worker."""
+        return self._queue.qsize()
+
+    def stats(self) -> dict:
+        """Snapshot of the scheduler's counters."""
+        with self._lock:
+            return {
+                "queued": self.queue_depth,
+                "active": self._active,
+                "completed": self._completed,
+                "failed": self._failed,
+            }
+
+    def submit(self, func, *args, priority: int = PRIORITY_NORMAL) -> Future:
+        """
+        Queue a download job.
+
+        The job is called as func(*args, session=..., limiter=...) on a worker
+        thread. Jobs with a lower priority value run first; equal priorities
+        run in submission order.
+        """
+        future = Future()
+        self._queue.put((priority, next(self._sequence), func, args, future))
+        return future
+
+    def submit_vehicle(
+        self,
+        image_urls: List[str],
+        zip_url: str,
+        ref_no: str,
+        mode: str = config.DEFAULT_IMAGE_MODE,
+        output_dir: Path = None,
+        priority_count: int = None,
+        image_dir: Path = None,
+    ) -> VehicleDownload:
+        """
+        Queue every image of a vehicle and return immediately.
+
+        Arguments mirror downloader.download_vehicle_images(); image_dir is
+        the folder the images are saved in (default output_dir / ref_no).
+        Call wait() on the returned handle to collect the results.
+        """
+        if output_dir is None:
+            output_dir = config.VEHICLES_DIR
+        if priority_count is None:
+            priority_count = config.IMAGE_PRIORITY_COUNT
+
+        vehicle_dir = Path(image_dir) if image_dir else output_dir / ref_no
+        vehicle_dir.mkdir(parents=True, exist_ok=True)
+        futures = []
+
+        if mode == config.IMAGE_MODE_ZIP and zip_url:
+            futures.append(self.submit(
+                downloader.download_and_extract_zip, zip_url, ref_no, output_dir, image_dir,
+                priority=PRIORITY_HIGH,
+            ))
+        elif not image_urls:
+            logger.warning(f"No image URLs available for {ref_no}")
+        else:
+            # Adaptive crop: detected once from the first image to arrive
+            calibration = downloader.crop_calibration()
+            for i, url in enumerate(image_urls, 1):
+                output_path = vehicle_dir / downloader.image_filename(url, ref_no, i)
+                priority = PRIORITY_HIGH if i <= priority_count else PRIORITY_NORMAL
+                futures.append(self.submit(_download_to_path, url, output_path, calibration, priority=priority))
+
+        return VehicleDownload(ref_no, mode, vehicle_dir, futures)
+
+    def join(self):
+        """Block until every queued job has finished."""
+        self._queue.join()
+
+    def _session(self) -> requests.Session:
+        if not hasattr(self._local, "session"):
+            self._local.session = requests.Session()
+        return self._local.session
+
+    def _worker(self):
+        while True:
+            _, _, func, args, future = self._queue.get()
+            try:
+                if not future.set_running_or_notify_cancel():
+                    continue
+
+                with self._lock:
+                    self._active += 1
+                try:
+                    result = func(*args, session=self._session(), limiter=self.limiter)
+                    future.set_result(result)
+                    failed = not result
+                except Exception as e:
+                    future.set_exception(e)
+                    failed = True
+
+                with self._lock:
+                    self._active -= 1
+                    self._completed += 1
+                    if failed:
+                        self._failed += 1
+            finally:
+                self._queue.task_done()
+
+
+def _download_to_path(url: str, output_path: Path, calibration=None, session=None, limiter=None) -> str | None:
+    """Download one image and return its path, or None if it failed."""
+    if downloader.download_image(url, output_path, session, limiter, calibration):
+        return str(output_path)
+    return None
+
+
+_scheduler = None
+_scheduler_lock = threading.Lock()
+
+
+def get_scheduler() -> DownloadScheduler:
+    """Return the process-wide scheduler, creating it on first use."""
+    global _scheduler
+    with _scheduler_lock:
+        if _scheduler is None:
+            _scheduler = DownloadScheduler(
+                workers=config.IMAGE_DOWNLOAD_WORKERS,
+                max_bytes_per_second=config.IMAGE_BANDWIDTH_LIMIT,
+            )
+            metrics.DOWNLOAD_QUEUE_DEPTH.set_function(lambda: _scheduler.queue_depth)
+            logger.info(
+                f"Image download scheduler started "
+                f"({_scheduler.workers} workers, "
+                f"limit: {config.IMAGE_BANDWIDTH_LIMIT or 'unlimited'} B/s)"
+            )
+        return _scheduler
@@ -3,8 +3,13 @@ BE FORWARD Web Scraper - Downloader Module
 Handles downloading individual images or zip archives.
 """
 
+import hashlib
+import io
 import os
-from . import image_processor
+import tempfile
+import threading
+from . import blob_store, image_processor, manifest, metrics
+from .fileio import atomic_write, atomic_writer
 import zipfile
 import logging
 from pathlib import Path
@@ -17,7 +22,7 @@ logging.basicConfig(level=getattr(logging, config.LOG_LEVEL))
 logger = logging.getLogger(__name__)
 
 
-def download_file(url: str, output_path: Path, session: requests.Session = None) -> bool:
+def download_file(url: str, output_path: Path, session: requests.Session = None, limiter=None) -> bool:
     """
     Download a single file with retry logic.
 
@@ -25,6 +30,7 @@ def download_file(url: str, output_path: Path, session: requests.Session = None)
         url: The URL to download from
         output_path: The path to save the file to
         session: Optional requests Session
+        limiter: Optional BandwidthLimiter shared with other transfers
 
     Returns:
         True if successful, False otherwise
@@ -32,31 +38,590 @@ def download_file(url: str, output_path: Path, session: requests.Session = None)
     if session is None:
         session = requests.Session()
 
+    try:
+        try:
+            response = session.get(
+                url,
+                headers=config.HEADERS,
+                timeout=config.TIMEOUT,
+                stream=True,
+            )
+        except requests.RequestException:
+            metrics.record_failure(url)
+            raise
+        metrics.record_response(url, response)
+        response.raise_for_status()
+
+        # Write to a temporary file renamed over the target. Writing in
+        # place would truncate a blob store file the target is hardlinked
+        # to, and with it every vehicle sharing that image.
+        with atomic_writer(output_path) as f:
+            read_body(response, f, limiter)
+
+        logger.debug(f"Downloaded: {output_path.name}")
+        return True
+
+    except Exception as e:
+        logger.error(f"Failed to download {url}: {e}")
+        return False
+
+
+def open_response(url: str, session: requests.Session = None, extra_headers: dict = None) -> requests.Response:
+    """
+    Send a streaming GET request and check its status.
+
+    Args:
+        url: The URL to download from
+        session: Optional requests Session
+        extra_headers: Headers added to config.HEADERS (e.g. If-None-Match, Range)
+
+    Returns:
+        The response with its body not yet read (304 is returned as-is)
+
+    Raises:
+        requests.RequestException if the request fails
+    """
+    if session is None:
+        session = requests.Session()
+
+    headers = dict(config.HEADERS)
+    if extra_headers:
+        headers.update(extra_headers)
+
     try:
         response = session.get(
             url,
-            headers=config.HEADERS,
+            headers=headers,
             timeout=config.TIMEOUT,
             stream=True,
         )
+    except requests.RequestException:
+        metrics.record_failure(url)
+        raise
+    metrics.record_response(url, response)
+
+    if response.status_code != 304:
         response.raise_for_status()
 
-        # Create parent directories if needed
-        output_path.parent.mkdir(parents=True, exist_ok=True)
+    return response
 
-        # Write file in chunks
-        with open(output_path, "wb") as f:
-            for chunk in response.iter_content(chunk_size=8192):
-                if chunk:
-                    f.write(chunk)
 
-        logger.debug(f"Downloaded: {output_path.name}")
+def read_body(response: requests.Response, sink, limiter=None):
+    """Stream a response body into a writable file object."""
+    for chunk in response.iter_content(chunk_size=8192):
+        if chunk:
+            if limiter is not None:
+                limiter.consume(len(chunk))
+            sink.write(chunk)
+            metrics.IMAGE_BYTES.inc(len(chunk), stage="downloaded")
+
+
+def fetch(
+    url: str,
+    session: requests.Session = None,
+    limiter=None,
+    extra_headers: dict = None,
+    sink=None,
+) -> tuple:
+    """
+    Download a file into memory, optionally as a conditional request.
+
+    Args:
+        url: The URL to download from
+        session: Optional requests Session
+        limiter: Optional BandwidthLimiter shared with other transfers
+        extra_headers: Headers added to config.HEADERS (e.g. If-None-Match)
+        sink: Optional writable file object to stream the body into
+              instead of returning it
+
+    Returns:
+        (status_code, body, response_headers); body is None for 304 or
+        when a sink was given
+
+    Raises:
+        requests.RequestException if the request fails
+    """
+    response = open_response(url, session, extra_headers)
+
+    if response.status_code == 304:
+        response.close()
+        return 304, None, response.headers
+
+    buffer = io.BytesIO() if sink is None else sink
+    read_body(response, buffer, limiter)
+
+    body = buffer.getvalue() if sink is None else None
+    return response.status_code, body, response.headers
+
+
+def fetch_bytes(url: str, session: requests.Session = None, limiter=None) -> bytes | None:
+    """
+    Download a file into memory.
+
+    Args:
+        url: The URL to download from
+        session: Optional requests Session
+        limiter: Optional BandwidthLimiter shared with other transfers
+
+    Returns:
+        The response body, or None if the download failed
+    """
+    try:
+        return fetch(url, session, limiter)[1]
+    except Exception as e:
+        logger.error(f"Failed to download {url}: {e}")
+        return None
+
+
+def image_filename(url: str, ref_no: str, index: int) -> str:
+    """
+    Build the on-disk filename for the index-th image of a vehicle.
+
+    Args:
+        url: The image URL (used to pick the file extension)
+        ref_no: Vehicle reference number (used as filename prefix)
+        index: 1-based position of the image in the gallery
+
+    Returns:
+        Filename with leading zeros for proper sorting, e.g. "CB123_001.jpg"
+    """
+    ext = ".jpg"
+    if ".png" in url.lower():
+        ext = ".png"
+    elif ".jpeg" in url.lower():
+        ext = ".jpeg"
+
+    return output_filename(f"{ref_no}_{index:03d}{ext}")
+
+
+# Extensions of the compact output formats (config.OUTPUT_IMAGE_FORMAT)
+OUTPUT_FORMAT_EXTENSIONS = {"webp": ".webp", "avif": ".avif"}
+ORIGINALS_DIRNAME = "originals"  # KEEP_ORIGINAL_JPEG copies, kept out of the image listings
+_unsupported_format_warned = False
+
+
+def output_extension() -> str | None:
+    """
+    Extension of the configured output format.
+
+    Returns:
+        ".webp" or ".avif", or None to keep the source format (also when
+        the installed Pillow cannot encode the configured format)
+    """
+    global _unsupported_format_warned
+
+    ext = OUTPUT_FORMAT_EXTENSIONS.get(config.OUTPUT_IMAGE_FORMAT)
+    if ext is None:
+        return None
+
+    if not image_processor.format_supported(config.OUTPUT_IMAGE_FORMAT):
+        if not _unsupported_format_warned:
+            logger.warning(f"Pillow cannot encode {config.OUTPUT_IMAGE_FORMAT}, keeping original formats")
+            _unsupported_format_warned = True
+        return None
+
+    return ext
+
+
+def output_filename(name: str) -> str:
+    """Apply the configured output format's extension to a filename."""
+    ext = output_extension()
+    if ext is None:
+        return name
+    return f"{os.path.splitext(name)[0]}{ext}"
+
+
+def _quality_for(ext: str) -> int:
+    """Encoder quality for an output extension."""
+    fmt = ext.lower().lstrip(".")
+    return config.OUTPUT_FORMAT_QUALITY.get(fmt, config.CROP_QUALITY)
+
+
+def download_image(
+    url: str,
+    output_path: Path,
+    session: requests.Session = None,
+    limiter=None,
+    calibration=None,
+) -> bool:
+    """
+    Download a single gallery image, crop its watermark (if enabled) and
+    generate its size variants (if enabled).
+
+    Args:
+        url: The image URL
+        output_path: The path to save the image to
+        session: Optional requests Session
+        limiter: Optional BandwidthLimiter shared with other transfers
+        calibration: The vehicle's CropCalibration (adaptive crop mode)
+
+    Returns:
+        True if the image was downloaded, False otherwise
+    """
+    if config.IMAGE_PIPELINE == config.IMAGE_PIPELINE_MEMORY:
+        ok = _download_image_in_memory(url, output_path, session, limiter, calibration)
+    else:
+        ok = _download_image_on_disk(url, output_path, session, limiter, calibration)
+
+    if ok:
+        create_derivatives(output_path)
+
+    return ok
+
+
+def create_derivatives(image_path: Path):
+    """Generate the configured size variants of a saved image (if enabled)."""
+    if not config.GENERATE_DERIVATIVES:
+        return
+
+    try:
+        image_processor.generate_derivatives(
+            image_path,
+            config.DERIVATIVE_WIDTHS,
+            quality=config.DERIVATIVE_QUALITY,
+        )
+    except Exception as e:
+        logger.warning(f"Could not generate variants for {Path(image_path).name}: {e}")
+
+
+def _download_image_on_disk(
+    url: str,
+    output_path: Path,
+    session: requests.Session = None,
+    limiter=None,
+    calibration=None,
+) -> bool:
+    """
+    Stream an image to disk, then process the file in place.
+
+    Processing is the same as in the memory pipeline (watermark crop,
+    output format and its quality, KEEP_ORIGINAL_JPEG copies), so a .webp
+    or .avif name never holds the downloaded JPEG bytes.
+    """
+    if not download_file(url, output_path, session, limiter):
+        return False
+
+    converting = output_path.suffix.lower() in OUTPUT_FORMAT_EXTENSIONS.values()
+    if config.ENABLE_CROPPING or converting:
+        try:
+            data = output_path.read_bytes()
+            processed = process_image_bytes(data, output_path, calibration)
+            if processed is not data:
+                atomic_write(output_path, processed)
+        except Exception as e:
+            logger.warning(f"Could not process {output_path.name}: {e}")
+            if converting:
+                # The downloaded bytes do not match the output extension
+                output_path.unlink(missing_ok=True)
+                return False
+
+    return True
+
+
+def processing_signature() -> str:
+    """
+    Describe the current image processing settings.
+
+    Images processed with the same signature are interchangeable, so the
+    blob store can reuse them instead of processing the source again.
+    """
+    if not config.ENABLE_CROPPING:
+        signature = "original"
+    else:
+        signature = f"crop={config.CROP_PERCENTAGE};quality={config.CROP_QUALITY};lossless={config.LOSSLESS_JPEG_CROP}"
+        if config.CROP_MODE == config.CROP_MODE_ADAPTIVE:
+            signature += ";mode=adaptive"
+
+    ext = output_extension()
+    if ext:
+        signature += f";format={ext[1:]};format_quality={_quality_for(ext)}"
+
+    return signature
+
+
+def _source_extension(data: bytes) -> str:
+    """Extension matching the format of downloaded image bytes."""
+    if data[:2] == b"\xff\xd8":
+        return ".jpg"
+    if data[:8] == b"\x89PNG\r\n\x1a\n":
+        return ".png"
+    return ".jpg"
+
+
+class CropCalibration:
+    """
+    Watermark crop rows shared by the images of one vehicle (adaptive
+    crop mode).
+
+    Detected (image_processor.detect_watermark_crop) from the first image
+    of each size to reach processing and reused for the rest of the
+    vehicle, which is not analysed at all. Images of that size processed
+    meanwhile wait for the detection already running on another thread -
+    never for images still in the download queue. When all images are at
+    hand (zip archives), several are analysed together instead: averaging
+    them blurs the photo content out.
+    """
+
+    def __init__(self):
+        self._rows = {}  # (width, height) -> crop pixels or None
+        self._detecting = set()
+        self._cond = threading.Condition()
+
+    @classmethod
+    def from_images(cls, images: list) -> "CropCalibration":
+        """Calibration detected right away from already available images."""
+        calibration = cls()
+        calibration._rows = cls._detect(images)
+        return calibration
+
+    @staticmethod
+    def _detect(images: list) -> dict:
+        try:
+            return image_processor.detect_watermark_crop(images) if images else {}
+        except Exception as e:
+            logger.warning(f"Watermark detection failed, using the fixed crop: {e}")
+            return {}
+
+    def crop_pixels(self, data: bytes) -> int | None:
+        """
+        Rows to crop from one of the vehicle's images.
+
+        Returns:
+            Number of rows, or None to crop the fixed percentage (no band found)
+        """
+        size = image_processor.image_size(data)
+        with self._cond:
+            self._cond.wait_for(lambda: size not in self._detecting)
+            if size in self._rows:
+                return self._rows[size]
+            self._detecting.add(size)
+
+        rows = {}
+        try:
+            rows = self._detect([data])
+        finally:
+            with self._cond:
+                self._rows[size] = rows.get(size)
+                self._detecting.discard(size)
+                self._cond.notify_all()
+        return rows.get(size)
+
+
+def crop_calibration() -> CropCalibration | None:
+    """New calibration for a vehicle's images, or None unless the adaptive crop mode is in use."""
+    if not config.ENABLE_CROPPING or config.CROP_MODE != config.CROP_MODE_ADAPTIVE:
+        return None
+    return CropCalibration()
+
+
+def _crop(data: bytes, ext: str, calibration: CropCalibration = None) -> bytes:
+    crop_pixels = None
+    if config.CROP_MODE == config.CROP_MODE_ADAPTIVE:
+        # Callers without a vehicle calibration get a one-image detection
+        calibration = calibration or CropCalibration()
+        crop_pixels = calibration.crop_pixels(data)
+
+    return image_processor.crop_image_bytes(
+        data,
+        ext,
+        crop_percentage=config.CROP_PERCENTAGE,
+        quality=_quality_for(ext),
+        lossless=config.LOSSLESS_JPEG_CROP,
+        crop_pixels=crop_pixels
+    )
+
+
+def process_image_bytes(data: bytes, output_path: Path, calibration: CropCalibration = None) -> bytes:
+    """
+    Apply the configured processing (watermark crop, output format) to
+    downloaded bytes.
+
+    The crop and the WebP/AVIF encode happen in a single decode/encode.
+    With KEEP_ORIGINAL_JPEG, a cropped copy in the source format is also
+    written to the originals/ folder next to output_path. In adaptive crop
+    mode the crop rows come from calibration, the vehicle's CropCalibration.
+
+    Returns the processed bytes, or the original bytes if processing is
+    disabled or the crop fails. A failed WebP/AVIF encode raises instead:
+    the original bytes would not match the output extension.
+    """
+    ext = output_path.suffix
+    source_ext = _source_extension(data)
+    converting = ext.lower() in OUTPUT_FORMAT_EXTENSIONS.values()
+    source = data
+
+    # Crop image to remove bottom watermark (if enabled)
+    try:
+        with metrics.IMAGE_CROP_SECONDS.time():
+            if config.ENABLE_CROPPING:
+                data = _crop(source, ext, calibration)
+                logger.debug(f"Auto-cropped: {output_path.name}")
+            elif converting:
+                data = image_processor.convert_image_bytes(source, ext, _quality_for(ext))
+    except Exception as e:
+        if converting:
+            raise
+        logger.warning(f"Could not crop image: {e}")
+        return data
+
+    if converting and config.KEEP_ORIGINAL_JPEG:
+        original_path = output_path.parent / ORIGINALS_DIRNAME / f"{output_path.stem}{source_ext}"
+        try:
+            original = _crop(source, source_ext, calibration) if config.ENABLE_CROPPING else source
+            atomic_write(original_path, original)
+        except Exception as e:
+            logger.warning(f"Could not save {original_path.name}: {e}")
+
+    metrics.IMAGE_BYTES.inc(len(data), stage="processed")
+    return data
+
+
+def _download_image_in_memory(
+    url: str,
+    output_path: Path,
+    session: requests.Session = None,
+    limiter=None,
+    calibration=None,
+) -> bool:
+    """
+    Download an image, crop and encode it in memory, then write it once.
+
+    The final file appears atomically, so the uncropped image is never
+    visible under its name and a failed run cannot leave a partial file.
+
+    Progress is tracked in the vehicle folder's manifest:
+    - images already finished (same URL, settings, size and hash) are
+      skipped without any request;
+    - source bytes are streamed to a hidden .part file, so if a transfer
+      breaks off (or the process is killed) the next run resumes with a
+      Range request from the bytes on disk;
+    - finished files whose size or hash no longer match are fetched again.
+
+    With the blob store enabled, an image processed before is requested
+    conditionally and linked from the store on 304 (or identical bytes).
+    """
+    filename = output_path.name
+    signature = processing_signature()
+    image_manifest = manifest.for_directory(output_path.parent)
+
+    state = image_manifest.check(filename, url, signature)
+    if state == "complete":
+        logger.debug(f"Already downloaded: {filename}")
+        return True
+    if state == "corrupt":
+        logger.warning(f"Corrupt or missing image, downloading again: {filename}")
+
+    store = blob_store.get_store() if config.ENABLE_BLOB_STORE else None
+    found = store.find_output(url, signature) if store and state != "corrupt" else None
+    part_path = image_manifest.part_path(filename)
+
+    # A second attempt only follows a 416: the kept bytes no longer fit
+    for attempt in range(2):
+        extra_headers = {}
+        entry = {}
+        received = 0
+        if state == "partial":
+            entry = image_manifest.get(filename)
+            received = part_path.stat().st_size
+            extra_headers["Range"] = f"bytes={received}-"
+            validator = entry.get("etag") or entry.get("last_modified")
+            if validator:
+                # Server sends the full file instead if it changed meanwhile
+                extra_headers["If-Range"] = validator
+            logger.info(f"Resuming {filename} from byte {received}")
+        elif found:
+            record = found[0]
+            if record.get("etag"):
+                extra_headers["If-None-Match"] = record["etag"]
+            if record.get("last_modified"):
+                extra_headers["If-Modified-Since"] = record["last_modified"]
+
+        try:
+            response = open_response(url, session, extra_headers)
+            break
+        except requests.HTTPError as e:
+            if state == "partial" and attempt == 0 and e.response is not None and e.response.status_code == 416:
+                logger.info(f"Cannot resume {filename} (416), downloading it again")
+                image_manifest.discard(filename)
+                state = "missing"
+                continue
+            logger.error(f"Failed to download {url}: {e}")
+            return False
+        except Exception as e:
+            logger.error(f"Failed to download {url}: {e}")
+            return False
+
+    etag = response.headers.get("ETag")
+    last_modified = response.headers.get("Last-Modified")
+
+    if response.status_code == 304 and found:
+        response.close()
+        try:
+            store.link(found[1], output_path)
+            image_manifest.record_complete(
+                filename, url, found[1].read_bytes(), signature,
+                etag=found[0].get("etag"), last_modified=found[0].get("last_modified"),
+            )
+        except OSError as e:
+            logger.error(f"Failed to save {output_path}: {e}")
+            return False
+        logger.debug(f"Unchanged, linked from store: {filename}")
         return True
 
+    if response.status_code == 206:
+        # Same representation as the kept bytes (If-Range matched)
+        etag = etag or entry.get("etag")
+        last_modified = last_modified or entry.get("last_modified")
+    else:
+        received = 0  # Range ignored or validator changed - full body follows
+
+    # Bytes go to the .part file as they arrive, validators first: a run
+    # that is killed mid-transfer still resumes from what reached the disk
+    try:
+        image_manifest.begin_partial(filename, url, etag, last_modified)
+        with open(part_path, "ab" if received else "wb", buffering=0) as part:
+            read_body(response, part, limiter)
+        data = part_path.read_bytes()
     except Exception as e:
         logger.error(f"Failed to download {url}: {e}")
         return False
 
+    try:
+        if store:
+            source_sha256 = hashlib.sha256(data).hexdigest()
+
+            if found and found[0].get("source_sha256") == source_sha256:
+                # Same bytes behind new validators - reuse the processed blob
+                output_sha256 = found[0]["outputs"][signature]["sha256"]
+                processed = found[1].read_bytes()
+            else:
+                processed = process_image_bytes(data, output_path, calibration)
+                output_sha256 = store.put(processed, output_path.suffix, overwrite=state == "corrupt")
+
+            store.record(
+                url, source_sha256, signature, output_sha256, output_path.suffix,
+                etag=etag, last_modified=last_modified,
+            )
+            store.link(store.blob_path(output_sha256, output_path.suffix), output_path)
+        else:
+            processed = process_image_bytes(data, output_path, calibration)
+            atomic_write(output_path, processed)
+
+        image_manifest.record_complete(
+            filename, url, processed, signature,
+            etag=etag, last_modified=last_modified,
+        )
+
+    except OSError as e:
+        logger.error(f"Failed to save {output_path}: {e}")
+        return False
+    except Exception as e:
+        logger.error(f"Could not process {filename}: {e}")
+        return False
+
+    logger.debug(f"Downloaded: {filename}")
+    return True
+
 
 def download_individual_images(image_urls: List[str], ref_no: str, output_dir: Path = None) -> List[str]:
     """
@@ -70,56 +635,51 @@ def download_individual_images(image_urls: List[str], ref_no: str, output_dir: P
     Returns:
         List of downloaded file paths
     """
-    if output_dir is None:
-        output_dir = config.VEHICLES_DIR
+    # Images go through the shared download scheduler (its workers, its
+    # bandwidth cap and one crop calibration for the vehicle)
+    from .download_queue import get_scheduler
 
-    vehicle_dir = output_dir / ref_no
-    vehicle_dir.mkdir(parents=True, exist_ok=True)
+    return get_scheduler().submit_vehicle(
+        image_urls, None, ref_no, config.IMAGE_MODE_INDIVIDUAL, output_dir,
+    ).wait()["files"]
 
-    downloaded_files = []
-    session = requests.Session()
 
-    for i, url in enumerate(image_urls, 1):
-        # Determine file extension
-        ext = ".jpg"
-        if ".png" in url.lower():
-            ext = ".png"
-        elif ".jpeg" in url.lower():
-            ext = ".jpeg"
-
-        # Create filename with leading zeros for proper sorting
-        filename = f"{ref_no}_{i:03d}{ext}"
-        output_path = vehicle_dir / filename
-
-        if download_file(url, output_path, session):
-            downloaded_files.append(str(output_path))
-
-            # Crop image to remove bottom watermark (if enabled)
-            if config.ENABLE_CROPPING:
-                try:
-                    cropped_path = image_processor.crop_bottom(
-                        str(output_path),
-                        crop_percentage=config.CROP_PERCENTAGE,
-                        overwrite=True,
-                        quality=config.CROP_QUALITY
-                    )
-                    logger.debug(f"Auto-cropped: {os.path.basename(str(output_path))}")
-                except Exception as e:
-                    logger.warning(f"Could not crop image: {e}")
+def _is_junk_member(info: zipfile.ZipInfo) -> bool:
+    """True for directories, macOS/hidden metadata and non-image members."""
+    if info.is_dir():
+        return True
 
+    parts = info.filename.replace("\\", "/").split("/")
+    # Skip __MACOSX and other hidden files
+    if any(part.startswith("_") or part.startswith(".") for part in parts):
+        return True
 
-    logger.info(f"Downloaded {len(downloaded_files)}/{len(image_urls)} images for {ref_no}")
-    return downloaded_files
+    return os.path.splitext(parts[-1])[1].lower() not in image_processor.IMAGE_EXTENSIONS
 
 
-def download_and_extract_zip(zip_url: str, ref_no: str, output_dir: Path = None) -> List[str]:
+def download_and_extract_zip(
+    zip_url: str,
+    ref_no: str,
+    output_dir: Path = None,
+    image_dir: Path = None,
+    session: requests.Session = None,
+    limiter=None,
+) -> List[str]:
     """
-    Download and extract a zip archive of images.
+    Download a zip archive of images and extract it through the image pipeline.
+
+    The archive is streamed into a spooled buffer (memory, spilling to a
+    temporary file only past config.ZIP_SPOOL_MAX_SIZE) rather than saved
+    next to the images. Each image member is cropped and encoded in memory
+    and written once, atomically - the same output as individual mode.
 
     Args:
         zip_url: URL of the zip file
         ref_no: Vehicle reference number (used for folder naming)
         output_dir: Base output directory (default: config.VEHICLES_DIR)
+        image_dir: Folder the images are saved in (default: output_dir / ref_no)
+        session: Optional requests Session
+        limiter: Optional BandwidthLimiter shared with other transfers
 
     Returns:
         List of extracted file paths
@@ -127,49 +687,59 @@ def download_and_extract_zip(zip_url: str, ref_no: str, output_dir: Path = None)
     if output_dir is None:
         output_dir = config.VEHICLES_DIR
 
-    vehicle_dir = output_dir / ref_no
+    vehicle_dir = Path(image_dir) if image_dir else output_dir / ref_no
     vehicle_dir.mkdir(parents=True, exist_ok=True)
 
-    # Download zip file
-    zip_path = vehicle_dir / f"{ref_no}_images.zip"
-
-    if not download_file(zip_url, zip_path):
-        logger.error(f"Failed to download zip file for {ref_no}")
-        return []
-
-    # Extract zip file
     extracted_files = []
-    try:
-        with zipfile.ZipFile(zip_path, "r") as zip_ref:
-            # Get list of files in zip
-            file_list = zip_ref.namelist()
-
-            # Extract all files
-            zip_ref.extractall(vehicle_dir)
 
-            # Track extracted files
-            for file_name in file_list:
-                # Skip __MACOSX and other hidden files
-                if not file_name.startswith("_") and not file_name.startswith("."):
-                    extracted_path = vehicle_dir / file_name
-                    if extracted_path.exists():
-                        extracted_files.append(str(extracted_path))
-
-        # Clean up zip file
-        zip_path.unlink()
-
-        logger.info(f"Extracted {len(extracted_files)} files from zip for {ref_no}")
-
-    except zipfile.BadZipFile:
-        logger.error(f"Bad zip file for {ref_no}: {zip_url}")
-        # Clean up bad zip file
-        if zip_path.exists():
-            zip_path.unlink()
-        return []
-
-    except Exception as e:
-        logger.error(f"Error extracting zip for {ref_no}: {e}")
-        return []
+    with tempfile.SpooledTemporaryFile(max_size=config.ZIP_SPOOL_MAX_SIZE) as spool:
+        try:
+            fetch(zip_url, session, limiter, sink=spool)
+        except Exception as e:
+            logger.error(f"Failed to download zip file for {ref_no}: {e}")
+            return []
+
+        try:
+            spool.seek(0)
+            with zipfile.ZipFile(spool, "r") as zip_ref:
+                seen_names = set()
+                members = [info for info in zip_ref.infolist() if not _is_junk_member(info)]
+
+                # All members are at hand, so the calibration is detected up front
+                calibration = None
+                if config.ENABLE_CROPPING and config.CROP_MODE == config.CROP_MODE_ADAPTIVE and members:
+                    samples = [zip_ref.read(info) for info in members[:config.CROP_CALIBRATION_IMAGES]]
+                    calibration = CropCalibration.from_images(samples)
+
+                for info in members:
+
+                    # Flatten member paths; never write outside vehicle_dir
+                    file_name = os.path.basename(info.filename)
+                    if file_name in seen_names:
+                        stem, ext = os.path.splitext(file_name)
+                        file_name = f"{stem}_{len(seen_names):03d}{ext}"
+                    seen_names.add(file_name)
+
+                    output_path = vehicle_dir / output_filename(file_name)
+                    try:
+                        data = process_image_bytes(zip_ref.read(info), output_path, calibration)
+                        atomic_write(output_path, data)
+                    except Exception as e:
+                        logger.warning(f"Could not extract {info.filename} for {ref_no}: {e}")
+                        continue
+
+                    create_derivatives(output_path)
+                    extracted_files.append(str(output_path))
+
+            logger.info(f"Extracted {len(extracted_files)} files from zip for {ref_no}")
+
+        except zipfile.BadZipFile:
+            logger.error(f"Bad zip file for {ref_no}: {zip_url}")
+            return []
+
+        except Exception as e:
+            logger.error(f"Error extracting zip for {ref_no}: {e}")
+            return extracted_files
 
     return extracted_files
 
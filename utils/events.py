@@ -0,0 +1,314 @@
+"""
+BE FORWARD Web Scraper - Event Stream
+Append-only event log shared by the scraper and the API server.
+
+Any process (daily_scraper.py, the warm scrape worker, API workers)
+publishes events by appending one JSON line to config.EVENT_LOG_FILE.
+Each API worker runs one tail thread that follows the log and fans new
+events out to its subscribers (the GET /events streams), so clients learn
+about a new vehicle as soon as it is written instead of polling.
+
+An event's ID is "<log inode>-<offset after the event>", which is all a
+reconnecting client needs to resume where it left off (Last-Event-ID).
+
+Event types:
+    job.started, job.finished    - background scrape jobs
+    page.fetched                 - stock list or vehicle detail page
+    vehicle.parsed               - vehicle page parsed, images known
+    images.done                  - vehicle images downloaded
+    vehicle.published            - vehicle folder complete and queued for posting
+"""
+
+import fcntl
+import json
+import logging
+import os
+import queue
+import threading
+import time
+from datetime import datetime
+from pathlib import Path
+from typing import Iterable, Iterator, List
+
+import config
+
+logger = logging.getLogger(__name__)
+
+JOB_STARTED = "job.started"
+JOB_FINISHED = "job.finished"
+PAGE_FETCHED = "page.fetched"
+VEHICLE_PARSED = "vehicle.parsed"
+IMAGES_DONE = "images.done"
+VEHICLE_PUBLISHED = "vehicle.published"
+
+
+def _rotated_path(path: Path) -> Path:
+    return path.with_name(path.name + ".1")
+
+
+def publish(event_type: str, **data):
+    """
+    Append an event to the log.
+
+    Events are best effort: failures are logged and never interrupt the
+    caller. Each event is a single O_APPEND write, so lines from concurrent
+    processes never interleave.
+
+    Args:
+        event_type: One of the event type constants
+        data: Event payload (JSON serializable)
+    """
+    path = Path(config.EVENT_LOG_FILE)
+    record = {
+        "type": event_type,
+        "time": datetime.now().isoformat(),
+        "data": data,
+    }
+    line = (json.dumps(record, ensure_ascii=False, default=str) + "\n").encode("utf-8")
+
+    try:
+        path.parent.mkdir(parents=True, exist_ok=True)
+        fd = os.open(path, os.O_WRONLY | os.O_APPEND | os.O_CREAT, 0o644)
+        try:
+            os.write(fd, line)
+            if os.fstat(fd).st_size > config.EVENT_LOG_MAX_BYTES:
+                _rotate(path, fd)
+        finally:
+            os.close(fd)
+    except OSError as e:
+        logger.debug(f"Could not publish {event_type} event: {e}")
+
+
+def _rotate(path: Path, fd: int):
+    """Move a full log aside (keeping one old generation)."""
+    fcntl.flock(fd, fcntl.LOCK_EX)
+    try:
+        # Another process may have rotated it already
+        if os.stat(path).st_ino == os.fstat(fd).st_ino:
+            os.replace(path, _rotated_path(path))
+    except FileNotFoundError:
+        pass
+    finally:
+        fcntl.flock(fd, fcntl.LOCK_UN)
+
+
+def format_id(inode: int, offset: int) -> str:
+    return f"{inode:x}-{offset}"
+
+
+def parse_id(event_id: str | None) -> tuple | None:
+    """(inode, offset) of an event ID, or None if it is not valid."""
+    try:
+        inode, offset = (event_id or "").split("-")
+        return int(inode, 16), int(offset)
+    except ValueError:
+        return None
+
+
+def _read_events(handle, inode: int, end: int = None) -> List[dict]:
+    """Complete events from the handle's position up to end (or EOF)."""
+    events = []
+    start = handle.tell()
+    data = handle.read() if end is None else handle.read(max(0, end - start))
+
+    # A partial last line is re-read next time
+    complete = data.rfind(b"\n") + 1
+    handle.seek(start + complete)
+
+    offset = start
+    for line in data[:complete].splitlines(keepends=True):
+        offset += len(line)
+        try:
+            event = json.loads(line)
+        except ValueError:
+            continue
+        event["id"] = format_id(inode, offset)
+        events.append(event)
+    return events
+
+
+class Subscription:
+    """One consumer's view of the event stream."""
+
+    def __init__(self, bus: "EventBus", types: Iterable[str] = None):
+        self._bus = bus
+        self._queue = queue.Queue(maxsize=config.EVENT_SUBSCRIBER_BUFFER)
+        self.types = set(types) if types else None
+        self.overflowed = False
+        self.backlog: List[dict] = []
+
+    def wanted(self, event: dict) -> bool:
+        return self.types is None or event.get("type") in self.types
+
+    def _deliver(self, event: dict):
+        if self.overflowed or not self.wanted(event):
+            return
+        try:
+            self._queue.put_nowait(event)
+        except queue.Full:
+            # The client reads too slowly; it is disconnected and resumes
+            # from the log with its Last-Event-ID
+            self.overflowed = True
+
+    def get(self, timeout: float) -> dict | None:
+        """Next event, or None if none arrived within timeout seconds."""
+        try:
+            return self._queue.get(timeout=timeout)
+        except queue.Empty:
+            return None
+
+    def events(self, heartbeat: float) -> Iterator[dict | None]:
+        """
+        Backlog, then live events; yields None after heartbeat seconds
+        without an event. Ends if the subscriber falls too far behind.
+        """
+        yield from self.backlog
+        self.backlog = []
+        while not self.overflowed:
+            yield self.get(heartbeat)
+
+    def close(self):
+        self._bus.unsubscribe(self)
+
+
+class EventBus:
+    """Per-process fan-out of the event log to subscribers."""
+
+    def __init__(self, path: Path = None, poll_interval: float = None):
+        self.path = Path(path or config.EVENT_LOG_FILE)
+        self.poll_interval = poll_interval or config.EVENT_POLL_INTERVAL
+
+        self._lock = threading.Lock()
+        self._subscribers = set()
+        self._handle = None
+        self._inode = None
+        self._thread = None
+
+    def __len__(self) -> int:
+        return len(self._subscribers)
+
+    def subscribe(self, types: Iterable[str] = None, last_id: str = None) -> Subscription:
+        """
+        Subscribe to new events.
+
+        Args:
+            types: Event types to receive (default all)
+            last_id: ID of the last event the client has seen; the events
+                     after it that are still in the log are replayed first
+        """
+        self._start()
+        subscription = Subscription(self, types)
+
+        with self._lock:
+            # Catch up with the log first, so the replay ends exactly where
+            # live delivery starts
+            self._poll_locked()
+            if last_id:
+                subscription.backlog = [
+                    e for e in self._replay(parse_id(last_id)) if subscription.wanted(e)
+                ]
+            self._subscribers.add(subscription)
+
+        return subscription
+
+    def unsubscribe(self, subscription: Subscription):
+        with self._lock:
+            self._subscribers.discard(subscription)
+
+    def _replay(self, position: tuple | None) -> List[dict]:
+        """Logged events after position, up to the tail thread's position."""
+        if position is None or self._handle is None:
+            return []
+        inode, offset = position
+
+        events = []
+        if inode != self._inode:
+            # Resume from the previous generation, then all of the current one
+            try:
+                with open(_rotated_path(self.path), "rb") as old:
+                    old_inode = os.fstat(old.fileno()).st_ino
+                    if old_inode == inode:
+                        old.seek(offset)
+                        events.extend(_read_events(old, old_inode))
+            except FileNotFoundError:
+                pass
+            offset = 0
+
+        with open(self.path, "rb") as current:
+            if os.fstat(current.fileno()).st_ino == self._inode:
+                current.seek(min(offset, self._handle.tell()))
+                events.extend(_read_events(current, self._inode, self._handle.tell()))
+        return events
+
+    def _start(self):
+        with self._lock:
+            if self._thread and self._thread.is_alive():
+                return
+            self._open(at_end=True)
+            self._thread = threading.Thread(target=self._run, name="event-tail", daemon=True)
+            self._thread.start()
+
+    def _open(self, at_end: bool = False) -> bool:
+        try:
+            handle = open(self.path, "rb")
+        except FileNotFoundError:
+            return False
+
+        if self._handle:
+            self._handle.close()
+        self._handle = handle
+        self._inode = os.fstat(handle.fileno()).st_ino
+        if at_end:
+            handle.seek(0, os.SEEK_END)
+            # Never start in the middle of a line being written
+            handle.seek(handle.tell() - len(self._partial_tail(handle)))
+        return True
+
+    @staticmethod
+    def _partial_tail(handle) -> bytes:
+        end = handle.tell()
+        handle.seek(max(0, end - 4096))
+        tail = handle.read()
+        return tail[tail.rfind(b"\n") + 1:]
+
+    def _run(self):
+        while True:
+            time.sleep(self.poll_interval)
+            try:
+                with self._lock:
+                    self._poll_locked()
+            except Exception as e:
+                logger.warning(f"Event log tail failed: {e}")
+
+    def _poll_locked(self):
+        """Read new events and deliver them (called with the lock held)."""
+        if self._handle is None and not self._open():
+            return
+
+        try:
+            inode = os.stat(self.path).st_ino
+        except FileNotFoundError:
+            inode = self._inode
+
+        events = _read_events(self._handle, self._inode)
+        if inode != self._inode:
+            # Log rotated: the old handle has been drained, follow the new file
+            self._open()
+            events.extend(_read_events(self._handle, self._inode))
+
+        for event in events:
+            for subscription in self._subscribers:
+                subscription._deliver(event)
+
+
+_bus = None
+_bus_lock = threading.Lock()
+
+
+def get_bus() -> EventBus:
+    """Return the process-wide event bus."""
+    global _bus
+    with _bus_lock:
+        if _bus is None:
+            _bus = EventBus(config.EVENT_LOG_FILE, config.EVENT_POLL_INTERVAL)
+        return _bus
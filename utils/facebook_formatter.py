@@ -6,6 +6,7 @@ Generates Facebook-ready post content from vehicle data.
 import re
 from typing import Dict, List
 import config
+from .fileio import atomic_write
 
 
 def sanitize_filename(name: str) -> str:
@@ -214,7 +215,7 @@ def format_facebook_post(vehicle_data: Dict) -> Dict:
                 image_files = [
                     f"{images_dir}/{f}"
                     for f in sorted(os.listdir(images_dir))
-                    if f.lower().endswith(('.jpg', '.jpeg', '.png'))
+                    if f.lower().endswith(config.IMAGE_EXTENSIONS)
                 ]
 
     # Build result
@@ -246,7 +247,5 @@ def save_facebook_json(facebook_data: Dict, output_path):
     """
     import json
 
-    output_path.parent.mkdir(parents=True, exist_ok=True)
-
-    with open(output_path, 'w', encoding='utf-8') as f:
-        json.dump(facebook_data, f, indent=2, ensure_ascii=False)
+    # Atomic: the API's catalog re-reads the file whenever it changes
+    atomic_write(output_path, json.dumps(facebook_data, indent=2, ensure_ascii=False).encode("utf-8"))
@@ -0,0 +1,57 @@
+"""
+BE FORWARD Web Scraper - File I/O Helpers
+Atomic file writes so readers never see partially written files.
+"""
+
+import os
+import tempfile
+from contextlib import contextmanager
+from pathlib import Path
+
+
+@contextmanager
+def atomic_writer(path):
+    """
+    Open a file for writing atomically via temp-and-rename.
+
+    Yields a binary file object on a temporary file in the same directory;
+    it is renamed over the target when the with block ends without an
+    exception, and removed otherwise. The target either keeps its old
+    contents or has the complete new contents - never a partial file.
+
+    Args:
+        path: Destination file path
+    """
+    path = Path(path)
+    path.parent.mkdir(parents=True, exist_ok=True)
+
+    fd, tmp_path = tempfile.mkstemp(dir=path.parent, prefix=f".{path.name}.", suffix=".tmp")
+    try:
+        with os.fdopen(fd, "wb") as f:
+            yield f
+        # mkstemp creates files as 0600; use regular file permissions
+        os.chmod(tmp_path, 0o644)
+        os.replace(tmp_path, path)
+    except BaseException:
+        try:
+            os.unlink(tmp_path)
+        except OSError:
+            pass
+        raise
+
+
+def atomic_write(path, data: bytes) -> Path:
+    """
+    Write bytes to a file atomically via temp-and-rename (see atomic_writer).
+
+    Args:
+        path: Destination file path
+        data: File contents
+
+    Returns:
+        The destination path
+    """
+    with atomic_writer(path) as f:
+        f.write(data)
+
+    return Path(path)
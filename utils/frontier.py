@@ -0,0 +1,151 @@
+"""
+BE FORWARD Web Scraper - Stock List Frontier
+Persisted index of the stock list pages, so the daily scraper does not walk
+the list from page 1 to find the next unscraped vehicle.
+
+For every stock list page fetched, the index keeps the vehicles it listed
+and when it was fetched. The next run then:
+    - re-checks only the newest pages (config.FRONTIER_RECHECK_PAGES) for
+      fresh arrivals
+    - otherwise takes the first unscraped vehicle the index already knows
+      about, fetching its detail page in the background meanwhile
+    - or resumes scanning at the first page that is not fully scraped
+      (one page early, since the list shifts as vehicles arrive and sell)
+
+Pages fetched more than config.FRONTIER_MAX_AGE ago count as unknown, so
+they are fetched again instead of trusted.
+
+The work per run depends on how far the list moved since the last run,
+not on how many vehicles have been scraped.
+"""
+
+import json
+import logging
+import threading
+from concurrent.futures import Future, ThreadPoolExecutor
+from datetime import datetime, timedelta
+from pathlib import Path
+from typing import Dict, List
+
+import requests
+
+import config
+from .fileio import atomic_write
+
+logger = logging.getLogger(__name__)
+
+
+class FrontierIndex:
+    """Stock list pages seen for one country (page -> vehicles, fetch time)."""
+
+    def __init__(self, path: Path = None, country_code: int = None):
+        self.path = Path(path or config.FRONTIER_FILE)
+        self.country = str(country_code if country_code is not None else config.CURRENT_COUNTRY_CODE)
+        self._all = self._load()
+        self.pages: Dict[int, dict] = {
+            int(page): entry for page, entry in self._all.get(self.country, {}).get("pages", {}).items()
+        }
+
+    def _load(self) -> dict:
+        try:
+            with open(self.path, "r") as f:
+                return json.load(f)
+        except FileNotFoundError:
+            return {}
+        except Exception as e:
+            logger.warning(f"Could not read frontier index, starting a new one: {e}")
+            return {}
+
+    def save(self):
+        self._all[self.country] = {"pages": {str(page): entry for page, entry in sorted(self.pages.items())}}
+        try:
+            atomic_write(self.path, json.dumps(self._all, indent=1).encode("utf-8"))
+        except OSError as e:
+            logger.warning(f"Could not save frontier index: {e}")
+
+    def record_page(self, page: int, vehicles: List[dict]):
+        """Store what a stock list page showed just now."""
+        self.pages[page] = {
+            "fetched_at": datetime.now().isoformat(timespec="seconds"),
+            "vehicles": [
+                {"ref_no": v["ref_no"], "title": v.get("title", ""), "detail_url": v["detail_url"]}
+                for v in vehicles
+                if v.get("ref_no")
+            ],
+        }
+        self.save()
+
+    def forget(self, ref_no: str):
+        """Drop a vehicle that is no longer for sale."""
+        for entry in self.pages.values():
+            entry["vehicles"] = [v for v in entry["vehicles"] if v["ref_no"] != ref_no]
+        self.save()
+
+    def is_fresh(self, page: int) -> bool:
+        """Whether a page is known and was fetched within config.FRONTIER_MAX_AGE."""
+        entry = self.pages.get(page)
+        if entry is None:
+            return False
+        try:
+            fetched_at = datetime.fromisoformat(entry["fetched_at"])
+        except (KeyError, ValueError):
+            return False
+        return datetime.now() - fetched_at <= timedelta(seconds=config.FRONTIER_MAX_AGE)
+
+    def first_candidate(self, scraped: set, after_page: int = 0) -> tuple | None:
+        """
+        First known vehicle not scraped yet, in stock list order.
+
+        Stops at the first unknown or stale page, which could list
+        unscraped vehicles the index does not know about.
+
+        Returns:
+            (page, vehicle dict) or None
+        """
+        page = after_page + 1
+        while self.is_fresh(page):
+            for vehicle in self.pages[page]["vehicles"]:
+                if vehicle["ref_no"] not in scraped:
+                    return page, dict(vehicle)
+            page += 1
+        return None
+
+    def resume_page(self, scraped: set, after_page: int = 0) -> int:
+        """
+        Page to resume scanning from: one before the first page that is
+        unknown, stale or still lists unscraped vehicles.
+        """
+        page = after_page + 1
+        while self.is_fresh(page) and all(v["ref_no"] in scraped for v in self.pages[page]["vehicles"]):
+            page += 1
+        return max(after_page + 1, page - 1)
+
+
+# =============================================================================
+# Detail page prefetch
+# =============================================================================
+
+_executor = None
+_executor_lock = threading.Lock()
+
+
+def prefetch(url: str) -> Future:
+    """
+    Fetch a detail page in the background.
+
+    Uses its own HTTP session (sessions are not thread-safe). The future's
+    result is (HTML or None, gone), as from scraper.fetch_vehicle_page.
+    """
+    global _executor
+    with _executor_lock:
+        if _executor is None:
+            _executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="detail-prefetch")
+
+    from . import scraper
+
+    def fetch():
+        with requests.Session() as session:
+            return scraper.fetch_vehicle_page(url, session)
+
+    logger.info(f"Prefetching detail page: {url}")
+    return _executor.submit(fetch)
@@ -3,10 +3,20 @@ BE FORWARD Web Scraper - Image Processor Module
 Handles image cropping to remove watermarks while preserving quality.
 """
 
+import hashlib
+import io
 import os
+import shutil
+import struct
+import subprocess
+import time
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
 from PIL import Image
 import logging
 
+from .fileio import atomic_write
+
 logger = logging.getLogger(__name__)
 
 # Watermark is at the bottom center of the image
@@ -14,46 +24,401 @@ logger = logging.getLogger(__name__)
 # We'll crop 6-8% from the bottom to remove it completely
 
 DEFAULT_CROP_PERCENTAGE = 7  # Crop 7% from bottom
+MAX_CROP_RATIO = 0.15  # Never crop more than 15% of the height
+
+# Lossless JPEG cropping uses jpegtran (libjpeg-turbo-progs) when installed
+JPEGTRAN_PATH = shutil.which("jpegtran")
+JPEGTRAN_TIMEOUT = 30  # seconds
+
+# SOFn markers (start of frame) - excludes DHT (C4), JPG (C8) and DAC (CC)
+_JPEG_SOF_MARKERS = {0xC0, 0xC1, 0xC2, 0xC3, 0xC5, 0xC6, 0xC7, 0xC9, 0xCA, 0xCB, 0xCD, 0xCE, 0xCF}
+
+
+def get_crop_pixels(height: int, crop_percentage: int = DEFAULT_CROP_PERCENTAGE) -> int:
+    """
+    Calculate how many pixels to crop from the bottom of an image.
+
+    Args:
+        height: Image height in pixels
+        crop_percentage: Percentage of height to crop from bottom (5-10)
+
+    Returns:
+        Number of rows to remove, clamped between 10px and 15% of the height
+    """
+    crop_pixels = int(height * (crop_percentage / 100))
+
+    # Ensure we don't crop too much
+    if crop_pixels < 10:
+        crop_pixels = 10
+    elif crop_pixels > height * MAX_CROP_RATIO:  # Don't crop more than 15%
+        crop_pixels = int(height * MAX_CROP_RATIO)
+
+    return crop_pixels
+
+
+def read_jpeg_geometry(data: bytes) -> dict | None:
+    """
+    Read the image size from a JPEG's frame header.
+
+    Only the marker segments are walked; no image data is decoded.
+
+    Args:
+        data: Encoded JPEG bytes
+
+    Returns:
+        Dictionary with width and height, or None if the data
+        is not a JPEG or has no frame header
+    """
+    if data[:2] != b"\xff\xd8":
+        return None
+
+    pos = 2
+    while pos + 4 <= len(data):
+        if data[pos] != 0xFF:
+            return None
+
+        marker = data[pos + 1]
+        if marker == 0xFF:  # Fill byte
+            pos += 1
+            continue
+        if marker in (0xD8, 0x01) or 0xD0 <= marker <= 0xD7:  # Standalone markers
+            pos += 2
+            continue
+        if marker in (0xD9, 0xDA):  # EOI / SOS before any frame header
+            return None
+
+        (length,) = struct.unpack(">H", data[pos + 2:pos + 4])
+
+        if marker in _JPEG_SOF_MARKERS:
+            segment = data[pos + 4:pos + 2 + length]
+            height, width = struct.unpack(">HH", segment[1:5])
+            return {"width": width, "height": height}
+
+        pos += 2 + length
+
+    return None
+
+
+def crop_jpeg_lossless(data: bytes, crop_pixels: int) -> bytes | None:
+    """
+    Crop the bottom of a JPEG in the DCT domain without re-encoding.
+
+    The crop starts at the top-left corner, so jpegtran accepts any kept
+    height (only the crop offset has to fall on an MCU boundary). The kept
+    pixels are bit-identical to the source (no generation loss, no
+    Huffman re-pass).
+
+    Args:
+        data: Encoded JPEG bytes
+        crop_pixels: Number of rows to remove from the bottom
+
+    Returns:
+        The cropped JPEG bytes, or None if the lossless path is unavailable
+        (jpegtran not installed or not a JPEG)
+    """
+    if not JPEGTRAN_PATH:
+        return None
+
+    geometry = read_jpeg_geometry(data)
+    if not geometry:
+        return None
+
+    width, height = geometry["width"], geometry["height"]
+    keep_height = height - crop_pixels
+
+    if keep_height <= 0:
+        return None
+
+    try:
+        result = subprocess.run(
+            [JPEGTRAN_PATH, "-copy", "none", "-crop", f"{width}x{keep_height}+0+0"],
+            input=data,
+            capture_output=True,
+            timeout=JPEGTRAN_TIMEOUT,
+            check=True,
+        )
+    except (OSError, subprocess.SubprocessError) as e:
+        logger.debug(f"Lossless crop failed, falling back to re-encode: {e}")
+        return None
+
+    logger.debug(f"Losslessly cropped {height - keep_height}px from bottom ({width}x{height})")
+
+    return result.stdout
+
+
+WATERMARK_ANALYSIS_WIDTH = 256  # Images are analysed at this width
+WATERMARK_Z_THRESHOLD = 8.0  # Robust z-score above which a row counts as watermark
+WATERMARK_MIN_RISE = 0.3  # ...and its score must also exceed the median by this fraction
+WATERMARK_MARGIN_RATIO = 0.01  # Extra height cropped above the detected band
+WATERMARK_MAX_SAMPLES = 8  # Images per size group used by batch detection
+
+
+def image_size(data: bytes) -> tuple:
+    """(width, height) of an encoded image, read from its header."""
+    return Image.open(io.BytesIO(data)).size
+
+
+def _luminance_array(data: bytes) -> tuple:
+    """
+    Decode an image to a small grayscale float array for analysis.
+
+    JPEGs are decoded at reduced DCT scale via draft(), so the cost is a
+    fraction of a full decode.
+
+    Returns:
+        ((width, height) of the original, 2-D numpy array)
+    """
+    import numpy as np
+
+    img = Image.open(io.BytesIO(data))
+    width, height = img.size
+    analysis_height = max(1, round(height * WATERMARK_ANALYSIS_WIDTH / width))
+
+    img.draft("L", (WATERMARK_ANALYSIS_WIDTH, analysis_height))
+    img = img.convert("L").resize((WATERMARK_ANALYSIS_WIDTH, analysis_height), Image.BILINEAR)
+
+    return (width, height), np.asarray(img, dtype=np.float32)
+
+
+def _detect_band_fraction(stack) -> float | None:
+    """
+    Find the watermark band in a stack of same-sized luminance arrays.
+
+    The arrays are averaged first: photo content differs between a
+    vehicle's images and blurs out, while the watermark sits in the same
+    place in every image and stays sharp. Each row of the mean image is then
+    scored by how much more edge energy its centre has than its sides (the
+    watermark is bottom-centre). Rows in the bottom MAX_CROP_RATIO whose
+    score is an outlier against the rest of the image (robust z-score using
+    the median absolute deviation) form the band.
+
+    Returns:
+        Fraction of the height to crop from the bottom, or None if no band
+        was found
+    """
+    import numpy as np
+
+    mean = stack.mean(axis=0)
+    height, width = mean.shape
+    if height < 20 or width < 8:
+        return None
+
+    # Edge energy: horizontal plus vertical gradient magnitude
+    energy = np.abs(np.diff(mean, axis=1))[:-1, :] + np.abs(np.diff(mean, axis=0))[:, :-1]
+
+    left, right = width // 4, 3 * width // 4
+    centre_energy = energy[:, left:right].mean(axis=1)
+    side_energy = np.concatenate([energy[:, :left], energy[:, right:]], axis=1).mean(axis=1)
+    edge_ratio = centre_energy / (side_energy + 1.0)
+
+    band_start = int(height * (1 - MAX_CROP_RATIO))
+    reference_rows = edge_ratio[int(height * 0.3):band_start]
+    median = float(np.median(reference_rows))
+    spread = 1.4826 * float(np.median(np.abs(reference_rows - median)))
+    threshold = median + max(WATERMARK_Z_THRESHOLD * spread, WATERMARK_MIN_RISE * median)
+
+    flagged = np.nonzero(edge_ratio[band_start:] > threshold)[0]
+
+    # A single outlier row is noise, not a watermark
+    if flagged.size < 2:
+        return None
+
+    band_top = band_start + int(flagged[0])
+    return (height - band_top) / height + WATERMARK_MARGIN_RATIO
+
+
+def detect_watermark_crop(images: list) -> dict:
+    """
+    Detect how many rows to crop from a batch of images.
+
+    Images of a vehicle share dimensions and watermark position, so they
+    are grouped by size and each group is analysed once from up to
+    WATERMARK_MAX_SAMPLES images - the cost per image shrinks as the
+    batch grows.
+
+    Args:
+        images: Encoded image bytes
+
+    Returns:
+        Dictionary of {(width, height): crop pixels or None}; None means no
+        watermark band was found and the fixed percentage should be used
+    """
+    import numpy as np
+
+    groups = {}
+    for data in images:
+        size = image_size(data)
+        samples = groups.setdefault(size, [])
+        if len(samples) < WATERMARK_MAX_SAMPLES:
+            samples.append(data)
+
+    results = {}
+    for (width, height), samples in groups.items():
+        arrays = [_luminance_array(data)[1] for data in samples]
+        fraction = _detect_band_fraction(np.stack(arrays))
+
+        if fraction is None:
+            results[(width, height)] = None
+        else:
+            crop_pixels = int(round(height * fraction))
+            results[(width, height)] = min(max(crop_pixels, 10), int(height * MAX_CROP_RATIO))
+
+    return results
+
+
+def detect_watermark_crop_files(image_files: list) -> dict:
+    """
+    Like detect_watermark_crop(), but for files; returns {path: crop pixels or None}.
+    """
+    sizes = {}
+    for image_path in image_files:
+        try:
+            sizes[image_path] = Image.open(image_path).size
+        except Exception:
+            sizes[image_path] = None
+
+    samples = {}
+    for image_path, size in sizes.items():
+        if size is not None and len(samples.setdefault(size, [])) < WATERMARK_MAX_SAMPLES:
+            with open(image_path, "rb") as f:
+                samples[size].append(f.read())
+
+    detected = detect_watermark_crop([data for group in samples.values() for data in group])
+
+    return {path: detected.get(size) for path, size in sizes.items()}
+
+
+def crop_image_bytes(
+    data: bytes,
+    ext: str,
+    crop_percentage: int = DEFAULT_CROP_PERCENTAGE,
+    quality: int = 95,
+    lossless: bool = True,
+    crop_pixels: int = None
+) -> bytes:
+    """
+    Crop the bottom portion of an encoded image entirely in memory.
+
+    JPEGs are cropped losslessly in the DCT domain when possible; other
+    formats and JPEGs the lossless path cannot handle are decoded, cropped
+    and re-encoded with Pillow.
+
+    Args:
+        data: Encoded image bytes (JPEG, PNG, ...)
+        ext: File extension of the output (e.g. ".jpg", ".webp"), selects the encoder
+        crop_percentage: Percentage of height to crop from bottom (5-10)
+        quality: Quality of the output encoder (JPEG default 95)
+        lossless: Try the lossless JPEG crop before re-encoding
+        crop_pixels: Exact rows to crop (e.g. from watermark detection);
+                     overrides crop_percentage
+
+    Returns:
+        The cropped image, encoded in the format matching ext
+    """
+    img = Image.open(io.BytesIO(data))
+    width, height = img.size
+
+    if crop_pixels is None:
+        crop_pixels = get_crop_pixels(height, crop_percentage)
+
+    if lossless and img.format == 'JPEG' and ext.lower() in ['.jpg', '.jpeg']:
+        cropped = crop_jpeg_lossless(data, crop_pixels)
+        if cropped is not None:
+            return cropped
+
+    # Define crop box: (left, top, right, bottom)
+    # Crop everything except the bottom portion
+    cropped_img = img.crop((0, 0, width, height - crop_pixels))
+
+    logger.debug(f"Cropped {crop_pixels}px from bottom ({width}x{height})")
+
+    return encode_image(cropped_img, ext, quality, default_format=img.format)
+
+
+# Encoder options for the compact output formats (speed/size trade-off)
+WEBP_OPTIONS = {"method": 4}
+AVIF_OPTIONS = {"speed": 6}
+
+
+def format_supported(fmt: str) -> bool:
+    """
+    Check whether Pillow can encode a format (e.g. "WEBP", "AVIF").
+
+    AVIF needs Pillow >= 11.2 or the pillow-avif-plugin package.
+    """
+    fmt = fmt.upper()
+    if fmt == "AVIF" and "AVIF" not in Image.SAVE:
+        try:
+            import pillow_avif  # noqa: F401  (registers the plugin)
+        except ImportError:
+            pass
+    Image.init()
+    return fmt in Image.SAVE
+
+
+def encode_image(img: Image.Image, ext: str, quality: int = 95, default_format: str = None) -> bytes:
+    """
+    Encode an image in the format matching a file extension.
+
+    Args:
+        img: The image to encode
+        ext: Output extension (".jpg", ".png", ".webp", ".avif", ...)
+        quality: Quality for lossy formats (JPEG/WebP/AVIF)
+        default_format: Format to use if ext is not recognised
+
+    Returns:
+        The encoded bytes
+    """
+    output = io.BytesIO()
+    fmt = Image.registered_extensions().get(ext.lower(), default_format or 'PNG')
+
+    # Save with original quality preservation
+    if fmt == 'JPEG':
+        # Save with specified quality
+        if img.mode not in ('RGB', 'L', 'CMYK'):
+            img = img.convert('RGB')
+        img.save(output, 'JPEG', quality=quality, optimize=True)
+    elif fmt == 'WEBP':
+        img.save(output, 'WEBP', quality=quality, **WEBP_OPTIONS)
+    elif fmt == 'AVIF':
+        img.save(output, 'AVIF', quality=quality, **AVIF_OPTIONS)
+    else:
+        # For PNG and other formats, save without compression loss
+        img.save(output, fmt, optimize=True)
+
+    return output.getvalue()
+
+
+def convert_image_bytes(data: bytes, ext: str, quality: int = 95) -> bytes:
+    """Re-encode image bytes in the format matching ext (no crop)."""
+    img = Image.open(io.BytesIO(data))
+    return encode_image(img, ext, quality, default_format=img.format)
 
 
 def crop_bottom(
     image_path: str,
     crop_percentage: int = DEFAULT_CROP_PERCENTAGE,
     overwrite: bool = True,
-    quality: int = 95
+    quality: int = 95,
+    lossless: bool = True
 ) -> str:
     """
     Crop the bottom portion of an image to remove the watermark.
 
+    The cropped image is written atomically, so an interrupted crop never
+    leaves a truncated file behind.
+
     Args:
         image_path: Path to the image file
         crop_percentage: Percentage of height to crop from bottom (5-10)
         overwrite: If True, overwrite original; if False, save as _cropped
         quality: JPEG quality (85-100, higher = less compression, default 95)
+        lossless: Try the lossless JPEG crop before re-encoding
 
     Returns:
         Path to the cropped image file
     """
     try:
-        img = Image.open(image_path)
-        width, height = img.size
-
-        # Calculate how many pixels to crop from bottom
-        crop_pixels = int(height * (crop_percentage / 100))
-
-        # Ensure we don't crop too much
-        if crop_pixels < 10:
-            crop_pixels = 10
-        elif crop_pixels > height * 0.15:  # Don't crop more than 15%
-            crop_pixels = int(height * 0.15)
-
-        # Define crop box: (left, top, right, bottom)
-        # Crop everything except the bottom portion
-        box = (0, 0, width, height - crop_pixels)
-
-        # Crop the image
-        cropped_img = img.crop(box)
-
         # Get file extension before determining output path
         base, ext = os.path.splitext(image_path)
 
@@ -63,16 +428,12 @@ def crop_bottom(
         else:
             output_path = f"{base}_cropped{ext}"
 
-        # Save with original quality preservation
-        # Get original format info if JPEG
-        if ext.lower() in ['.jpg', '.jpeg']:
-            # Save with specified quality
-            cropped_img.save(output_path, 'JPEG', quality=quality, optimize=True)
-        else:
-            # For PNG and other formats, save without compression loss
-            cropped_img.save(output_path, optimize=True)
+        with open(image_path, "rb") as f:
+            data = f.read()
 
-        logger.debug(f"Cropped {crop_pixels}px from bottom: {output_path}")
+        atomic_write(output_path, crop_image_bytes(data, ext, crop_percentage, quality, lossless))
+
+        logger.debug(f"Cropped: {output_path}")
 
         return output_path
 
@@ -81,64 +442,332 @@ def crop_bottom(
         return image_path
 
 
+DERIVATIVES_DIRNAME = ".derivatives"  # Cache folder created next to the originals
+DERIVATIVE_QUALITY = 85
+
+
+def source_digest(data: bytes) -> str:
+    """Short content hash used to tie derivatives to their source image."""
+    return hashlib.sha256(data).hexdigest()[:16]
+
+
+def derivative_path(image_path, width: int, digest: str) -> Path:
+    """
+    Path of a cached size variant.
+
+    Variants live in a .derivatives folder next to the original and embed
+    the source hash, so a re-cropped original never matches stale variants.
+    """
+    image_path = Path(image_path)
+    return image_path.parent / DERIVATIVES_DIRNAME / f"{image_path.stem}.{digest}.w{width}.jpg"
+
+
+def generate_derivatives(
+    image_path,
+    widths: list,
+    quality: int = DERIVATIVE_QUALITY,
+    data: bytes = None
+) -> dict:
+    """
+    Create downscaled JPEG variants of an image and cache them on disk.
+
+    JPEG sources are opened with Image.draft(), which lets libjpeg decode
+    directly at 1/2, 1/4 or 1/8 scale in the DCT domain, so a small variant
+    never pays for a full-resolution decode. Smaller widths are resized from
+    the larger variant rather than from the original.
+
+    Args:
+        image_path: Path to the (already cropped) original
+        widths: Target widths in pixels; widths >= the original are skipped
+        quality: JPEG quality of the variants
+        data: The original's bytes, if already in memory
+
+    Returns:
+        Dictionary of {width: variant path} for every available variant
+    """
+    image_path = Path(image_path)
+    if data is None:
+        data = image_path.read_bytes()
+
+    digest = source_digest(data)
+    variants = {}
+    missing = []
+
+    for width in sorted(set(widths), reverse=True):
+        path = derivative_path(image_path, width, digest)
+        if path.exists():
+            variants[width] = path
+        else:
+            missing.append(width)
+
+    # Drop variants of a previous version of this image
+    cache_dir = image_path.parent / DERIVATIVES_DIRNAME
+    if cache_dir.exists():
+        for stale in cache_dir.glob(f"{image_path.stem}.*.w*.jpg"):
+            if f".{digest}." not in stale.name:
+                stale.unlink(missing_ok=True)
+
+    if not missing:
+        return variants
+
+    img = Image.open(io.BytesIO(data))
+    width, height = img.size
+    missing = [w for w in missing if w < width]
+    if not missing:
+        return variants
+
+    # Decode at the smallest DCT scale that still covers the largest variant
+    largest = missing[0]
+    img.draft("RGB", (largest, max(1, height * largest // width)))
+    img = img.convert("RGB")
+
+    for target in missing:
+        target_height = max(1, round(height * target / width))
+        img = img.resize((target, target_height), Image.LANCZOS)
+
+        output = io.BytesIO()
+        img.save(output, "JPEG", quality=quality)
+
+        path = derivative_path(image_path, target, digest)
+        atomic_write(path, output.getvalue())
+        variants[target] = path
+
+    logger.debug(f"Generated {len(missing)} variants for {image_path.name}")
+
+    return variants
+
+
+def get_derivative(image_path, width: int, quality: int = DERIVATIVE_QUALITY) -> Path:
+    """
+    Get a size variant of an image, generating it if needed.
+
+    Returns:
+        Path to the variant, or the original if width is not smaller
+    """
+    variants = generate_derivatives(image_path, [width], quality)
+    return variants.get(width, Path(image_path))
+
+
+IMAGE_EXTENSIONS = ['.jpg', '.jpeg', '.png', '.webp', '.avif']
+
+
+def find_images(image_dirs) -> list:
+    """
+    List the image files directly inside one or more directories.
+
+    Args:
+        image_dirs: A directory path or a list of directory paths
+
+    Returns:
+        Sorted list of image file paths
+    """
+    if isinstance(image_dirs, (str, os.PathLike)):
+        image_dirs = [image_dirs]
+
+    image_files = []
+    for image_dir in image_dirs:
+        if not os.path.isdir(image_dir):
+            logger.error(f"Image directory not found: {image_dir}")
+            continue
+
+        image_files.extend(
+            os.path.join(image_dir, f)
+            for f in sorted(os.listdir(image_dir))
+            if os.path.splitext(f)[1].lower() in IMAGE_EXTENSIONS
+        )
+
+    return image_files
+
+
+def _crop_file(args: tuple) -> tuple:
+    """
+    Crop one file in place (process pool worker).
+
+    Returns:
+        (path, error message or None)
+    """
+    image_path, crop_percentage, quality, lossless, crop_pixels = args
+    try:
+        with open(image_path, "rb") as f:
+            data = f.read()
+        ext = os.path.splitext(image_path)[1]
+        atomic_write(image_path, crop_image_bytes(data, ext, crop_percentage, quality, lossless, crop_pixels))
+        return image_path, None
+    except Exception as e:
+        return image_path, str(e)
+
+
+def estimate_crop_cost(
+    image_files: list,
+    crop_percentage: int = DEFAULT_CROP_PERCENTAGE,
+    quality: int = 95,
+    workers: int = None,
+    lossless: bool = True,
+    sample_size: int = 5,
+    adaptive: bool = False
+) -> dict:
+    """
+    Estimate how long cropping a set of files will take, without writing.
+
+    A small sample is cropped in memory to measure seconds per byte, which
+    is then applied to the total size of all files. With adaptive, the
+    watermark detection is timed on the sample as well and counted once
+    per directory, as batch_crop_images() runs it.
+
+    Args:
+        image_files: Image file paths
+        crop_percentage: Percentage to crop from bottom
+        quality: JPEG quality for saving
+        workers: Number of processes the real run would use
+        lossless: Try the lossless JPEG crop before re-encoding
+        sample_size: Number of files to time
+        adaptive: Include the watermark detection of the adaptive mode
+
+    Returns:
+        Dictionary with files, total_bytes, sampled, seconds_per_mb,
+        detection_seconds and estimated_seconds
+    """
+    workers = workers or os.cpu_count() or 1
+    total_bytes = sum(os.path.getsize(f) for f in image_files)
+
+    # Spread the sample across the list rather than taking the first files
+    step = max(1, len(image_files) // sample_size) if image_files else 1
+    sample = image_files[::step][:sample_size]
+
+    crop_pixels = {}
+    detection_seconds = 0.0
+    if adaptive and sample:
+        start = time.perf_counter()
+        crop_pixels = detect_watermark_crop_files(sample)
+        directories = len({os.path.dirname(f) for f in image_files})
+        detection_seconds = (time.perf_counter() - start) * directories
+
+    sample_bytes = 0
+    start = time.perf_counter()
+    for image_path in sample:
+        with open(image_path, "rb") as f:
+            data = f.read()
+        try:
+            crop_image_bytes(
+                data, os.path.splitext(image_path)[1], crop_percentage, quality, lossless,
+                crop_pixels.get(image_path),
+            )
+        except Exception as e:
+            logger.warning(f"Could not sample {image_path}: {e}")
+        sample_bytes += len(data)
+    elapsed = time.perf_counter() - start
+
+    seconds_per_byte = elapsed / sample_bytes if sample_bytes else 0.0
+
+    return {
+        "files": len(image_files),
+        "total_bytes": total_bytes,
+        "sampled": len(sample),
+        "seconds_per_mb": round(seconds_per_byte * 1024 * 1024, 4),
+        "workers": workers,
+        "detection_seconds": round(detection_seconds, 1),
+        "estimated_seconds": round(total_bytes * seconds_per_byte / workers + detection_seconds, 1),
+    }
+
+
 def batch_crop_images(
-    image_dir: str,
+    image_dirs,
     crop_percentage: int = DEFAULT_CROP_PERCENTAGE,
-    quality: int = 95
+    quality: int = 95,
+    workers: int = 1,
+    dry_run: bool = False,
+    lossless: bool = True,
+    adaptive: bool = False
 ) -> dict:
     """
-    Crop all images in a directory.
+    Crop all images in one or more directories.
+
+    With workers > 1 the files are spread across a process pool, so
+    re-cropping a large archive scales with the number of cores.
 
     Args:
-        image_dir: Directory containing images
+        image_dirs: Directory containing images, or a list of directories
         crop_percentage: Percentage to crop from bottom
         quality: JPEG quality for saving
+        workers: Number of processes (1 = crop in this process,
+                 None = one per CPU core)
+        dry_run: Only estimate the cost; no files are modified
+        lossless: Try the lossless JPEG crop before re-encoding
+        adaptive: Detect the watermark band per directory and crop only that
+                  (falls back to crop_percentage where none is found)
 
     Returns:
-        Dictionary with results: {filename: status, cropped_count, failed_count}
+        Dictionary with results: {cropped, failed, errors, total,
+        elapsed_seconds, images_per_second} or, for a dry run, {total, estimate}
     """
+    workers = workers or os.cpu_count() or 1
+
     results = {
         "cropped": [],
         "failed": [],
+        "errors": {},
         "total": 0,
+        "elapsed_seconds": 0.0,
+        "images_per_second": 0.0,
     }
 
-    if not os.path.exists(image_dir):
-        logger.error(f"Image directory not found: {image_dir}")
-        return results
-
     # Get all image files
-    image_extensions = ['.jpg', '.jpeg', '.png', '.JPG', '.JPEG', '.PNG']
-    image_files = [
-        f for f in os.listdir(image_dir)
-        if os.path.splitext(f)[1] in image_extensions
-    ]
-
+    image_files = find_images(image_dirs)
     results["total"] = len(image_files)
 
-    logger.info(f"Cropping {len(image_files)} images in {image_dir}...")
-
-    for img_file in image_files:
-        img_path = os.path.join(image_dir, img_file)
+    if dry_run:
+        estimate = estimate_crop_cost(image_files, crop_percentage, quality, workers, lossless, adaptive=adaptive)
+        logger.info(
+            f"Dry run: {estimate['files']} images, "
+            f"{estimate['total_bytes'] / 1024 / 1024:.1f} MB, "
+            f"~{estimate['estimated_seconds']}s with {workers} worker(s)"
+        )
+        return {"total": len(image_files), "estimate": estimate}
+
+    logger.info(f"Cropping {len(image_files)} images with {workers} worker(s)...")
+
+    crop_pixels = {}
+    if adaptive:
+        # One detection pass per directory: a vehicle's images share the band
+        by_dir = {}
+        for f in image_files:
+            by_dir.setdefault(os.path.dirname(f), []).append(f)
+        for files in by_dir.values():
+            crop_pixels.update(detect_watermark_crop_files(files))
+
+    jobs = [(f, crop_percentage, quality, lossless, crop_pixels.get(f)) for f in image_files]
+    start = time.perf_counter()
+
+    if workers == 1 or len(jobs) <= 1:
+        outcomes = map(_crop_file, jobs)
+        pool = None
+    else:
+        pool = ProcessPoolExecutor(max_workers=workers)
+        chunksize = max(1, len(jobs) // (workers * 8))
+        outcomes = pool.map(_crop_file, jobs, chunksize=chunksize)
 
-        try:
-            cropped_path = crop_bottom(
-                img_path,
-                crop_percentage=crop_percentage,
-                overwrite=True,
-                quality=quality
-            )
-            results["cropped"].append(img_file)
-            logger.debug(f"Cropped: {img_file}")
-
-        except Exception as e:
-            logger.error(f"Failed to crop {img_file}: {e}")
-            results["failed"].append(img_file)
+    try:
+        for img_path, error in outcomes:
+            if error is None:
+                results["cropped"].append(img_path)
+                logger.debug(f"Cropped: {img_path}")
+            else:
+                logger.error(f"Failed to crop {img_path}: {error}")
+                results["failed"].append(img_path)
+                results["errors"][img_path] = error
+    finally:
+        if pool is not None:
+            pool.shutdown()
+
+    elapsed = time.perf_counter() - start
+    results["elapsed_seconds"] = round(elapsed, 2)
+    results["images_per_second"] = round(len(image_files) / elapsed, 2) if elapsed else 0.0
 
     logger.info(
         f"Cropping complete: "
         f"{len(results['cropped'])} cropped, "
-        f"{len(results['failed'])} failed"
+        f"{len(results['failed'])} failed "
+        f"({results['images_per_second']} images/s)"
     )
 
     return results
@@ -175,9 +804,31 @@ def auto_crop_after_download(
     results = batch_crop_images(images_dir, crop_percentage, quality)
 
     # Return list of successfully cropped files
-    cropped_files = [
-        os.path.join(images_dir, f)
-        for f in results["cropped"]
-    ]
-
-    return cropped_files
+    return results["cropped"]
+
+
+if __name__ == "__main__":
+    import argparse
+    import json
+
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s - %(levelname)s - %(message)s")
+
+    arg_parser = argparse.ArgumentParser(description="Re-crop image directories in parallel")
+    arg_parser.add_argument("dirs", nargs="+", help="Image directories to crop in place")
+    arg_parser.add_argument("--crop", type=int, default=DEFAULT_CROP_PERCENTAGE, help="Percentage to crop from bottom")
+    arg_parser.add_argument("--quality", type=int, default=95, help="JPEG quality for re-encoded images")
+    arg_parser.add_argument("--workers", type=int, default=None, help="Processes to use (default: all cores)")
+    arg_parser.add_argument("--dry-run", action="store_true", help="Only estimate the cost")
+    arg_parser.add_argument("--adaptive", action="store_true", help="Detect the watermark band instead of a fixed crop")
+    cli_args = arg_parser.parse_args()
+
+    summary = batch_crop_images(
+        cli_args.dirs,
+        crop_percentage=cli_args.crop,
+        quality=cli_args.quality,
+        workers=cli_args.workers,
+        dry_run=cli_args.dry_run,
+        adaptive=cli_args.adaptive,
+    )
+    summary.pop("cropped", None)
+    print(json.dumps(summary, indent=2))
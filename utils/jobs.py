@@ -0,0 +1,382 @@
+"""
+BE FORWARD Web Scraper - Scrape Job Queue
+Runs daily_scraper.py in the background for the API server.
+
+POST /scrape used to run the scraper inside the request, holding a gunicorn
+thread for minutes. Jobs are now queued and the request returns at once:
+    - every job is a JSON file under config.SCRAPE_JOB_DIR, so any gunicorn
+      worker can report on any job
+    - a request identical to a queued or running job returns that job
+      instead of starting a second scraper
+    - at most config.SCRAPE_JOB_CONCURRENCY scrapers run at a time across
+      all workers (flock'ed slot files), since they share one state file
+"""
+
+import fcntl
+import json
+import logging
+import os
+import subprocess
+import sys
+import threading
+import time
+import uuid
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+from datetime import datetime
+from pathlib import Path
+from typing import Callable
+
+import config
+from . import events, scrape_worker
+from .fileio import atomic_write
+
+logger = logging.getLogger(__name__)
+
+JOB_QUEUED = "queued"
+JOB_RUNNING = "running"
+JOB_SUCCEEDED = "succeeded"
+JOB_FAILED = "failed"
+ACTIVE_STATES = (JOB_QUEUED, JOB_RUNNING)
+
+# Scraper output kept in the job record
+OUTPUT_TAIL_LINES = 200
+# Minimum seconds between progress writes to the job file
+PROGRESS_INTERVAL = 1.0
+
+# Request parameters that select the scraper's behaviour (and dedupe key)
+SCRAPE_PARAMS = ("force", "country", "skip_images", "mode", "no_crop")
+
+
+def normalize_params(data: dict) -> dict:
+    """Reduce a /scrape request body to the parameters the scraper uses."""
+    params = {}
+    for name in SCRAPE_PARAMS:
+        value = data.get(name)
+        if value:
+            params[name] = value.lower() if isinstance(value, str) else True
+    return params
+
+
+def scrape_command(params: dict) -> list:
+    """Build the daily_scraper.py command line for job parameters."""
+    cmd = [sys.executable, "daily_scraper.py"]
+
+    if params.get("force"):
+        cmd.append("--force")
+
+    if params.get("country"):
+        cmd.extend(["--country", params["country"]])
+
+    if params.get("skip_images"):
+        cmd.append("--skip-images")
+
+    if params.get("mode"):
+        cmd.extend(["--mode", params["mode"]])
+
+    if params.get("no_crop"):
+        cmd.append("--no-crop")
+
+    return cmd
+
+
+def _now() -> str:
+    return datetime.now().isoformat()
+
+
+def _pid_alive(pid: int) -> bool:
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        pass
+    return True
+
+
+class JobManager:
+    """
+    Background scrape jobs shared by all API worker processes.
+
+    Jobs run on this process's thread pool; their state lives on disk.
+    """
+
+    def __init__(
+        self,
+        jobs_dir: Path = None,
+        concurrency: int = None,
+        timeout: int = None,
+        on_success: Callable[[dict], dict] = None,
+    ):
+        """
+        Args:
+            jobs_dir: Directory for job files (default config.SCRAPE_JOB_DIR)
+            concurrency: Maximum scrapers running at once
+            timeout: Seconds before a running scraper is killed
+            on_success: Called with the finished job; returns extra result
+                        fields (e.g. the scraped vehicle)
+        """
+        self.jobs_dir = Path(jobs_dir or config.SCRAPE_JOB_DIR)
+        self.concurrency = concurrency or config.SCRAPE_JOB_CONCURRENCY
+        self.timeout = timeout or config.SCRAPE_JOB_TIMEOUT
+        self.on_success = on_success
+        self.jobs_dir.mkdir(parents=True, exist_ok=True)
+
+        self._executor = ThreadPoolExecutor(max_workers=self.concurrency, thread_name_prefix="scrape-job")
+
+    def _path(self, job_id: str) -> Path:
+        return self.jobs_dir / f"{job_id}.json"
+
+    @contextmanager
+    def _locked(self):
+        """Exclusive lock on the job directory, across processes."""
+        with open(self.jobs_dir / ".lock", "w") as lock_file:
+            fcntl.flock(lock_file, fcntl.LOCK_EX)
+            try:
+                yield
+            finally:
+                fcntl.flock(lock_file, fcntl.LOCK_UN)
+
+    @contextmanager
+    def _slot(self):
+        """Block until one of the concurrency slots is free, across processes."""
+        while True:
+            for i in range(self.concurrency):
+                slot_file = open(self.jobs_dir / f".slot-{i}.lock", "w")
+                try:
+                    fcntl.flock(slot_file, fcntl.LOCK_EX | fcntl.LOCK_NB)
+                except BlockingIOError:
+                    slot_file.close()
+                    continue
+
+                try:
+                    yield
+                finally:
+                    fcntl.flock(slot_file, fcntl.LOCK_UN)
+                    slot_file.close()
+                return
+            time.sleep(1)
+
+    def _load(self, path: Path) -> dict | None:
+        try:
+            with open(path, "r") as f:
+                return json.load(f)
+        except FileNotFoundError:
+            return None
+        except Exception as e:
+            logger.warning(f"Could not read job {path.name}: {e}")
+            return None
+
+    def _save(self, job: dict):
+        atomic_write(self._path(job["id"]), json.dumps(job, indent=2).encode("utf-8"))
+
+    def _update(self, job_id: str, **fields) -> dict | None:
+        with self._locked():
+            job = self._load(self._path(job_id))
+            if job is None:
+                return None
+            job.update(fields)
+            self._save(job)
+            return job
+
+    def get(self, job_id: str) -> dict | None:
+        """
+        Get a job record.
+
+        A queued or running job whose owning process has exited is reported
+        as failed.
+        """
+        job = self._load(self._path(job_id))
+        if job and job["status"] in ACTIVE_STATES and not _pid_alive(job["owner_pid"]):
+            job = self._update(
+                job_id,
+                status=JOB_FAILED,
+                finished_at=_now(),
+                error="API worker exited before the job finished",
+            )
+        return job
+
+    def _active_jobs(self) -> list:
+        jobs = []
+        for path in self.jobs_dir.glob("*.json"):
+            job = self._load(path)
+            if job and job["status"] in ACTIVE_STATES and _pid_alive(job["owner_pid"]):
+                jobs.append(job)
+        return jobs
+
+    def submit(self, params: dict) -> tuple:
+        """
+        Queue a scrape, or find the identical one already queued or running.
+
+        Returns:
+            (job, created) - created is False for a deduplicated request
+        """
+        params = normalize_params(params)
+        key = json.dumps(params, sort_keys=True)
+
+        with self._locked():
+            for job in self._active_jobs():
+                if job["key"] == key:
+                    logger.info(f"Scrape request matches job {job['id']}")
+                    return job, False
+
+            job = {
+                "id": uuid.uuid4().hex[:12],
+                "key": key,
+                "params": params,
+                "status": JOB_QUEUED,
+                "owner_pid": os.getpid(),
+                "created_at": _now(),
+                "started_at": None,
+                "finished_at": None,
+                "progress": {"lines": 0, "last_line": None},
+                "result": None,
+                "error": None,
+            }
+            self._save(job)
+            self._prune()
+
+        self._executor.submit(self._run, job["id"])
+        logger.info(f"Queued scrape job {job['id']}: {params}")
+        return job, True
+
+    def wait(self, job_id: str, timeout: float = None) -> dict | None:
+        """Block until a job finishes (or timeout seconds pass) and return it."""
+        deadline = time.monotonic() + timeout if timeout else None
+        while True:
+            job = self.get(job_id)
+            if job is None or job["status"] not in ACTIVE_STATES:
+                return job
+            if deadline and time.monotonic() >= deadline:
+                return job
+            time.sleep(0.5)
+
+    def _run(self, job_id: str):
+        with self._slot():
+            job = self._update(job_id, status=JOB_RUNNING, started_at=_now())
+            if job is None:
+                return
+            events.publish(events.JOB_STARTED, job_id=job_id, params=job["params"])
+
+            try:
+                result = self._execute(job)
+            except Exception as e:
+                logger.exception(f"Scrape job {job_id} failed")
+                self._finish(job_id, JOB_FAILED, error=str(e))
+                return
+
+        if result["returncode"] != 0:
+            error = "Scraping timed out" if result.get("timed_out") else "Scraping failed"
+            self._finish(job_id, JOB_FAILED, result=result, error=error)
+            return
+
+        if self.on_success:
+            try:
+                result.update(self.on_success(job) or {})
+            except Exception as e:
+                logger.warning(f"Post-processing of job {job_id} failed: {e}")
+
+        self._finish(job_id, JOB_SUCCEEDED, result=result)
+        logger.info(f"Scrape job {job_id} finished")
+
+    def _finish(self, job_id: str, status: str, **fields):
+        self._update(job_id, status=status, finished_at=_now(), **fields)
+        events.publish(events.JOB_FINISHED, job_id=job_id, status=status, error=fields.get("error"))
+
+    def _execute(self, job: dict) -> dict:
+        """
+        Run the scraper for a job, streaming its output into progress.
+
+        Uses the warm worker process when SCRAPE_WORKER_MODE is "warm", and
+        a fresh daily_scraper.py process otherwise or if the worker fails.
+        """
+        output = deque(maxlen=OUTPUT_TAIL_LINES)
+        progress = {"lines": 0, "written": 0.0}
+
+        def on_line(line: str):
+            output.append(line)
+            progress["lines"] += 1
+            if line.strip() and time.monotonic() - progress["written"] >= PROGRESS_INTERVAL:
+                self._update(job["id"], progress={"lines": progress["lines"], "last_line": line})
+                progress["written"] = time.monotonic()
+
+        cmd = scrape_command(job["params"])
+        returncode = None
+
+        if config.SCRAPE_WORKER_MODE == config.SCRAPE_WORKER_WARM:
+            logger.info(f"Running scraper for job {job['id']} in warm worker: {' '.join(cmd[2:])}")
+            try:
+                returncode, timed_out = scrape_worker.get_worker().run(cmd[2:], on_line, self.timeout)
+            except scrape_worker.WorkerUnavailable as e:
+                logger.warning(f"{e} - falling back to a subprocess")
+                on_line(f"[warm worker unavailable: {e}]")
+
+        if returncode is None:
+            logger.info(f"Running scraper for job {job['id']}: {' '.join(cmd)}")
+            returncode, timed_out = self._run_subprocess(cmd, on_line)
+
+        self._update(job["id"], progress={"lines": progress["lines"], "last_line": output[-1] if output else None})
+        return {
+            "returncode": returncode,
+            "timed_out": timed_out,
+            "output": "\n".join(output),
+        }
+
+    def _run_subprocess(self, cmd: list, on_line: Callable[[str], None]) -> tuple:
+        """
+        Run the scraper in a new process.
+
+        Returns:
+            (exit code, timed out)
+        """
+        process = subprocess.Popen(
+            cmd,
+            stdout=subprocess.PIPE,
+            stderr=subprocess.STDOUT,
+            text=True,
+            bufsize=1,
+            cwd=str(config.BASE_DIR),
+            # Line-by-line output for progress reporting
+            env={**os.environ, "PYTHONUNBUFFERED": "1"},
+        )
+
+        timed_out = threading.Event()
+
+        def kill():
+            timed_out.set()
+            process.kill()
+
+        watchdog = threading.Timer(self.timeout, kill)
+        watchdog.daemon = True
+        watchdog.start()
+
+        try:
+            for line in process.stdout:
+                on_line(line.rstrip("\n"))
+            process.wait()
+        finally:
+            watchdog.cancel()
+
+        return process.returncode, timed_out.is_set()
+
+    def _prune(self):
+        """Delete the oldest finished job files beyond config.SCRAPE_JOB_HISTORY."""
+        paths = sorted(self.jobs_dir.glob("*.json"), key=lambda p: p.stat().st_mtime, reverse=True)
+        for path in paths[config.SCRAPE_JOB_HISTORY:]:
+            job = self._load(path)
+            if job and job["status"] not in ACTIVE_STATES:
+                path.unlink(missing_ok=True)
+
+
+_manager = None
+_manager_lock = threading.Lock()
+
+
+def get_manager(on_success: Callable[[dict], dict] = None) -> JobManager:
+    """Return the process-wide job manager, creating it on first use."""
+    global _manager
+    with _manager_lock:
+        if _manager is None:
+            _manager = JobManager(on_success=on_success)
+        return _manager
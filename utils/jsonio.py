@@ -0,0 +1,94 @@
+"""
+BE FORWARD Web Scraper - JSON Encoding
+Fast JSON for the API: orjson when it is installed, the standard library
+otherwise (config.API_JSON_ENCODER).
+
+Output is compact UTF-8 (emoji stay as is instead of \\ud83d\\ude97
+escapes). Already-encoded JSON, such as facebook.json read from disk, can
+be embedded as RawJSON and is copied into the output without being
+decoded and encoded again.
+"""
+
+import json
+import logging
+import uuid
+from typing import Callable
+
+import config
+
+logger = logging.getLogger(__name__)
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+# Stands in for RawJSON values while the surrounding object is encoded
+_RAW_TOKEN = f"__raw_json_{uuid.uuid4().hex}_"
+
+
+class RawJSON:
+    """Pre-encoded JSON value (must be valid JSON, without line breaks)."""
+
+    __slots__ = ("data",)
+
+    def __init__(self, data: bytes):
+        self.data = data
+
+    def __len__(self) -> int:
+        return len(self.data)
+
+
+def compact(data: bytes) -> bytes:
+    """
+    Remove line breaks from an encoded JSON document.
+
+    Line breaks can only appear between tokens (inside strings they are
+    escaped), so this keeps the document valid and makes it fit on one
+    NDJSON or SSE line.
+    """
+    return data.replace(b"\r", b"").replace(b"\n", b"")
+
+
+def backend() -> str:
+    """Encoder in use: "orjson" or "stdlib"."""
+    if config.API_JSON_ENCODER == "stdlib" or orjson is None:
+        if config.API_JSON_ENCODER == "orjson":
+            logger.warning("orjson is not installed - using the standard json module")
+        return "stdlib"
+    return "orjson"
+
+
+def dumps(obj, default: Callable = None) -> bytes:
+    """
+    Encode obj as compact UTF-8 JSON.
+
+    Args:
+        obj: Value to encode; may contain RawJSON values
+        default: Called for other values the encoder does not support
+    """
+    fragments = []
+
+    def encode_default(value):
+        if isinstance(value, RawJSON):
+            fragments.append(value.data)
+            return f"{_RAW_TOKEN}{len(fragments) - 1}"
+        if default is None:
+            raise TypeError(f"Object of type {type(value).__name__} is not JSON serializable")
+        return default(value)
+
+    if backend() == "orjson":
+        data = orjson.dumps(obj, default=encode_default, option=orjson.OPT_NON_STR_KEYS)
+    else:
+        data = json.dumps(obj, default=encode_default, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+
+    for i, fragment in enumerate(fragments):
+        data = data.replace(f'"{_RAW_TOKEN}{i}"'.encode("utf-8"), fragment, 1)
+    return data
+
+
+def loads(data: bytes | str):
+    """Decode JSON (bytes or text)."""
+    if backend() == "orjson":
+        return orjson.loads(data)
+    return json.loads(data)
@@ -0,0 +1,171 @@
+"""
+BE FORWARD Web Scraper - Per-Vehicle Image Manifest
+Records what has been downloaded into a vehicle folder so interrupted runs
+can skip finished images, resume partial ones and re-fetch corrupt ones.
+
+The manifest is a JSON file (.manifest.json) in the vehicle folder:
+    {
+        "CB123_001.jpg": {
+            "url": ..., "complete": true, "size": ..., "sha256": ...,
+            "etag": ..., "last_modified": ..., "signature": ...
+        },
+        "CB123_002.jpg": {
+            "url": ..., "complete": false,
+            "etag": ..., "last_modified": ...
+        }
+    }
+
+Source bytes are written to a hidden .<name>.part file as they arrive, and
+the validators are recorded before the first byte, so even a killed process
+leaves a resumable download behind: the .part file's size is the offset to
+resume from.
+"""
+
+import fcntl
+import hashlib
+import json
+import logging
+from contextlib import contextmanager
+from pathlib import Path
+
+from .fileio import atomic_write
+
+logger = logging.getLogger(__name__)
+
+MANIFEST_FILENAME = ".manifest.json"
+LOCK_FILENAME = ".manifest.lock"
+
+
+def file_sha256(path: Path) -> str:
+    """Hash a file in chunks."""
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(1024 * 1024), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+class ImageManifest:
+    """
+    Download manifest of one vehicle folder, as read from disk.
+
+    Every change re-reads the file under a lock and writes it back, so
+    other threads and processes (cron runs, the warm worker) updating the
+    same folder never lose each other's entries.
+    """
+
+    def __init__(self, vehicle_dir: Path):
+        self.vehicle_dir = Path(vehicle_dir)
+        self.path = self.vehicle_dir / MANIFEST_FILENAME
+        self.entries = self._load()
+
+    def _load(self) -> dict:
+        if self.path.exists():
+            try:
+                with open(self.path, "r") as f:
+                    return json.load(f)
+            except Exception as e:
+                logger.warning(f"Could not load manifest {self.path}: {e}")
+        return {}
+
+    @contextmanager
+    def _update(self):
+        """Yield the entries as on disk now; they are saved when the block ends."""
+        self.vehicle_dir.mkdir(parents=True, exist_ok=True)
+        with open(self.vehicle_dir / LOCK_FILENAME, "w") as lock_file:
+            fcntl.flock(lock_file, fcntl.LOCK_EX)
+            try:
+                self.entries = self._load()
+                yield self.entries
+                atomic_write(self.path, json.dumps(self.entries, indent=2).encode("utf-8"))
+            finally:
+                fcntl.flock(lock_file, fcntl.LOCK_UN)
+
+    def part_path(self, filename: str) -> Path:
+        """Where partially received bytes of an image are kept."""
+        return self.vehicle_dir / f".{filename}.part"
+
+    def check(self, filename: str, url: str, signature: str) -> str:
+        """
+        Check the state of an image against the manifest.
+
+        Returns:
+            "complete" - file present with the recorded size and hash
+            "partial"  - a resumable .part file is present
+            "corrupt"  - file recorded as complete but missing or damaged
+            "missing"  - nothing usable recorded
+        """
+        entry = self.entries.get(filename)
+        if not entry or entry.get("url") != url:
+            return "missing"
+
+        if not entry.get("complete"):
+            part = self.part_path(filename)
+            if part.exists() and part.stat().st_size > 0:
+                return "partial"
+            return "missing"
+
+        if entry.get("signature") != signature:
+            # Finished with other processing settings - redo, not corrupt
+            return "missing"
+
+        file_path = self.vehicle_dir / filename
+        if not file_path.exists() or file_path.stat().st_size != entry.get("size"):
+            return "corrupt"
+        if file_sha256(file_path) != entry.get("sha256"):
+            return "corrupt"
+
+        return "complete"
+
+    def get(self, filename: str) -> dict:
+        return dict(self.entries.get(filename, {}))
+
+    def begin_partial(self, filename: str, url: str, etag: str = None, last_modified: str = None):
+        """Record a download about to stream into the .part file, with its validators."""
+        with self._update() as entries:
+            entries[filename] = {
+                "url": url,
+                "complete": False,
+                "etag": etag,
+                "last_modified": last_modified,
+            }
+
+    def discard(self, filename: str):
+        """Forget an image and drop its partially received bytes."""
+        with self._update() as entries:
+            entries.pop(filename, None)
+
+        self.part_path(filename).unlink(missing_ok=True)
+
+    def record_complete(
+        self,
+        filename: str,
+        url: str,
+        data: bytes,
+        signature: str,
+        etag: str = None,
+        last_modified: str = None,
+    ):
+        """Record a finished image (data is the final file content)."""
+        with self._update() as entries:
+            entries[filename] = {
+                "url": url,
+                "complete": True,
+                "size": len(data),
+                "sha256": hashlib.sha256(data).hexdigest(),
+                "etag": etag,
+                "last_modified": last_modified,
+                "signature": signature,
+            }
+
+        self.part_path(filename).unlink(missing_ok=True)
+
+
+def for_directory(vehicle_dir: Path) -> ImageManifest:
+    """
+    Read the manifest of a vehicle folder.
+
+    Not cached: each image download reads the current file, so nothing is
+    kept in memory once a vehicle's downloads finish.
+    """
+    return ImageManifest(vehicle_dir)
@@ -0,0 +1,520 @@
+"""
+BE FORWARD Web Scraper - Metrics
+Counters, gauges and histograms in the Prometheus text format.
+
+Every process records into its own in-memory registry. Processes that
+share their metrics (API workers, the warm scrape worker, daily_scraper.py)
+write a snapshot to config.METRICS_DIR periodically and at exit; GET
+/metrics merges the snapshots, so scraper HTTP timings show up next to the
+API's own latencies even though they are recorded in other processes.
+
+Once a process has exited, its counters and histograms are folded into a
+persistent "retired" total (retired.json) and its snapshot is deleted, so
+the summed counters never go down when cron runs or workers come and go.
+A snapshot that missed several periodic flushes counts as exited too (its
+pid may have been reused); should its process still be running, it only
+reports what it counted since.
+
+The CLIs can also write their registry to a file at exit (--metrics-file),
+e.g. for the node_exporter textfile collector.
+"""
+
+import atexit
+import bisect
+import fcntl
+import functools
+import json
+import logging
+import os
+import threading
+import time
+import uuid
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Callable, Dict, Iterable
+
+import config
+from .fileio import atomic_write
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+
+COUNTER = "counter"
+GAUGE = "gauge"
+HISTOGRAM = "histogram"
+
+
+class Metric:
+    """A metric family; values are kept per combination of label values."""
+
+    def __init__(
+        self,
+        name: str,
+        help_text: str,
+        kind: str,
+        labels: Iterable[str] = (),
+        buckets=DEFAULT_BUCKETS,
+        shared: bool = True,
+    ):
+        self.name = name
+        self.help = help_text
+        self.kind = kind
+        self.label_names = tuple(labels)
+        self.buckets = tuple(buckets) if kind == HISTOGRAM else ()
+        self.shared = shared
+        self._lock = threading.Lock()
+        self._values: Dict[tuple, object] = {}
+        self._functions: Dict[tuple, Callable[[], float]] = {}
+
+    def _key(self, labels: dict) -> tuple:
+        return tuple(str(labels.get(name, "")) for name in self.label_names)
+
+    def inc(self, amount: float = 1, **labels):
+        """Add to a counter or gauge."""
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def set(self, value: float, **labels):
+        """Set a gauge."""
+        with self._lock:
+            self._values[self._key(labels)] = value
+
+    def set_function(self, function: Callable[[], float], **labels):
+        """Read a gauge's value from function whenever metrics are collected."""
+        with self._lock:
+            self._functions[self._key(labels)] = function
+
+    def observe(self, value: float, **labels):
+        """Record a histogram observation."""
+        key = self._key(labels)
+        index = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            counts = self._values.get(key)
+            if counts is None:
+                # One count per bucket, then +Inf, then the sum
+                counts = self._values[key] = [0] * (len(self.buckets) + 1) + [0.0]
+            counts[index] += 1
+            counts[-1] += value
+
+    @contextmanager
+    def time(self, **labels):
+        """Observe the duration of a with block."""
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(time.perf_counter() - start, **labels)
+
+    def timed(self, **labels):
+        """Decorator observing the duration of each call."""
+        def decorator(func):
+            @functools.wraps(func)
+            def wrapper(*args, **kwargs):
+                with self.time(**labels):
+                    return func(*args, **kwargs)
+            return wrapper
+        return decorator
+
+    def samples(self) -> Dict[tuple, object]:
+        """Current values by label values (copies)."""
+        with self._lock:
+            values = {key: list(v) if isinstance(v, list) else v for key, v in self._values.items()}
+            functions = dict(self._functions)
+
+        for key, function in functions.items():
+            try:
+                values[key] = float(function())
+            except Exception as e:
+                logger.debug(f"Metric {self.name} unavailable: {e}")
+        return values
+
+
+class Registry:
+    """Set of metrics rendered together."""
+
+    def __init__(self):
+        self._metrics: Dict[str, Metric] = {}
+        self._lock = threading.Lock()
+
+    def _register(self, name, help_text, kind, labels, **kwargs) -> Metric:
+        with self._lock:
+            if name not in self._metrics:
+                self._metrics[name] = Metric(name, help_text, kind, labels, **kwargs)
+            return self._metrics[name]
+
+    def counter(self, name: str, help_text: str, labels: Iterable[str] = ()) -> Metric:
+        return self._register(name, help_text, COUNTER, labels)
+
+    def gauge(self, name: str, help_text: str, labels: Iterable[str] = (), shared: bool = True) -> Metric:
+        """
+        A gauge. Shared gauges are summed over processes; pass shared=False
+        for values every process reports identically (e.g. a database count).
+        """
+        return self._register(name, help_text, GAUGE, labels, shared=shared)
+
+    def histogram(self, name: str, help_text: str, labels: Iterable[str] = (), buckets=DEFAULT_BUCKETS) -> Metric:
+        return self._register(name, help_text, HISTOGRAM, labels, buckets=buckets)
+
+    def snapshot(self, shared_only: bool = False) -> dict:
+        """JSON-serializable copy of every metric's values."""
+        with self._lock:
+            metrics = [m for m in self._metrics.values() if m.shared or not shared_only]
+
+        return {
+            metric.name: {
+                "help": metric.help,
+                "kind": metric.kind,
+                "labels": metric.label_names,
+                "buckets": metric.buckets,
+                "samples": [[list(key), value] for key, value in metric.samples().items()],
+            }
+            for metric in metrics
+        }
+
+
+REGISTRY = Registry()
+
+# Scraper HTTP (fetch_page, image and zip downloads)
+HTTP_REQUESTS = REGISTRY.counter(
+    "beforward_http_requests_total", "Requests to BE FORWARD by URL class and status", ["url_class", "status"])
+HTTP_SECONDS = REGISTRY.histogram(
+    "beforward_http_request_seconds", "Request time until the response headers arrive", ["url_class"])
+HTTP_RETRIES = REGISTRY.counter(
+    "beforward_http_retries_total", "Requests repeated after a failure", ["url_class"])
+
+# Scraping pipeline
+PARSE_SECONDS = REGISTRY.histogram(
+    "beforward_parse_seconds", "HTML parse time", ["page"])
+IMAGE_BYTES = REGISTRY.counter(
+    "beforward_image_bytes_total", "Image bytes downloaded, and after cropping and encoding", ["stage"])
+IMAGE_CROP_SECONDS = REGISTRY.histogram(
+    "beforward_image_crop_seconds", "Time to crop and encode one image")
+VEHICLES_SCRAPED = REGISTRY.counter(
+    "beforward_vehicles_scraped_total", "Vehicles scraped", ["result"])
+DOWNLOAD_QUEUE_DEPTH = REGISTRY.gauge(
+    "beforward_download_queue_depth", "Image downloads waiting for a worker")
+CHECKPOINT_SECONDS = REGISTRY.histogram(
+    "beforward_checkpoint_write_seconds", "Time to write scraper state and checkpoint files", ["file"])
+
+# API server
+API_REQUESTS = REGISTRY.counter(
+    "beforward_api_requests_total", "API requests by endpoint and status", ["endpoint", "method", "status"])
+API_SECONDS = REGISTRY.histogram(
+    "beforward_api_request_seconds", "API request time until the response is returned", ["endpoint", "method"])
+POST_QUEUE_DEPTH = REGISTRY.gauge(
+    "beforward_post_queue_vehicles", "Vehicles in the Facebook post queue by state", ["status"], shared=False)
+CATALOG_VEHICLES = REGISTRY.gauge(
+    "beforward_catalog_vehicles", "Vehicles in the API's catalog", shared=False)
+
+
+def url_class(url: str) -> str:
+    """Coarse URL category used as a label (keeps label cardinality low)."""
+    path = url.split("?", 1)[0].lower()
+    if "/stocklist" in path:
+        return "stocklist"
+    if "/id/" in path:
+        return "detail"
+    if path.endswith(".zip"):
+        return "zip"
+    if path.endswith((".jpg", ".jpeg", ".png", ".webp", ".gif")):
+        return "image"
+    return "other"
+
+
+def record_response(url: str, response):
+    """Count a response (any status) and its time to headers."""
+    category = url_class(url)
+    HTTP_REQUESTS.inc(url_class=category, status=response.status_code)
+    HTTP_SECONDS.observe(response.elapsed.total_seconds(), url_class=category)
+
+
+def record_failure(url: str):
+    """Count a request that got no response (timeout, connection error)."""
+    HTTP_REQUESTS.inc(url_class=url_class(url), status="error")
+
+
+# =============================================================================
+# Sharing between processes
+# =============================================================================
+
+RETIRED_FILE = "retired.json"
+LOCK_FILE = ".lock"
+STALE_FLUSHES = 4  # Missed periodic flushes after which a snapshot counts as exited (pid reused)
+
+_sharing = {"dir": None, "thread": None, "interval": 0, "pid": None, "path": None, "written": None, "base": None}
+_flush_lock = threading.Lock()
+
+
+def _own_path() -> Path | None:
+    """This process's snapshot file (None when sharing is off)."""
+    if _sharing["dir"] is None:
+        return None
+    if _sharing["pid"] != os.getpid():
+        # Unique per process, also after a fork: a reused pid must not
+        # overwrite an exited process's snapshot before it is retired
+        _sharing["pid"] = os.getpid()
+        _sharing["path"] = _sharing["dir"] / f"{os.getpid()}-{uuid.uuid4().hex[:8]}.json"
+        _sharing["written"] = _sharing["base"] = None
+    return _sharing["path"]
+
+
+def flush():
+    """Write this process's snapshot for GET /metrics (if sharing is on)."""
+    path = _own_path()
+    if path is None:
+        return
+
+    current = REGISTRY.snapshot(shared_only=True)
+    with _flush_lock:
+        if _sharing["written"] is not None and not path.exists():
+            # Retired as exited after missing its flushes: what the last
+            # snapshot held is in the retired totals now, only report the rest
+            _sharing["base"] = _sharing["written"]
+        reported = _subtract(current, _sharing["base"]) if _sharing["base"] else current
+
+        data = {"pid": os.getpid(), "time": time.time(), "interval": _sharing["interval"], "metrics": reported}
+        try:
+            atomic_write(path, json.dumps(data).encode("utf-8"))
+            _sharing["written"] = current
+        except OSError as e:
+            logger.debug(f"Could not write metrics snapshot: {e}")
+
+
+def share(interval: float = None):
+    """
+    Publish this process's metrics to config.METRICS_DIR.
+
+    Writes a snapshot at exit, and every interval seconds for long-lived
+    processes (0 = at exit only). No-op when METRICS_DIR is None.
+    """
+    if not config.METRICS_DIR or _sharing["dir"] is not None:
+        return
+    _sharing["dir"] = Path(config.METRICS_DIR)
+    atexit.register(flush)
+
+    interval = config.METRICS_FLUSH_INTERVAL if interval is None else interval
+    _sharing["interval"] = interval
+    if interval:
+        def run():
+            while True:
+                time.sleep(interval)
+                flush()
+
+        _sharing["thread"] = threading.Thread(target=run, name="metrics-flush", daemon=True)
+        _sharing["thread"].start()
+
+
+def _pid_alive(pid: int) -> bool:
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        pass
+    return True
+
+
+def _snapshot_alive(data: dict, now: float) -> bool:
+    """
+    Whether a snapshot's process is still running.
+
+    A live pid is not enough, as pids are reused: a process flushing
+    periodically that missed STALE_FLUSHES flushes counts as exited too.
+    """
+    if not _pid_alive(data["pid"]):
+        return False
+    interval = data.get("interval") or 0
+    return not interval or now - data["time"] <= STALE_FLUSHES * interval
+
+
+def _read_snapshot(path: Path) -> dict | None:
+    try:
+        with open(path, "r") as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return None
+
+
+def _retire(directory: Path, paths: list):
+    """Fold the counters and histograms of exited processes into retired.json."""
+    with open(directory / LOCK_FILE, "w") as lock_file:
+        # Every API worker renders /metrics; only one may fold a snapshot
+        fcntl.flock(lock_file, fcntl.LOCK_EX)
+        try:
+            totals = {}
+            _merge(totals, (_read_snapshot(directory / RETIRED_FILE) or {}).get("metrics", {}))
+            retired = []
+            for path in paths:
+                data = _read_snapshot(path)
+                if data is None:
+                    continue  # Already folded by another worker
+                _merge(totals, data["metrics"], include_gauges=False)
+                retired.append(path)
+            if not retired:
+                return
+
+            data = {"time": time.time(), "metrics": _to_snapshot(totals)}
+            atomic_write(directory / RETIRED_FILE, json.dumps(data).encode("utf-8"))
+            for path in retired:
+                path.unlink(missing_ok=True)
+        finally:
+            fcntl.flock(lock_file, fcntl.LOCK_UN)
+
+
+def _shared_snapshots() -> list:
+    """
+    Snapshots of the other live processes, plus the retired totals of the
+    exited ones (whose snapshots are folded in and deleted).
+    """
+    directory = _sharing["dir"]
+    if directory is None or not directory.is_dir():
+        return []
+
+    snapshots = []
+    exited = []
+    now = time.time()
+    for path in directory.glob("*.json"):
+        if path == _own_path() or path.name == RETIRED_FILE:
+            continue
+        data = _read_snapshot(path)
+        if data is None:
+            continue
+        if _snapshot_alive(data, now):
+            data["alive"] = True
+            snapshots.append(data)
+        else:
+            exited.append(path)
+
+    if exited:
+        try:
+            _retire(directory, exited)
+        except OSError as e:
+            logger.warning(f"Could not retire metrics snapshots: {e}")
+
+    retired = _read_snapshot(directory / RETIRED_FILE)
+    if retired is not None:
+        retired["alive"] = False
+        snapshots.append(retired)
+    return snapshots
+
+
+def _merge(target: dict, snapshot: dict, include_gauges: bool = True):
+    for name, metric in snapshot.items():
+        if metric["kind"] == GAUGE and not include_gauges:
+            continue
+        merged = target.setdefault(name, {**metric, "samples": {}})
+        if tuple(merged["buckets"]) != tuple(metric["buckets"]):
+            continue
+
+        for key, value in metric["samples"]:
+            key = tuple(key)
+            current = merged["samples"].get(key)
+            if current is None:
+                merged["samples"][key] = list(value) if isinstance(value, list) else value
+            elif isinstance(value, list):
+                merged["samples"][key] = [a + b for a, b in zip(current, value)]
+            else:
+                merged["samples"][key] = current + value
+
+
+def _subtract(snapshot: dict, base: dict) -> dict:
+    """Counters and histograms of snapshot minus those of base (gauges as they are)."""
+    result = {}
+    for name, metric in snapshot.items():
+        before = base.get(name)
+        if metric["kind"] == GAUGE or not before or tuple(before["buckets"]) != tuple(metric["buckets"]):
+            result[name] = metric
+            continue
+
+        previous = {tuple(key): value for key, value in before["samples"]}
+        samples = []
+        for key, value in metric["samples"]:
+            old = previous.get(tuple(key))
+            if old is None:
+                samples.append([key, value])
+            elif isinstance(value, list):
+                samples.append([key, [a - b for a, b in zip(value, old)]])
+            else:
+                samples.append([key, value - old])
+        result[name] = {**metric, "samples": samples}
+    return result
+
+
+def _to_snapshot(merged: dict) -> dict:
+    """Inverse of _merge: merged metrics back in the snapshot format."""
+    return {
+        name: {**metric, "samples": [[list(key), value] for key, value in metric["samples"].items()]}
+        for name, metric in merged.items()
+    }
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _labels(names: Iterable[str], values: Iterable[str], extra: str = "") -> str:
+    parts = [f'{name}="{_escape(value)}"' for name, value in zip(names, values)]
+    if extra:
+        parts.append(extra)
+    return "{" + ",".join(parts) + "}" if parts else ""
+
+
+def _format_value(value: float) -> str:
+    if isinstance(value, float) and value.is_integer():
+        return str(int(value))
+    return repr(value)
+
+
+def render(shared: bool = True) -> str:
+    """
+    Metrics in the Prometheus text exposition format (version 0.0.4).
+
+    Args:
+        shared: Include the snapshots of the other processes. Counters and
+                histograms of exited processes are kept (as retired totals);
+                their gauges are dropped.
+    """
+    merged = {}
+    _merge(merged, REGISTRY.snapshot())
+    if shared:
+        for snapshot in _shared_snapshots():
+            _merge(merged, snapshot["metrics"], include_gauges=snapshot["alive"])
+
+    lines = []
+    for name in sorted(merged):
+        metric = merged[name]
+        names = metric["labels"]
+        lines.append(f"# HELP {name} {metric['help']}")
+        lines.append(f"# TYPE {name} {metric['kind']}")
+
+        for key in sorted(metric["samples"]):
+            value = metric["samples"][key]
+            if metric["kind"] != HISTOGRAM:
+                lines.append(f"{name}{_labels(names, key)} {_format_value(value)}")
+                continue
+
+            cumulative = 0
+            bounds = [repr(float(b)) for b in metric["buckets"]] + ["+Inf"]
+            for bound, count in zip(bounds, value[:-1]):
+                cumulative += count
+                le = f'le="{bound}"'
+                lines.append(f"{name}_bucket{_labels(names, key, le)} {cumulative}")
+            lines.append(f"{name}_sum{_labels(names, key)} {_format_value(value[-1])}")
+            lines.append(f"{name}_count{_labels(names, key)} {cumulative}")
+
+    return "\n".join(lines) + "\n"
+
+
+def dump_at_exit(path):
+    """Write this process's metrics to path (Prometheus text format) at exit."""
+    path = Path(path)
+
+    def dump():
+        try:
+            atomic_write(path, render(shared=False).encode("utf-8"))
+        except OSError as e:
+            logger.warning(f"Could not write metrics to {path}: {e}")
+
+    atexit.register(dump)
@@ -12,6 +12,7 @@ from bs4 import BeautifulSoup
 from urllib.parse import urljoin
 import re
 import config
+from . import metrics
 
 
 def extract_specs_table(soup: BeautifulSoup) -> dict:
@@ -133,6 +134,7 @@ def get_zip_download_url(soup: BeautifulSoup) -> str | None:
     return None
 
 
+@metrics.PARSE_SECONDS.timed(page="detail")
 def parse_vehicle_detail(html: str, url: str) -> dict:
     """
     Parse a vehicle detail page and extract all relevant data.
@@ -0,0 +1,229 @@
+"""
+BE FORWARD Web Scraper - Facebook Post Queue
+SQLite-backed queue of vehicles waiting to be posted by n8n.
+
+The scraper enqueues each finished vehicle; n8n takes vehicles with a
+lease, posts them and acks (or nacks to retry). A lease that is neither
+acked nor nacked expires and the vehicle becomes available again, so a
+crashed workflow never loses a post, and concurrent pollers never get the
+same vehicle. SQLite in WAL mode makes this safe across gunicorn workers
+and the scraper process.
+
+Vehicle states: pending -> leased -> done (or failed after
+config.POST_MAX_ATTEMPTS nacks/expired leases).
+"""
+
+import logging
+import sqlite3
+import threading
+import time
+import uuid
+from pathlib import Path
+from typing import Iterable, List
+
+import config
+
+logger = logging.getLogger(__name__)
+
+POST_PENDING = "pending"
+POST_LEASED = "leased"
+POST_DONE = "done"
+POST_FAILED = "failed"
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS posts (
+    ref_no TEXT PRIMARY KEY,
+    folder TEXT NOT NULL,
+    status TEXT NOT NULL DEFAULT 'pending',
+    enqueued_at REAL NOT NULL,
+    lease_token TEXT,
+    lease_expires REAL,
+    attempts INTEGER NOT NULL DEFAULT 0,
+    posted_at REAL
+);
+CREATE INDEX IF NOT EXISTS posts_by_status ON posts (status, enqueued_at);
+CREATE TABLE IF NOT EXISTS meta (
+    key TEXT PRIMARY KEY,
+    value TEXT
+);
+"""
+
+
+class PostQueue:
+    """Lease/ack queue of vehicles to post. Safe across threads and processes."""
+
+    def __init__(self, db_path: Path = None):
+        self.db_path = Path(db_path or config.POST_QUEUE_DB)
+        self.db_path.parent.mkdir(parents=True, exist_ok=True)
+        self._local = threading.local()
+
+        with self._connect() as conn:
+            conn.executescript(SCHEMA)
+
+    def _connect(self) -> sqlite3.Connection:
+        # One connection per thread; sqlite3 connections are not thread-safe
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.db_path, timeout=30, isolation_level=None)
+            conn.row_factory = sqlite3.Row
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn = conn
+        return conn
+
+    def enqueue(self, ref_no: str, folder: str) -> bool:
+        """
+        Add a vehicle to post. A ref already in the queue is left as is.
+
+        Returns:
+            True if the vehicle was added
+        """
+        cursor = self._connect().execute(
+            "INSERT OR IGNORE INTO posts (ref_no, folder, enqueued_at) VALUES (?, ?, ?)",
+            (ref_no.upper(), folder, time.time()),
+        )
+        return cursor.rowcount == 1
+
+    def lease(self, batch: int = 1, timeout: float = None) -> List[dict]:
+        """
+        Take up to batch vehicles (oldest first) for posting.
+
+        Args:
+            batch: Maximum number of vehicles
+            timeout: Seconds until an unacknowledged lease expires
+
+        Returns:
+            List of {"ref_no", "folder", "lease_token", "lease_expires",
+            "attempts"} dictionaries
+        """
+        timeout = timeout or config.POST_LEASE_TIMEOUT
+        now = time.time()
+        conn = self._connect()
+
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            # Expired leases count as failed attempts
+            conn.execute(
+                "UPDATE posts SET status = ?, lease_token = NULL, lease_expires = NULL "
+                "WHERE status = ? AND lease_expires < ? AND attempts >= ?",
+                (POST_FAILED, POST_LEASED, now, config.POST_MAX_ATTEMPTS),
+            )
+            rows = conn.execute(
+                "SELECT ref_no FROM posts "
+                "WHERE status = ? OR (status = ? AND lease_expires < ?) "
+                "ORDER BY enqueued_at LIMIT ?",
+                (POST_PENDING, POST_LEASED, now, batch),
+            ).fetchall()
+
+            leases = []
+            for row in rows:
+                token = uuid.uuid4().hex
+                conn.execute(
+                    "UPDATE posts SET status = ?, lease_token = ?, lease_expires = ?, attempts = attempts + 1 "
+                    "WHERE ref_no = ?",
+                    (POST_LEASED, token, now + timeout, row["ref_no"]),
+                )
+                leases.append(dict(conn.execute(
+                    "SELECT ref_no, folder, lease_token, lease_expires, attempts FROM posts WHERE ref_no = ?",
+                    (row["ref_no"],),
+                ).fetchone()))
+            conn.execute("COMMIT")
+        except BaseException:
+            conn.execute("ROLLBACK")
+            raise
+
+        return leases
+
+    def ack(self, ref_no: str, lease_token: str) -> bool:
+        """
+        Mark a leased vehicle as posted.
+
+        Returns:
+            False if the lease is unknown or has been taken over
+        """
+        cursor = self._connect().execute(
+            "UPDATE posts SET status = ?, posted_at = ?, lease_token = NULL, lease_expires = NULL "
+            "WHERE ref_no = ? AND status = ? AND lease_token = ?",
+            (POST_DONE, time.time(), ref_no.upper(), POST_LEASED, lease_token),
+        )
+        return cursor.rowcount == 1
+
+    def nack(self, ref_no: str, lease_token: str, retry: bool = True) -> bool:
+        """
+        Give a leased vehicle back: pending again, or failed if retry is
+        False or it has used up its attempts.
+
+        Returns:
+            False if the lease is unknown or has been taken over
+        """
+        cursor = self._connect().execute(
+            "UPDATE posts SET status = CASE WHEN ? AND attempts < ? THEN ? ELSE ? END, "
+            "lease_token = NULL, lease_expires = NULL "
+            "WHERE ref_no = ? AND status = ? AND lease_token = ?",
+            (retry, config.POST_MAX_ATTEMPTS, POST_PENDING, POST_FAILED,
+             ref_no.upper(), POST_LEASED, lease_token),
+        )
+        return cursor.rowcount == 1
+
+    def stats(self) -> dict:
+        """Number of vehicles per state."""
+        rows = self._connect().execute("SELECT status, COUNT(*) AS n FROM posts GROUP BY status").fetchall()
+        counts = {status: 0 for status in (POST_PENDING, POST_LEASED, POST_DONE, POST_FAILED)}
+        counts.update({row["status"]: row["n"] for row in rows})
+        return counts
+
+    def migrate(self, posted_refs: Iterable[str], candidates: Iterable[tuple]) -> bool:
+        """
+        One-time import of the old posted_vehicles.json state.
+
+        Args:
+            posted_refs: Refs already posted (stored as done)
+            candidates: (ref_no, folder, scraped_at) of existing vehicles
+                        to queue if not posted yet
+
+        Returns:
+            False if the queue was already migrated
+        """
+        conn = self._connect()
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            if conn.execute("SELECT 1 FROM meta WHERE key = 'migrated'").fetchone():
+                conn.execute("ROLLBACK")
+                return False
+
+            now = time.time()
+            posted = {ref.upper() for ref in posted_refs}
+            conn.executemany(
+                "INSERT OR IGNORE INTO posts (ref_no, folder, status, enqueued_at, posted_at) VALUES (?, '', ?, ?, ?)",
+                [(ref, POST_DONE, now, now) for ref in posted],
+            )
+            queued = [
+                (ref.upper(), folder, scraped_at)
+                for ref, folder, scraped_at in candidates
+                if ref.upper() not in posted
+            ]
+            conn.executemany(
+                "INSERT OR IGNORE INTO posts (ref_no, folder, enqueued_at) VALUES (?, ?, ?)",
+                queued,
+            )
+            conn.execute("INSERT INTO meta (key, value) VALUES ('migrated', ?)", (str(now),))
+            conn.execute("COMMIT")
+        except BaseException:
+            conn.execute("ROLLBACK")
+            raise
+
+        logger.info(f"Post queue migrated: {len(posted)} posted, {len(queued)} queued")
+        return True
+
+
+_queue = None
+_queue_lock = threading.Lock()
+
+
+def get_queue() -> PostQueue:
+    """Return the process-wide post queue, creating it on first use."""
+    global _queue
+    with _queue_lock:
+        if _queue is None:
+            _queue = PostQueue(config.POST_QUEUE_DB)
+        return _queue
@@ -0,0 +1,238 @@
+"""
+BE FORWARD Web Scraper - Warm Scrape Worker
+Long-lived scraper process for the API server's scrape jobs.
+
+Starting daily_scraper.py per job pays interpreter startup, the imports
+(requests, BeautifulSoup, lxml, Pillow, ...) and new TLS connections every
+time. The warm worker imports everything once and runs daily_scraper.main()
+for each job, keeping the HTTP session and the image download threads
+between jobs.
+
+Protocol (JSON lines): the API writes {"argv": [...]} to the worker's
+stdin; the worker answers with {"line": ...} for each line of scraper
+output and {"done": <exit code>} when the run ends. The worker process
+is restarted after a crash or timeout.
+"""
+
+import io
+import json
+import logging
+import os
+import queue
+import subprocess
+import sys
+import threading
+import time
+import traceback
+from typing import Callable, List
+
+import config
+
+logger = logging.getLogger(__name__)
+
+
+class WorkerUnavailable(Exception):
+    """The warm worker could not be started or died during a job."""
+
+
+class WarmScraper:
+    """Parent-side handle of the warm worker process (one job at a time)."""
+
+    def __init__(self):
+        self._process = None
+        self._messages = None
+        self._lock = threading.Lock()
+
+    @property
+    def alive(self) -> bool:
+        return self._process is not None and self._process.poll() is None
+
+    def _start(self):
+        process = subprocess.Popen(
+            [sys.executable, "-m", "utils.scrape_worker"],
+            stdin=subprocess.PIPE,
+            stdout=subprocess.PIPE,
+            text=True,
+            bufsize=1,
+            cwd=str(config.BASE_DIR),
+        )
+        messages = queue.Queue()
+
+        def read():
+            for raw in process.stdout:
+                try:
+                    messages.put(json.loads(raw))
+                except ValueError:
+                    messages.put({"line": raw.rstrip("\n")})
+            messages.put(None)
+
+        threading.Thread(target=read, name="scrape-worker-reader", daemon=True).start()
+
+        try:
+            ready = messages.get(timeout=config.SCRAPE_WORKER_START_TIMEOUT)
+        except queue.Empty:
+            ready = None
+        if not ready or not ready.get("ready"):
+            # Don't leave the process behind; the job falls back to a subprocess
+            process.kill()
+            process.wait()
+            raise WorkerUnavailable("Warm scrape worker failed to start")
+
+        self._process = process
+        self._messages = messages
+        logger.info(f"Warm scrape worker started (pid {process.pid})")
+
+    def stop(self):
+        """Terminate the worker process."""
+        if self._process is not None:
+            self._process.kill()
+            self._process.wait()
+            self._process = None
+
+    def run(self, argv: List[str], on_line: Callable[[str], None], timeout: float) -> tuple:
+        """
+        Run daily_scraper.main(argv) in the worker.
+
+        Args:
+            argv: Scraper command line arguments
+            on_line: Called with each line of scraper output
+            timeout: Seconds before the worker is killed
+
+        Returns:
+            (exit code, timed out)
+        """
+        with self._lock:
+            if not self.alive:
+                try:
+                    self._start()
+                except OSError as e:
+                    raise WorkerUnavailable(f"Could not start warm scrape worker: {e}")
+
+            try:
+                self._process.stdin.write(json.dumps({"argv": argv}) + "\n")
+                self._process.stdin.flush()
+            except OSError as e:
+                self.stop()
+                raise WorkerUnavailable(f"Warm scrape worker is gone: {e}")
+
+            deadline = time.monotonic() + timeout
+            while True:
+                try:
+                    message = self._messages.get(timeout=max(0.0, deadline - time.monotonic()))
+                except queue.Empty:
+                    logger.warning("Scrape job timed out, restarting warm worker")
+                    self.stop()
+                    return -9, True
+
+                if message is None:
+                    self.stop()
+                    raise WorkerUnavailable("Warm scrape worker exited during a job")
+                if "line" in message:
+                    on_line(message["line"])
+                elif "done" in message:
+                    return message["done"], False
+
+
+_worker = None
+_worker_lock = threading.Lock()
+
+
+def get_worker() -> WarmScraper:
+    """Return the process-wide warm worker handle."""
+    global _worker
+    with _worker_lock:
+        if _worker is None:
+            _worker = WarmScraper()
+        return _worker
+
+
+# =============================================================================
+# Worker process
+# =============================================================================
+
+class _LineForwarder(io.TextIOBase):
+    """sys.stdout replacement that sends complete lines to the API."""
+
+    def __init__(self, channel):
+        self._channel = channel
+        self._buffer = ""
+        self._lock = threading.Lock()
+
+    def writable(self) -> bool:
+        return True
+
+    def write(self, text: str) -> int:
+        with self._lock:
+            self._buffer += text
+            while "\n" in self._buffer:
+                line, self._buffer = self._buffer.split("\n", 1)
+                _send(self._channel, {"line": line})
+        return len(text)
+
+    def flush(self):
+        with self._lock:
+            if self._buffer:
+                _send(self._channel, {"line": self._buffer})
+                self._buffer = ""
+
+
+_send_lock = threading.Lock()
+
+
+def _send(channel, message: dict):
+    with _send_lock:
+        channel.write(json.dumps(message) + "\n")
+        channel.flush()
+
+
+def _config_snapshot() -> dict:
+    return {name: value for name, value in vars(config).items() if name.isupper()}
+
+
+def _config_restore(snapshot: dict):
+    # Jobs change settings through CLI flags (--country, --no-crop, ...)
+    for name, value in snapshot.items():
+        setattr(config, name, value)
+
+
+def serve():
+    """Worker process main loop."""
+    # Keep the real stdout for the protocol; anything else printing to
+    # file descriptor 1 goes to stderr instead
+    channel = os.fdopen(os.dup(1), "w", buffering=1)
+    os.dup2(2, 1)
+    sys.stdout = sys.stderr = _LineForwarder(channel)
+
+    # The expensive part, done once
+    import daily_scraper
+    from utils import metrics
+
+    # Scrape metrics reach the API's /metrics through snapshots
+    metrics.share()
+
+    # Log handlers set up while importing still point at the real streams
+    for handler in logging.getLogger().handlers:
+        if isinstance(handler, logging.StreamHandler) and not isinstance(handler, logging.FileHandler):
+            handler.setStream(sys.stdout)
+
+    _send(channel, {"ready": True})
+
+    for raw in sys.stdin:
+        request = json.loads(raw)
+        snapshot = _config_snapshot()
+        try:
+            code = daily_scraper.main(request["argv"])
+        except SystemExit as e:
+            code = e.code if isinstance(e.code, int) else 1
+        except Exception:
+            traceback.print_exc()
+            code = 1
+        finally:
+            _config_restore(snapshot)
+            sys.stdout.flush()
+
+        _send(channel, {"done": code or 0})
+
+
+if __name__ == "__main__":
+    serve()
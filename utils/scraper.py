@@ -11,13 +11,16 @@ from typing import List, Dict
 import requests
 from bs4 import BeautifulSoup
 import config
-from . import parser
+from . import metrics, parser
 
 # Set up logging
 logging.basicConfig(level=getattr(logging, config.LOG_LEVEL))
 logger = logging.getLogger(__name__)
 
 
+GONE_STATUSES = (404, 410)
+
+
 def fetch_page(url: str, session: requests.Session = None) -> str | None:
     """
     Fetch a page from BE FORWARD with retry logic and rate limiting.
@@ -29,24 +32,47 @@ def fetch_page(url: str, session: requests.Session = None) -> str | None:
     Returns:
         The HTML content as a string, or None if failed
     """
+    response = fetch_response(url, session)
+    if response is None or response.status_code in GONE_STATUSES:
+        return None
+    return response.text
+
+
+def fetch_response(url: str, session: requests.Session = None) -> requests.Response | None:
+    """
+    Like fetch_page, but return the response itself.
+
+    A 404 or 410 is returned as is, without retrying (the page is gone).
+
+    Returns:
+        The response, or None if no usable response came after retrying
+    """
     if session is None:
         session = requests.Session()
 
     for attempt in range(config.MAX_RETRIES):
+        if attempt:
+            metrics.HTTP_RETRIES.inc(url_class=metrics.url_class(url))
         try:
-            response = session.get(
-                url,
-                headers=config.HEADERS,
-                timeout=config.TIMEOUT,
-            )
-
-            response.raise_for_status()
+            try:
+                response = session.get(
+                    url,
+                    headers=config.HEADERS,
+                    timeout=config.TIMEOUT,
+                )
+            except requests.RequestException:
+                metrics.record_failure(url)
+                raise
+
+            metrics.record_response(url, response)
+            if response.status_code not in GONE_STATUSES:
+                response.raise_for_status()
 
             # Rate limiting - add random delay between requests
             delay = random.uniform(config.REQUEST_DELAY_MIN, config.REQUEST_DELAY_MAX)
             time.sleep(delay)
 
-            return response.text
+            return response
 
         except requests.RequestException as e:
             logger.warning(f"Attempt {attempt + 1}/{config.MAX_RETRIES} failed for {url}: {e}")
@@ -57,6 +83,29 @@ def fetch_page(url: str, session: requests.Session = None) -> str | None:
                 return None
 
 
+def fetch_vehicle_page(url: str, session: requests.Session = None) -> tuple:
+    """
+    Fetch a vehicle detail page and tell whether the vehicle is gone.
+
+    Args:
+        url: The vehicle detail page URL
+        session: Optional requests Session
+
+    Returns:
+        (HTML or None, gone). gone is True only on a definite signal: a 404
+        or 410, or a redirect away from the detail page. A timeout or server
+        error is not.
+    """
+    response = fetch_response(url, session)
+    if response is None:
+        return None, False
+    if response.status_code in GONE_STATUSES:
+        return None, True
+    if response.history and metrics.url_class(response.url) != "detail":
+        return None, True
+    return response.text, False
+
+
 def get_total_pages(html: str) -> int:
     """
     Extract the total number of pages from the stock list page.
@@ -98,6 +147,7 @@ def get_total_pages(html: str) -> int:
     return 1
 
 
+@metrics.PARSE_SECONDS.timed(page="stocklist")
 def get_vehicle_links(html: str, base_url: str = config.STOCK_LIST_URL) -> List[Dict[str, str]]:
     """
     Extract vehicle links from a stock list page.